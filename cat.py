@@ -3,6 +3,8 @@ import json
 import subprocess
 import platform
 import zipfile
+import zlib
+import struct
 import uuid
 import tkinter as tk
 import ttkbootstrap as ttk
@@ -11,17 +13,20 @@ from tkinter import messagebox, filedialog
 from io import BytesIO
 import requests
 import threading
-from queue import Queue
+from queue import Queue, PriorityQueue, Empty
+import itertools
 import concurrent.futures
 import webbrowser
 import shutil
 import re
+import hashlib
+import sqlite3
 import pypresence
 import time
+import random
+from dataclasses import dataclass, field
 from markdown_it import MarkdownIt
-from tkhtmlview import HTMLLabel
-from html.parser import HTMLParser # <-- ADICIONE ESTE
-from io import BytesIO, StringIO # <-- ADICIONE 'StringIO'
+from html.parser import HTMLParser
 
 
 try:
@@ -39,6 +44,10 @@ MODPACKS_DIR = os.path.join(BASE_DIR, "modpacks")
 ACCOUNTS_FILE = os.path.join(BASE_DIR, "accounts.json")
 JAVA_ROOT = os.path.join(BASE_DIR, "java")
 SETTINGS_FILE = os.path.join(BASE_DIR, "settings.json")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+STORE_DIR = os.path.join(BASE_DIR, "store") # Mods/packs compartilhados (por sha1)
+
+VERSION_MANIFEST_URL = "https://launchermeta.mojang.com/mc/game/version_manifest.json"
 
 # As variáveis de JOGO (GAME_DIR, etc.) são definidas dentro da classe agora
 GAME_DIR = None
@@ -46,31 +55,3101 @@ VERSIONS_DIR = None
 LIBRARIES_DIR = None
 ASSETS_DIR = None
 
-# --- NOVAS FUNÇÕES DE AJUDA (PARA LIMPAR HTML) ---
+# --- DESCRIÇÃO DOS PROJETOS (MARKDOWN -> tk.Text) ---
+
+class DescriptionBuilder:
+    """
+    Converte a descrição de um projeto (Markdown com HTML solto, como no
+    Modrinth) em uma lista compacta de trechos para o tk.Text:
+
+      ("text", texto, tags, link)   tags = tupla de nomes de tag do Text
+      ("image", url, alt, link)
+
+    Roda no worker; o thread da UI só insere os trechos prontos.
+    """
+
+    HEADINGS = {"h1": "h1", "h2": "h2", "h3": "h3", "h4": "h3", "h5": "h3", "h6": "h3"}
+    HTML_STYLES = {"b": "bold", "strong": "bold", "i": "italic", "em": "italic", "code": "code", "s": "strike", "del": "strike"}
+    HTML_BLOCKS = {"p", "div", "center", "details", "summary", "table", "tr", "blockquote", "pre"}
 
-class MLStripper(HTMLParser):
-    """Uma classe simples para remover tags HTML de uma string."""
     def __init__(self):
-        super().__init__()
+        self.segments = []
+        self.styles = [] # Pilha de tags ativas
+        self.links = [None] # Pilha de hrefs ativos
+        self.lists = [] # Pilha de [tipo, próximo número]
+        self.newlines = 2 # Quebras no fim da saída (começa como "início de bloco")
+        self.first_cell = True
+
+    # --- Saída ---
+
+    def write(self, text, extra=()):
+        if not text:
+            return
+        tags = tuple(dict.fromkeys(self.styles + list(extra)))
+        link = self.links[-1]
+        last = self.segments[-1] if self.segments else None
+        if last and last[0] == "text" and last[2] == tags and last[3] == link:
+            self.segments[-1] = ("text", last[1] + text, tags, link) # Junta trechos iguais
+        else:
+            self.segments.append(("text", text, tags, link))
+        stripped = text.rstrip("\n")
+        self.newlines = len(text) - len(stripped) + (self.newlines if not stripped else 0)
+
+    def block_break(self, count=2):
+        """Garante 'count' quebras de linha no fim (sem acumular linhas em branco)."""
+        if self.newlines < count:
+            self.segments.append(("text", "\n" * (count - self.newlines), (), None))
+            self.newlines = count
+
+    def image(self, url, alt=""):
+        if url:
+            self.segments.append(("image", url, alt or "imagem", self.links[-1]))
+            self.newlines = 0
+
+    def _push(self, tag):
+        self.styles.append(tag)
+
+    def _pop(self, tag):
+        if tag in self.styles:
+            del self.styles[len(self.styles) - 1 - self.styles[::-1].index(tag)]
+
+    def _list_item(self):
+        self.block_break(1)
+        kind = self.lists[-1] if self.lists else ["bullet", None]
+        indent = "    " * max(0, len(self.lists) - 1)
+        if kind[0] == "ordered":
+            self.write(f"{indent}{kind[1]}. ")
+            kind[1] += 1
+        else:
+            self.write(f"{indent}• ")
+
+    # --- Markdown ---
+
+    def build(self, markdown):
+        md = MarkdownIt("commonmark").enable(["table", "strikethrough"])
+        html = _DescriptionHtmlParser(self)
+        for token in md.parse(markdown or ""):
+            t = token.type
+            if t == "heading_open":
+                self.block_break()
+                self._push(self.HEADINGS.get(token.tag, "h3"))
+            elif t == "heading_close":
+                self._pop(self.HEADINGS.get(token.tag, "h3"))
+                self.block_break()
+            elif t == "paragraph_close":
+                self.block_break(1 if token.hidden else 2) # Listas "apertadas" não têm linha em branco
+            elif t in ("bullet_list_open", "ordered_list_open"):
+                self.block_break(1)
+                start = int(token.attrGet("start") or 1)
+                self.lists.append(["ordered" if t == "ordered_list_open" else "bullet", start])
+            elif t in ("bullet_list_close", "ordered_list_close"):
+                self.lists.pop()
+                self.block_break(2 if not self.lists else 1)
+            elif t == "list_item_open":
+                self._list_item()
+            elif t == "blockquote_open":
+                self.block_break()
+                self._push("quote")
+            elif t == "blockquote_close":
+                self._pop("quote")
+                self.block_break()
+            elif t in ("fence", "code_block"):
+                self.block_break()
+                self.write(token.content.rstrip("\n"), ("codeblock",))
+                self.block_break()
+            elif t == "hr":
+                self.block_break(1)
+                self.write("─" * 40, ("hr",))
+                self.block_break()
+            elif t == "html_block":
+                html.feed(token.content)
+                html.flush()
+            elif t == "tr_open":
+                self.first_cell = True
+            elif t in ("th_open", "td_open"):
+                if not self.first_cell:
+                    self.write("  │  ", ("hr",))
+                self.first_cell = False
+                if t == "th_open":
+                    self._push("bold")
+            elif t == "th_close":
+                self._pop("bold")
+            elif t == "tr_close":
+                self.block_break(1)
+            elif t == "table_close":
+                self.block_break()
+            elif t == "inline":
+                self._inline(token.children or [], html)
+        html.flush()
+        return self.segments
+
+    def _inline(self, children, html):
+        styles = {"strong": "bold", "em": "italic", "s": "strike"}
+        for child in children:
+            t = child.type
+            if t == "text":
+                self.write(child.content)
+            elif t == "softbreak":
+                self.write(" ")
+            elif t == "hardbreak":
+                self.write("\n")
+            elif t == "code_inline":
+                self.write(child.content, ("code",))
+            elif t.endswith("_open") and t[:-5] in styles:
+                self._push(styles[t[:-5]])
+            elif t.endswith("_close") and t[:-6] in styles:
+                self._pop(styles[t[:-6]])
+            elif t == "link_open":
+                self.links.append(child.attrGet("href"))
+                self._push("link")
+            elif t == "link_close":
+                self._pop("link")
+                if len(self.links) > 1:
+                    self.links.pop()
+            elif t == "image":
+                self.image(child.attrGet("src"), child.content)
+            elif t == "html_inline":
+                html.feed(child.content)
+
+class _DescriptionHtmlParser(HTMLParser):
+    """As tags HTML mais comuns nas descrições do Modrinth, escritas no mesmo DescriptionBuilder."""
+
+    def __init__(self, builder):
+        super().__init__(convert_charrefs=True)
+        self.builder = builder
+        self.skip = 0 # Dentro de <script>/<style>
+
+    def flush(self):
+        self.close()
         self.reset()
-        self.strict = False
-        self.convert_charrefs= True
-        self.text = StringIO()
-    def handle_data(self, d):
-        self.text.write(d)
-    def get_data(self):
-        return self.text.getvalue()
-
-def strip_tags(html):
-    """Recebe uma string HTML e retorna apenas o texto puro."""
-    s = MLStripper()
-    s.feed(html)
-    return s.get_data()
+
+    def handle_starttag(self, tag, attrs):
+        b, attrs = self.builder, dict(attrs)
+        if tag in ("script", "style"):
+            self.skip += 1
+        elif tag == "img":
+            b.image(attrs.get("src"), attrs.get("alt"))
+        elif tag == "a":
+            b.links.append(attrs.get("href"))
+            b._push("link")
+        elif tag == "br":
+            b.write("\n")
+        elif tag == "li":
+            b._list_item()
+        elif tag in ("ul", "ol"):
+            b.lists.append(["ordered" if tag == "ol" else "bullet", 1])
+        elif tag in b.HEADINGS:
+            b.block_break()
+            b._push(b.HEADINGS[tag])
+        elif tag in b.HTML_STYLES:
+            b._push(b.HTML_STYLES[tag])
+        elif tag == "hr":
+            b.block_break(1)
+            b.write("─" * 40, ("hr",))
+            b.block_break()
+        elif tag in b.HTML_BLOCKS:
+            b.block_break(1)
+
+    def handle_endtag(self, tag):
+        b = self.builder
+        if tag in ("script", "style"):
+            self.skip = max(0, self.skip - 1)
+        elif tag == "a":
+            b._pop("link")
+            if len(b.links) > 1:
+                b.links.pop()
+        elif tag in ("ul", "ol"):
+            if b.lists:
+                b.lists.pop()
+            b.block_break()
+        elif tag in b.HEADINGS:
+            b._pop(b.HEADINGS[tag])
+            b.block_break()
+        elif tag in b.HTML_STYLES:
+            b._pop(b.HTML_STYLES[tag])
+        elif tag in b.HTML_BLOCKS:
+            b.block_break(2 if tag in ("p", "center", "details", "table") else 1)
+
+    def handle_data(self, data):
+        if self.skip:
+            return
+        text = re.sub(r"\s+", " ", data)
+        if text == " " and self.builder.newlines:
+            return # Só espaço entre tags no começo de uma linha
+        self.builder.write(text.lstrip() if self.builder.newlines else text)
+
+# --- DOWNLOADS ---
+
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024 # 1 MiB, reutilizado por cada thread de download
+_download_buffers = threading.local()
+
+class HashMismatchError(Exception):
+    """O arquivo baixado não bate com o hash (ou tamanho) esperado."""
+
+def link_or_copy(src, dst):
+    """
+    Cria 'dst' como hardlink de 'src' (sem gastar disco). Se o sistema de
+    arquivos não suportar, ou se forem discos diferentes, faz uma cópia.
+    Retorna True se conseguiu o hardlink.
+    """
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp_path = f"{dst}.{threading.get_ident()}.tmp"
+    linked = True
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        shutil.copy2(src, tmp_path)
+        linked = False
+    os.replace(tmp_path, dst)
+    return linked
+
+def hardlink(src, dst):
+    """
+    Cria 'dst' como hardlink de 'src', SEM cair para cópia. Retorna False se
+    o sistema de arquivos não suportar (FAT/exFAT, rede, volumes diferentes).
+    """
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp_path = f"{dst}.{threading.get_ident()}.tmp"
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        return False
+    os.replace(tmp_path, dst)
+    return True
+
+# --- CACHE HTTP (METADADOS) ---
+
+class RequestCancelled(Exception):
+    """A requisição foi abortada (ex: o usuário digitou outra busca)."""
+
+class HttpCache:
+    """
+    Cache HTTP persistente (em disco) para GETs de metadados em JSON.
+
+    Respeita Cache-Control (max-age, no-cache, no-store) e revalida com
+    If-None-Match / If-Modified-Since usando o ETag e o Last-Modified salvos.
+    Cada entrada é um único arquivo: uma linha JSON de metadados + o corpo.
+    """
+
+    DEFAULT_MAX_AGE = 300 # Segundos, quando o servidor não diz nada
+
+    def __init__(self, cache_dir, user_agent=None, get_fn=None):
+        self.cache_dir = cache_dir
+        self.user_agent = user_agent
+        self.get_fn = get_fn or requests.get # Ex: o GET com ritmo do ModrinthClient
+        self._lock = threading.Lock()
+        self._refreshing = set() # Chaves com revalidação em andamento
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _key(self, url, params):
+        raw = url
+        if params:
+            raw += "?" + json.dumps(params, sort_keys=True)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.cache")
+
+    def _load(self, key):
+        """Retorna (meta, corpo) da entrada, ou (None, None) se não existir."""
+        try:
+            with open(self._entry_path(key), "rb") as f:
+                meta = json.loads(f.readline().decode("utf-8"))
+                body = f.read()
+            return meta, body
+        except (OSError, ValueError):
+            return None, None
+
+    def version_tag(self, url, params=None):
+        """
+        Identifica a versão em cache de 'url' (sha1 do corpo, calculado ao
+        salvar, ou ETag/Last-Modified) lendo só a linha de metadados.
+        None se não há entrada. Serve para quem deriva dados da resposta
+        saber se precisa refazê-los.
+        """
+        try:
+            with open(self._entry_path(self._key(url, params)), "rb") as f:
+                meta = json.loads(f.readline().decode("utf-8"))
+        except (OSError, ValueError):
+            return None
+        return meta.get("body_sha1") or meta.get("etag") or meta.get("last_modified")
+
+    def _save(self, key, meta, body):
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(meta).encode("utf-8") + b"\n")
+                f.write(body)
+            os.replace(tmp_path, path) # Troca atômica
+        except OSError as e:
+            print(f"[CACHE] Não foi possível salvar {meta.get('url')}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _parse_cache_control(value):
+        """'max-age=60, no-cache' -> {'max-age': '60', 'no-cache': True}"""
+        directives = {}
+        for part in (value or "").split(","):
+            part = part.strip().lower()
+            if not part:
+                continue
+            if "=" in part:
+                name, arg = part.split("=", 1)
+                directives[name.strip()] = arg.strip().strip('"')
+            else:
+                directives[part] = True
+        return directives
+
+    def _freshness(self, resp):
+        """Extrai as regras de validade dos cabeçalhos da resposta."""
+        cc = self._parse_cache_control(resp.headers.get("Cache-Control"))
+        try:
+            max_age = int(cc.get("max-age", self.DEFAULT_MAX_AGE))
+        except (TypeError, ValueError):
+            max_age = self.DEFAULT_MAX_AGE
+        return {
+            "stored_at": time.time(),
+            "max_age": max_age,
+            "no_cache": "no-cache" in cc,
+            "no_store": "no-store" in cc,
+        }
+
+    def _is_fresh(self, meta, ttl):
+        if meta.get("no_cache"):
+            return False
+        max_age = ttl if ttl is not None else meta.get("max_age", 0)
+        return (time.time() - meta.get("stored_at", 0)) < max_age
+
+    @staticmethod
+    def _read_cancellable(resp, cancel_event):
+        """Lê o corpo em blocos, abortando assim que 'cancel_event' for setado."""
+        chunks = []
+        with resp:
+            for chunk in resp.iter_content(16 * 1024):
+                if cancel_event.is_set():
+                    raise RequestCancelled(resp.url)
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _fetch(self, url, params, key, meta, body, timeout, cancel_event=None):
+        """
+        Faz o GET (condicional, se houver entrada) e atualiza o cache.
+        Retorna (dados, mudou).
+        """
+        headers = {}
+        if self.user_agent:
+            headers["User-Agent"] = self.user_agent
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        if cancel_event is not None and cancel_event.is_set():
+            raise RequestCancelled(url)
+        resp = self.get_fn(url, params=params, headers=headers, timeout=timeout, stream=cancel_event is not None)
+
+        if resp.status_code == 304 and meta is not None:
+            # Nada mudou: só renova a validade
+            resp.close()
+            meta.update(self._freshness(resp))
+            self._save(key, meta, body)
+            return json.loads(body), False
+
+        resp.raise_for_status()
+        content = self._read_cancellable(resp, cancel_event) if cancel_event is not None else resp.content
+        data = json.loads(content)
+        new_meta = self._freshness(resp)
+        if not new_meta.pop("no_store"):
+            new_meta.update({
+                "url": url,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "body_sha1": hashlib.sha1(content).hexdigest(),
+            })
+            self._save(key, new_meta, content)
+        return data, body != content
+
+    def _revalidate_in_background(self, url, params, key, meta, body, on_refresh, timeout):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _worker():
+            try:
+                data, changed = self._fetch(url, params, key, meta, body, timeout)
+                if changed:
+                    on_refresh(data)
+            except Exception as e:
+                print(f"[CACHE] Falha ao revalidar {url} em segundo plano: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def get_json(self, url, params=None, ttl=None, on_refresh=None, timeout=15, cancel_event=None):
+        """
+        Retorna o JSON de 'url', usando o cache quando possível.
+
+        - 'ttl' (segundos) substitui o max-age informado pelo servidor.
+        - Se 'on_refresh' for passado e a entrada estiver vencida, devolve a
+          cópia antiga NA HORA (stale-while-revalidate) e revalida em um
+          thread; 'on_refresh(dados)' é chamado DESSE thread se algo mudou.
+        - Se a rede falhar e houver cópia antiga, ela é usada.
+        - Se 'cancel_event' (threading.Event) for setado durante o download,
+          levanta RequestCancelled e nada é gravado.
+        """
+        key = self._key(url, params)
+        meta, body = self._load(key)
+
+        if meta is not None:
+            try:
+                if self._is_fresh(meta, ttl):
+                    return json.loads(body)
+                if on_refresh is not None:
+                    stale_data = json.loads(body)
+                    self._revalidate_in_background(url, params, key, meta, body, on_refresh, timeout)
+                    return stale_data
+            except ValueError:
+                meta, body = None, None # Entrada corrompida, baixa de novo
+
+        try:
+            return self._fetch(url, params, key, meta, body, timeout, cancel_event)[0]
+        except requests.RequestException as e:
+            if meta is not None:
+                print(f"[CACHE] Falha ao revalidar {url} ({e}). Usando cópia em cache.")
+                return json.loads(body)
+            raise
+
+# --- TABELA DE REFERÊNCIAS DE ASSETS ---
+
+class AssetRefTable:
+    """
+    Tabela compacta (assets/asset_refs.json) que diz quais índices de assets
+    já foram materializados em assets/objects e quais objetos cada um usa.
+
+    Cada índice ganha um bit; cada objeto guarda uma máscara com os bits dos
+    índices que o referenciam. Um objeto com máscara != 0 já foi verificado
+    no disco, então trocar para um índice que compartilha 95% dos objetos só
+    precisa checar os 5% novos.
+    """
+
+    FILE_NAME = "asset_refs.json"
+    SPOT_CHECKS = 16 # Objetos "já materializados" conferidos por amostragem
+
+    def __init__(self, assets_dir):
+        self.assets_dir = assets_dir
+        self.path = os.path.join(assets_dir, self.FILE_NAME)
+        self.indexes = {} # index_id -> {"sha1": ..., "bit": n}
+        self.objects = {} # hash -> máscara de bits
+        self._load()
+
+    def _load(self):
+        objects_dir = os.path.join(self.assets_dir, "objects")
+        if not os.path.exists(self.path) or not os.path.isdir(objects_dir):
+            return # Sem tabela (ou os objetos foram apagados): começa do zero
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.indexes = data.get("indexes", {})
+            self.objects = data.get("objects", {})
+        except Exception as e:
+            print(f"[ASSET] Tabela de referências inválida, recriando: {e}")
+            self.indexes, self.objects = {}, {}
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"indexes": self.indexes, "objects": self.objects}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[ASSET] Não foi possível salvar a tabela de referências: {e}")
+
+    def _object_path(self, asset_hash):
+        return os.path.join(self.assets_dir, "objects", asset_hash[:2], asset_hash)
+
+    def is_materialised(self, index_id, index_sha1):
+        """True se este índice (com este conteúdo) já foi todo baixado."""
+        entry = self.indexes.get(index_id)
+        return bool(entry) and entry.get("sha1") == index_sha1
+
+    def delta(self, objects):
+        """
+        Recebe o dict 'objects' de um índice e retorna só as entradas cujos
+        hashes ainda não foram materializados por nenhum índice.
+        """
+        new_objects = {}
+        known_hashes = []
+        for name, info in objects.items():
+            asset_hash = info.get("hash")
+            if not asset_hash:
+                continue
+            if self.objects.get(asset_hash):
+                known_hashes.append(asset_hash)
+            else:
+                new_objects[name] = info
+
+        if not self.spot_check(known_hashes):
+            return dict(objects)
+        return new_objects
+
+    def spot_check(self, hashes):
+        """
+        Confere uma amostra dos objetos: se alguém apagou objetos "na mão", a
+        tabela não é confiável e é zerada (o chamador volta para a checagem
+        completa). A amostra é sorteada, então cada lançamento olha outros objetos.
+        """
+        hashes = list(hashes)
+        sample = random.sample(hashes, min(len(hashes), self.SPOT_CHECKS))
+        if any(not os.path.exists(self._object_path(h)) for h in sample):
+            print("[ASSET] Tabela de referências desatualizada. Checando todos os objetos.")
+            self.indexes, self.objects = {}, {}
+            return False
+        return True
+
+    def _free_bit(self):
+        used = {entry["bit"] for entry in self.indexes.values()}
+        bit = 0
+        while bit in used:
+            bit += 1
+        return bit
+
+    def mark_materialised(self, index_id, index_sha1, objects):
+        """Registra que todos os objetos deste índice estão no disco."""
+        entry = self.indexes.get(index_id)
+        if entry:
+            self._clear_bit(entry["bit"]) # Índice mudou: refaz a referência
+            bit = entry["bit"]
+        else:
+            bit = self._free_bit()
+        flag = 1 << bit
+        for info in objects.values():
+            asset_hash = info.get("hash")
+            if asset_hash:
+                self.objects[asset_hash] = self.objects.get(asset_hash, 0) | flag
+        self.indexes[index_id] = {"sha1": index_sha1, "bit": bit}
+        self.save()
+
+    def _clear_bit(self, bit):
+        mask = ~(1 << bit)
+        for asset_hash in list(self.objects):
+            value = self.objects[asset_hash] & mask
+            if value:
+                self.objects[asset_hash] = value
+            else:
+                del self.objects[asset_hash]
+
+    def forget_index(self, index_id):
+        """Remove um índice da tabela (usado quando os objetos são apagados)."""
+        entry = self.indexes.pop(index_id, None)
+        if entry:
+            self._clear_bit(entry["bit"])
+
+# --- COLETOR DE LIXO DO GAME_DIR ---
+
+def maven_name_to_path(lib_name, classifier=None):
+    """
+    Converte uma coordenada Maven em caminho relativo.
+    Ex: 'org.lwjgl:lwjgl:3.3.3:natives-windows' ->
+        'org/lwjgl/lwjgl/3.3.3/lwjgl-3.3.3-natives-windows.jar'
+    """
+    ext = "jar"
+    if "@" in lib_name:
+        lib_name, ext = lib_name.rsplit("@", 1)
+    parts = lib_name.split(":")
+    if len(parts) < 3:
+        return None
+    group, name, ver = parts[0], parts[1], parts[2]
+    if classifier is None and len(parts) >= 4:
+        classifier = parts[3]
+    filename = f"{name}-{ver}-{classifier}.{ext}" if classifier else f"{name}-{ver}.{ext}"
+    return f"{group.replace('.', '/')}/{name}/{ver}/{filename}"
+
+class GameDirGC:
+    """
+    Coletor de lixo "mark-and-sweep" do GAME_DIR.
+
+    MARK: a partir do config.json de cada modpack (e dos perfis do
+    launcher_profiles.json), segue a cadeia de versões (inheritsFrom) e marca
+    tudo que é alcançável: pastas de versão, bibliotecas, índices e objetos de
+    assets, layouts virtuais e pastas de natives.
+    SWEEP: o que não foi marcado dentro das áreas gerenciadas é lixo.
+
+    Perfis "latest-release"/"latest-snapshot" do launcher oficial são
+    resolvidos pelo 'latest_versions_fn' (manifesto da Mojang). Se não der
+    para resolver, a área de versões não é varrida (o .minecraft é compartilhado).
+
+    Um cache de varredura (.raposo_gc_cache.json) guarda o resultado do MARK e
+    a listagem de cada pasta (validada pelo mtime), então rodar de novo é rápido.
+
+    Arquivos que o cache do Forge (ForgeInstallCache) também guarda em
+    hardlink não liberam espaço ao serem apagados: entram no relatório como
+    "retidos", fora dos bytes liberados.
+    """
+
+    CACHE_FILE = ".raposo_gc_cache.json"
+    MIN_AGE_SECONDS = 600 # Nunca apaga arquivos mexidos nos últimos 10 min
+
+    def __init__(self, game_dir, modpacks_dir, store_dir=None, latest_versions_fn=None, forge_cache_dir=None):
+        self.game_dir = game_dir
+        self.modpacks_dir = modpacks_dir
+        self.store_dir = store_dir
+        self.forge_cache_dir = forge_cache_dir
+        self.latest_versions_fn = latest_versions_fn # () -> {"release": id, "snapshot": id}
+        self.protect_versions = False # True se algum perfil "latest-*" não foi resolvido
+        self.versions_dir = os.path.join(game_dir, "versions")
+        self.libraries_dir = os.path.join(game_dir, "libraries")
+        self.assets_dir = os.path.join(game_dir, "assets")
+        self.natives_dir = os.path.join(game_dir, "natives")
+        self.temp_dir = os.path.join(game_dir, "temp_installers")
+        self.cache_path = os.path.join(game_dir, self.CACHE_FILE)
+        self._cache = self._load_cache()
+
+    # --- Cache ---
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_cache(self):
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._cache, f, separators=(",", ":"))
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"[GC] Não foi possível salvar o cache de varredura: {e}")
+
+    @staticmethod
+    def _stat_key(path):
+        try:
+            st = os.stat(path)
+            return [st.st_mtime_ns, st.st_size]
+        except OSError:
+            return None
+
+    # --- MARK ---
+
+    def _root_versions(self):
+        """Versões usadas pelos modpacks (e pelos perfis do launcher oficial)."""
+        roots = set()
+        if os.path.isdir(self.modpacks_dir):
+            for name in os.listdir(self.modpacks_dir):
+                config_path = os.path.join(self.modpacks_dir, name, "config.json")
+                if not os.path.isfile(config_path):
+                    continue
+                try:
+                    with open(config_path, "r", encoding="utf-8") as f:
+                        version = json.load(f).get("version")
+                    if version:
+                        roots.add(version)
+                except Exception as e:
+                    print(f"[GC] Ignorando config inválido {config_path}: {e}")
+
+        # Se o GAME_DIR for o .minecraft padrão, o launcher oficial também usa ele
+        self.protect_versions = False
+        profiles_path = os.path.join(self.game_dir, "launcher_profiles.json")
+        try:
+            with open(profiles_path, "r", encoding="utf-8") as f:
+                profiles = json.load(f).get("profiles", {})
+        except Exception:
+            profiles = {}
+        latest = None
+        for profile in profiles.values():
+            last_version = profile.get("lastVersionId")
+            if not last_version:
+                continue
+            if not last_version.startswith("latest-"):
+                roots.add(last_version)
+                continue
+            # "latest-release" / "latest-snapshot": a versão real vem do manifesto
+            if latest is None:
+                latest = self._latest_versions()
+            resolved = latest.get(last_version[len("latest-"):])
+            if resolved:
+                roots.add(resolved)
+            else:
+                print(f"[GC] Perfil '{last_version}' não resolvido; a pasta de versões não será varrida.")
+                self.protect_versions = True
+        return roots
+
+    def _latest_versions(self):
+        if not self.latest_versions_fn:
+            return {}
+        try:
+            return self.latest_versions_fn() or {}
+        except Exception as e:
+            print(f"[GC] Não foi possível ler as versões 'latest' do manifesto: {e}")
+            return {}
+
+    def mark(self):
+        """Retorna (arquivos_marcados, pastas_marcadas) alcançáveis pelas raízes."""
+        roots = sorted(self._root_versions())
+        cached = self._cache.get("mark")
+        if cached and cached.get("roots") == roots and all(
+            self._stat_key(path) == key for path, key in cached.get("files", {}).items()
+        ):
+            return self._normalise(cached["marked_files"]), self._normalise(cached["marked_dirs"])
+
+        marked_files, marked_dirs, visited_files = set(), set(), []
+        for root in roots:
+            self._mark_version_chain(root, marked_files, marked_dirs, visited_files)
+
+        self._cache["mark"] = {
+            "roots": roots,
+            "files": {path: self._stat_key(path) for path in visited_files},
+            "marked_files": sorted(marked_files),
+            "marked_dirs": sorted(marked_dirs),
+        }
+        return self._normalise(marked_files), self._normalise(marked_dirs)
+
+    @staticmethod
+    def _normalise(paths):
+        # Comparado por string com o que o _walk gera: mesmo separador e sem "./"
+        return {os.path.normpath(path) for path in paths}
+
+    def _mark_version_chain(self, root_version, marked_files, marked_dirs, visited_files):
+        # Os natives são extraídos com o nome da versão lançada (a raiz)
+        marked_dirs.add(os.path.join(self.natives_dir, root_version))
+
+        seen = set()
+        version_id = root_version
+        while version_id and version_id not in seen:
+            seen.add(version_id)
+            marked_dirs.add(os.path.join(self.versions_dir, version_id))
+            json_path = os.path.join(self.versions_dir, version_id, f"{version_id}.json")
+            visited_files.append(json_path)
+            try:
+                with open(json_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                break # Versão não instalada (ou JSON quebrado): fim da cadeia
+
+            self._mark_libraries(data, marked_files)
+            self._mark_argument_paths(data, marked_files, marked_dirs)
+            self._mark_assets(data, marked_files, marked_dirs, visited_files)
+            if data.get("jar"):
+                marked_dirs.add(os.path.join(self.versions_dir, data["jar"]))
+            version_id = data.get("inheritsFrom")
+
+    def _mark_libraries(self, data, marked_files):
+        # Marca de forma conservadora: todos os SOs e arquiteturas
+        for lib in data.get("libraries", []):
+            lib_name = lib.get("name", "")
+            downloads = lib.get("downloads", {})
+            artifact = downloads.get("artifact") or {}
+            if artifact.get("path"):
+                marked_files.add(self._library_path(artifact["path"]))
+            elif lib_name:
+                path = maven_name_to_path(lib_name)
+                if path:
+                    marked_files.add(self._library_path(path))
+            for info in (downloads.get("classifiers") or {}).values():
+                if info.get("path"):
+                    marked_files.add(self._library_path(info["path"]))
+            for classifier in (lib.get("natives") or {}).values():
+                for arch in ("32", "64"):
+                    path = maven_name_to_path(lib_name, classifier.replace("${arch}", arch))
+                    if path:
+                        marked_files.add(self._library_path(path))
+
+    def _library_path(self, rel_path):
+        # Caminhos Maven usam "/", mas o _walk devolve o separador nativo (\ no Windows)
+        return os.path.normpath(os.path.join(self.libraries_dir, *rel_path.split("/")))
+
+    def _mark_argument_paths(self, data, marked_files, marked_dirs):
+        """
+        O Forge/NeoForge moderno usa arquivos gerados pelo instalador que NÃO
+        aparecem em 'libraries' (cliente patcheado, mapeamentos...). Eles são
+        achados pelos argumentos: ${library_directory}/... e --fml.*
+        """
+        strings = []
+        for section in ("jvm", "game"):
+            for entry in data.get("arguments", {}).get(section, []):
+                if isinstance(entry, str):
+                    strings.append(entry)
+                elif isinstance(entry, dict):
+                    value = entry.get("value")
+                    strings.extend(value if isinstance(value, list) else [value])
+        strings = [s for s in strings if isinstance(s, str)]
+
+        for arg in strings:
+            for rel_path in re.findall(r"\$\{library_directory\}/([^;$]+)", arg):
+                marked_files.add(self._library_path(rel_path))
+
+        fml = {strings[i]: strings[i + 1] for i in range(len(strings) - 1) if strings[i].startswith("--fml.")}
+        mc = fml.get("--fml.mcVersion")
+        forge = fml.get("--fml.forgeVersion")
+        neoforge = fml.get("--fml.neoForgeVersion")
+        mcp = fml.get("--fml.mcpVersion") or fml.get("--fml.neoFormVersion")
+        lib_dirs = []
+        if mc and forge:
+            lib_dirs.append(f"net/minecraftforge/forge/{mc}-{forge}")
+        if mc and mcp:
+            lib_dirs.append(f"net/minecraft/client/{mc}-{mcp}")
+        if neoforge:
+            lib_dirs.append(f"net/neoforged/neoforge/{neoforge}")
+            if mc:
+                lib_dirs.append(f"net/neoforged/forge/{mc}-{neoforge}")
+        for rel_dir in lib_dirs:
+            marked_dirs.add(os.path.join(self.libraries_dir, *rel_dir.split("/")))
+
+    def _mark_assets(self, data, marked_files, marked_dirs, visited_files):
+        log_file = data.get("logging", {}).get("client", {}).get("file", {}).get("id")
+        if log_file:
+            marked_files.add(os.path.join(self.assets_dir, "log_configs", log_file))
+
+        asset_index = data.get("assetIndex", {}).get("id") or data.get("assets")
+        if not asset_index:
+            return
+        index_path = os.path.join(self.assets_dir, "indexes", f"{asset_index}.json")
+        marked_files.add(index_path)
+        marked_dirs.add(os.path.join(self.assets_dir, "virtual", asset_index))
+        visited_files.append(index_path)
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                objects = json.load(f).get("objects", {})
+        except Exception:
+            return
+        for info in objects.values():
+            asset_hash = info.get("hash")
+            if asset_hash:
+                marked_files.add(os.path.join(self.assets_dir, "objects", asset_hash[:2], asset_hash))
+
+    # --- Varredura de pastas (com cache por mtime) ---
+
+    def _walk(self, root, new_dir_cache):
+        """Gera (caminho, tamanho, mtime) de cada arquivo sob 'root'."""
+        old_dir_cache = self._cache.get("dirs", {})
+        stack = [root]
+        while stack:
+            current = stack.pop()
+            try:
+                dir_mtime = os.stat(current).st_mtime_ns
+            except OSError:
+                continue
+            entry = old_dir_cache.get(current)
+            if not entry or entry.get("mtime") != dir_mtime:
+                files, subdirs = {}, []
+                try:
+                    with os.scandir(current) as it:
+                        for item in it:
+                            if item.is_dir(follow_symlinks=False):
+                                subdirs.append(item.name)
+                            elif item.is_file(follow_symlinks=False):
+                                st = item.stat(follow_symlinks=False)
+                                files[item.name] = [st.st_size, st.st_mtime]
+                except OSError:
+                    continue
+                entry = {"mtime": dir_mtime, "files": files, "dirs": subdirs}
+            new_dir_cache[current] = entry
+            for name, (size, mtime) in entry["files"].items():
+                yield os.path.join(current, name), size, mtime
+            for name in entry["dirs"]:
+                stack.append(os.path.join(current, name))
+
+    @staticmethod
+    def _is_kept(path, marked_files, marked_dirs, stop_at):
+        path, stop_at = os.path.normpath(path), os.path.normpath(stop_at)
+        if path in marked_files:
+            return True
+        parent = os.path.dirname(path)
+        while len(parent) >= len(stop_at):
+            if parent in marked_dirs:
+                return True
+            next_parent = os.path.dirname(parent)
+            if next_parent == parent:
+                break
+            parent = next_parent
+        return False
+
+    def _forge_cached_paths(self):
+        """Caminhos do GAME_DIR que algum build em cache/forge também guarda."""
+        paths = set()
+        if not self.forge_cache_dir or not os.path.isdir(self.forge_cache_dir):
+            return paths
+        for build in os.listdir(self.forge_cache_dir):
+            try:
+                with open(os.path.join(self.forge_cache_dir, build, "capture.json"), "r", encoding="utf-8") as f:
+                    files = json.load(f).get("files", [])
+            except Exception:
+                continue
+            paths.update(os.path.normpath(os.path.join(self.game_dir, *rel.split("/"))) for rel in files)
+        return paths
+
+    # --- SCAN (dry-run) e SWEEP ---
+
+    def _areas(self):
+        """(nome, pasta raiz, tudo_é_lixo?) das áreas gerenciadas."""
+        areas = [
+            ("Bibliotecas", self.libraries_dir, False),
+            ("Objetos de assets", os.path.join(self.assets_dir, "objects"), False),
+            ("Índices de assets", os.path.join(self.assets_dir, "indexes"), False),
+            ("Assets virtuais", os.path.join(self.assets_dir, "virtual"), False),
+            ("Versões", self.versions_dir, False),
+            ("Natives", self.natives_dir, False),
+            ("Instaladores temporários", self.temp_dir, True),
+        ] + ([("Store de conteúdo", self.store_dir, False)] if self.store_dir else [])
+        if self.protect_versions:
+            # Sem saber qual é a "latest" do launcher oficial, não mexe nas versões
+            areas = [area for area in areas if area[1] != self.versions_dir]
+        return areas
+
+    def _is_garbage(self, path, root, everything_is_garbage, marked_files, marked_dirs):
+        if root == self.store_dir:
+            # No store, lixo é o que nenhuma instância mais referencia (só resta o link do store)
+            try:
+                return os.stat(path).st_nlink <= 1
+            except OSError:
+                return False
+        return everything_is_garbage or not self._is_kept(path, marked_files, marked_dirs, root)
+
+    def scan(self):
+        """
+        (THREAD) Simulação (dry-run): retorna um relatório com o que NÃO é
+        alcançável por nenhum modpack, sem apagar nada.
+        Formato: {area: {"count": n, "bytes": b, "retained": r, "paths": [(caminho, tamanho)]}}
+        ('retained': bytes que continuam no disco pelos hardlinks do cache do Forge)
+        """
+        marked_files, marked_dirs = self.mark()
+        forge_cached = self._forge_cached_paths()
+        too_new = time.time() - self.MIN_AGE_SECONDS
+        new_dir_cache = {}
+        report = {}
+
+        for area, root, everything_is_garbage in self._areas():
+            result = {"count": 0, "bytes": 0, "retained": 0, "paths": []}
+            for path, size, mtime in self._walk(root, new_dir_cache):
+                if mtime > too_new:
+                    continue # Pode ser um download/instalação em andamento
+                if not self._is_garbage(path, root, everything_is_garbage, marked_files, marked_dirs):
+                    continue
+                result["count"] += 1
+                result["retained" if os.path.normpath(path) in forge_cached else "bytes"] += size
+                result["paths"].append((path, size))
+            report[area] = result
+
+        self._cache["dirs"] = new_dir_cache
+        self._save_cache()
+        return report
+
+    def sweep(self, report, progress_cb=None):
+        """
+        (THREAD) Apaga o que o 'scan' encontrou. Cada caminho é reconferido
+        contra o MARK atual antes de ser apagado. Retorna (arquivos, bytes).
+        """
+        marked_files, marked_dirs = self.mark()
+        forge_cached = self._forge_cached_paths()
+        areas = {area: (root, garbage) for area, root, garbage in self._areas()}
+        total = sum(len(r["paths"]) for r in report.values())
+        removed, freed, done = 0, 0, 0
+
+        for area, result in report.items():
+            if area not in areas:
+                continue # Área protegida agora (ex: "latest-*" não resolvido)
+            root, everything_is_garbage = areas[area]
+            for path, size in result["paths"]:
+                done += 1
+                if progress_cb and done % 200 == 0:
+                    progress_cb(done, total)
+                # Segurança: só apaga dentro da área, e só o que segue sem marca
+                if os.path.commonpath([root, path]) != root:
+                    continue
+                if not self._is_garbage(path, root, everything_is_garbage, marked_files, marked_dirs):
+                    continue
+                try:
+                    os.remove(path)
+                    removed += 1
+                    if os.path.normpath(path) not in forge_cached:
+                        freed += size # O cache do Forge ainda segura o resto
+                except OSError as e:
+                    print(f"[GC] Não foi possível apagar {path}: {e}")
+            self._prune_empty_dirs(root)
+
+        # Índices que não são mais alcançáveis saem da tabela de referências
+        refs = AssetRefTable(self.assets_dir)
+        for index_id in list(refs.indexes):
+            if os.path.normpath(os.path.join(self.assets_dir, "indexes", f"{index_id}.json")) not in marked_files:
+                refs.forget_index(index_id)
+        refs.save()
+
+        if progress_cb:
+            progress_cb(total, total)
+        print(f"[GC] {removed} arquivos apagados, {freed} bytes liberados.")
+        return removed, freed
+
+    @staticmethod
+    def _prune_empty_dirs(root):
+        for current, _dirs, _files in os.walk(root, topdown=False):
+            if current != root:
+                try:
+                    os.rmdir(current) # Só funciona se estiver vazia
+                except OSError:
+                    pass
+
+# --- RESOLVEDOR MAVEN ---
+
+class ArtifactMissingError(Exception):
+    """O artefato não existe em nenhum dos repositórios Maven candidatos."""
+
+class MavenResolver:
+    """
+    Resolve bibliotecas numa lista ORDENADA de repositórios Maven.
+
+    - Cada biblioteca tem sua própria lista: primeiro o repositório indicado
+      no JSON, depois quem publica aquele groupId, depois os repositórios gerais.
+    - Quando o JSON não traz o sha1, o download é verificado com o arquivo
+      '.sha1' publicado no próprio repositório.
+    - URLs que deram 404 ficam num cache negativo em disco, então um artefato
+      que não existe não custa nenhuma requisição nas próximas inicializações.
+    """
+
+    DEFAULT_REPOSITORIES = [
+        "https://libraries.minecraft.net/",
+        "https://maven.minecraftforge.net/",
+        "https://maven.fabricmc.net/",
+        "https://maven.neoforged.net/releases/",
+        "https://repo1.maven.org/maven2/",
+    ]
+    # Prefixo do groupId -> repositório "dono" desse grupo
+    GROUP_REPOSITORIES = [
+        ("net.minecraftforge", "https://maven.minecraftforge.net/"),
+        ("cpw.mods", "https://maven.minecraftforge.net/"),
+        ("de.oceanlabs", "https://maven.minecraftforge.net/"),
+        ("net.neoforged", "https://maven.neoforged.net/releases/"),
+        ("net.fabricmc", "https://maven.fabricmc.net/"),
+        ("com.mojang", "https://libraries.minecraft.net/"),
+        ("org.lwjgl", "https://libraries.minecraft.net/"),
+        ("net.java.jinput", "https://libraries.minecraft.net/"),
+    ]
+    NEGATIVE_TTL = 7 * 24 * 3600 # Um 404 vale por uma semana
+
+    def __init__(self, cache_path, user_agent=None):
+        self.cache_path = cache_path
+        self.user_agent = user_agent
+        self._lock = threading.Lock()
+        self._missing = self._load_missing()
+
+    def _load_missing(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return {}
+        now = time.time()
+        return {url: ts for url, ts in data.items() if now - ts < self.NEGATIVE_TTL}
+
+    def _save_missing(self):
+        tmp_path = f"{self.cache_path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._missing, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"[MAVEN] Não foi possível salvar o cache negativo: {e}")
+
+    def is_missing(self, url):
+        ts = self._missing.get(url)
+        return ts is not None and time.time() - ts < self.NEGATIVE_TTL
+
+    def mark_missing(self, url):
+        with self._lock:
+            self._missing[url] = time.time()
+            self._save_missing()
+        print(f"[MAVEN] 404 registrado no cache negativo: {url}")
+
+    def candidates(self, lib_name, lib_path, repo_url=None, artifact_url=None):
+        """URLs candidatos (em ordem de preferência) para uma biblioteca."""
+        repos = [repo_url] if repo_url else []
+        group = lib_name.split(":", 1)[0]
+        for prefix, repo in self.GROUP_REPOSITORIES:
+            if group == prefix or group.startswith(prefix + "."):
+                repos.append(repo)
+        repos.extend(self.DEFAULT_REPOSITORIES)
+
+        urls = [artifact_url] if artifact_url else []
+        for repo in repos:
+            url = repo.rstrip("/") + "/" + lib_path
+            if url not in urls:
+                urls.append(url)
+        return urls
+
+    def all_missing(self, urls):
+        return all(self.is_missing(url) for url in urls)
+
+    def published_sha1(self, url):
+        """Lê o '<artefato>.sha1' publicado no repositório (ou None)."""
+        sha1_url = url + ".sha1"
+        if self.is_missing(sha1_url):
+            return None
+        headers = {"User-Agent": self.user_agent} if self.user_agent else {}
+        try:
+            response = requests.get(sha1_url, headers=headers, timeout=10)
+        except requests.RequestException:
+            return None
+        if response.status_code in (404, 410):
+            self.mark_missing(sha1_url)
+            return None
+        if response.status_code != 200:
+            return None
+        # Alguns repositórios publicam "<hash>  <nome do arquivo>"
+        parts = response.text.strip().split()
+        token = parts[0].lower() if parts else ""
+        return token if re.fullmatch(r"[0-9a-f]{40}", token) else None
+
+    def download(self, urls, path, filename, download_fn, sha1=None):
+        """
+        (THREAD) Tenta cada URL candidato em ordem. Um 404 vai para o cache
+        negativo; hash errado ou erro de rede passa para o próximo repositório.
+        """
+        last_error = None
+        for url in urls:
+            if self.is_missing(url):
+                continue
+            expected_sha1 = sha1 or self.published_sha1(url)
+            try:
+                return download_fn(url, path, filename, sha1=expected_sha1)
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code in (404, 410):
+                    self.mark_missing(url)
+                else:
+                    last_error = e
+            except (requests.RequestException, HashMismatchError) as e:
+                last_error = e
+        if last_error:
+            raise last_error
+        raise ArtifactMissingError(f"{filename}: não existe em nenhum repositório")
+
+# --- CACHE DE MINIATURAS ---
+
+class ThumbnailCache:
+    """
+    Cache LRU em disco de imagens JÁ REDIMENSIONADAS (ícones e galeria).
+
+    A chave é (URL, tamanho alvo), então o mesmo ícone em 64px e 48px são
+    entradas diferentes. Cada entrada é um PNG pequeno; o acesso atualiza o
+    mtime do arquivo e, quando o total passa de 'max_bytes', os arquivos
+    usados há mais tempo são apagados.
+    """
+
+    def __init__(self, cache_dir, max_bytes=64 * 1024 * 1024, user_agent=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.user_agent = user_agent
+        self._lock = threading.Lock()
+        self._entries = None # nome -> [tamanho, último uso]; carregado sob demanda
+        self._total = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _load_entries(self):
+        """Lê o estado do disco uma única vez (chamado com o lock)."""
+        if self._entries is not None:
+            return
+        self._entries, self._total = {}, 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for item in it:
+                    if item.name.endswith(".png") and item.is_file():
+                        st = item.stat()
+                        self._entries[item.name] = [st.st_size, st.st_mtime]
+                        self._total += st.st_size
+        except OSError:
+            pass
+
+    @staticmethod
+    def _key(url, size_key):
+        return hashlib.sha1(f"{url}|{size_key}".encode("utf-8")).hexdigest() + ".png"
+
+    @staticmethod
+    def _scale(img, size=None, max_width=None):
+        if size:
+            return img.resize(size, Image.Resampling.LANCZOS)
+        if max_width and img.width > max_width:
+            h_size = int(img.height * (max_width / float(img.width)))
+            return img.resize((max_width, h_size), Image.Resampling.LANCZOS)
+        return img
+
+    def get(self, url, size=None, max_width=None):
+        """
+        (THREAD) Retorna a imagem (PIL) já no tamanho pedido: 'size'=(l, a)
+        exato, ou 'max_width' mantendo a proporção. Baixa só se não estiver
+        no cache.
+        """
+        size_key = f"{size[0]}x{size[1]}" if size else f"w{max_width}"
+        name = self._key(url, size_key)
+        path = os.path.join(self.cache_dir, name)
+
+        with self._lock:
+            self._load_entries()
+            cached = name in self._entries
+        if cached:
+            try:
+                img = Image.open(path)
+                img.load()
+                now = time.time()
+                os.utime(path, (now, now))
+                with self._lock:
+                    if name in self._entries:
+                        self._entries[name][1] = now
+                return img
+            except (OSError, ValueError):
+                pass # Arquivo sumiu ou corrompeu: baixa de novo
+
+        headers = {"User-Agent": self.user_agent} if self.user_agent else {}
+        resp = requests.get(url, headers=headers, timeout=15)
+        resp.raise_for_status()
+        img = Image.open(BytesIO(resp.content))
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        img = self._scale(img, size=size, max_width=max_width)
+        self._store(name, path, img)
+        return img
+
+    def _store(self, name, path, img):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            img.save(tmp_path, format="PNG", optimize=True)
+            os.replace(tmp_path, path)
+            file_size = os.path.getsize(path)
+        except OSError as e:
+            print(f"[THUMBS] Não foi possível salvar a miniatura: {e}")
+            return
+        with self._lock:
+            self._load_entries()
+            old = self._entries.get(name)
+            if old:
+                self._total -= old[0]
+            self._entries[name] = [file_size, time.time()]
+            self._total += file_size
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Apaga os menos usados até ficar em 90% do limite (chamado com o lock)."""
+        target = self.max_bytes * 0.9
+        for name, (file_size, _) in sorted(self._entries.items(), key=lambda kv: kv[1][1]):
+            if self._total <= target:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+            del self._entries[name]
+            self._total -= file_size
+
+# --- CARREGADOR DE IMAGENS (POOL FIXO) ---
+
+class ImageLoader:
+    """
+    Agendador de carregamento de imagens com um pool FIXO de threads.
+
+    - Fila de prioridade: número menor carrega primeiro (ex: a posição do
+      card na lista, então os cards do topo/visíveis vêm antes).
+    - Cancelamento por "geração": cada canal ('list', 'details'...) tem um
+      contador; ao trocar de página, 'new_generation' invalida todos os
+      pedidos antigos daquele canal, que são descartados sem baixar nada.
+    - As threads só baixam e DECODIFICAM (PIL). As PhotoImage são criadas
+      na thread da UI, em lotes, por um 'after' periódico.
+    """
+
+    POLL_MS = 30
+    BATCH_SIZE = 8
+
+    def __init__(self, widget, thumbnails, workers=4):
+        self.widget = widget
+        self.thumbnails = thumbnails
+        self._jobs = PriorityQueue()
+        self._results = Queue()
+        self._generations = {}
+        self._seq = itertools.count()
+        self._closed = False
+        for _ in range(workers):
+            threading.Thread(target=self._worker, daemon=True).start()
+        self.widget.after(self.POLL_MS, self._poll)
+
+    def new_generation(self, channel):
+        """Cancela todos os pedidos pendentes do canal e retorna a nova geração."""
+        self._generations[channel] = self._generations.get(channel, 0) + 1
+        return self._generations[channel]
+
+    def _is_current(self, channel, generation):
+        return self._generations.get(channel, 0) == generation
+
+    def request(self, channel, url, callback, size=None, max_width=None, priority=0, on_error=None):
+        """
+        Pede a imagem 'url'. 'callback(photo)' e 'on_error(exc)' são chamados
+        na thread da UI, e só se o pedido ainda for da geração atual.
+        """
+        job = (channel, self._generations.get(channel, 0), url, size, max_width, callback, on_error)
+        self._jobs.put((priority, next(self._seq), job))
+
+    def prefetch(self, channel, url, size=None, max_width=None, priority=1000):
+        """Só aquece o cache de miniaturas (sem PhotoImage, sem callback)."""
+        self.request(channel, url, None, size=size, max_width=max_width, priority=priority)
+
+    def close(self):
+        self._closed = True
+        for _ in range(32):
+            self._jobs.put((float("-inf"), next(self._seq), None)) # Acorda e encerra os trabalhadores
+
+    def _worker(self):
+        """(THREAD) Baixa/decodifica as imagens da fila."""
+        while True:
+            _, _, job = self._jobs.get()
+            if job is None or self._closed:
+                return
+            channel, generation, url, size, max_width, callback, on_error = job
+            if not self._is_current(channel, generation):
+                continue # Página mudou: descarta sem baixar
+            try:
+                img = self.thumbnails.get(url, size=size, max_width=max_width)
+                if callback is None:
+                    continue # Pré-carregamento: já está no cache
+                img.load()
+                self._results.put((job, img, None))
+            except Exception as e:
+                print(f"Erro ao carregar imagem {url}: {e}")
+                if callback is not None:
+                    self._results.put((job, None, e))
+
+    def _poll(self):
+        """(UI) Cria as PhotoImage dos resultados prontos, em lotes."""
+        if self._closed:
+            return
+        for _ in range(self.BATCH_SIZE):
+            try:
+                job, img, error = self._results.get_nowait()
+            except Empty:
+                break
+            channel, generation, _, _, _, callback, on_error = job
+            if not self._is_current(channel, generation):
+                continue
+            try:
+                if error is None:
+                    callback(ImageTk.PhotoImage(img))
+                elif on_error:
+                    on_error(error)
+            except tk.TclError:
+                pass # O widget de destino já foi destruído
+        try:
+            self.widget.after(self.POLL_MS, self._poll)
+        except tk.TclError:
+            self._closed = True # Janela fechada
+
+# --- CLIENTE DA API DO MODRINTH ---
+
+@dataclass
+class ModrinthFile:
+    url: str
+    filename: str
+    hashes: dict = field(default_factory=dict)
+    size: int = None
+    primary: bool = False
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            url=data.get("url"), filename=data.get("filename"), hashes=data.get("hashes") or {},
+            size=data.get("size"), primary=bool(data.get("primary")),
+        )
+
+@dataclass
+class ModrinthDependency:
+    project_id: str = None
+    version_id: str = None
+    dependency_type: str = "required"
+    file_name: str = None
+
+@dataclass
+class ModrinthVersion:
+    id: str
+    project_id: str
+    name: str = ""
+    version_number: str = ""
+    version_type: str = ""
+    date_published: str = ""
+    game_versions: list = field(default_factory=list)
+    loaders: list = field(default_factory=list)
+    dependencies: list = field(default_factory=list) # [ModrinthDependency]
+    files: list = field(default_factory=list) # [ModrinthFile]
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            id=data.get("id"), project_id=data.get("project_id"), name=data.get("name", ""),
+            version_number=data.get("version_number", ""), version_type=data.get("version_type", ""),
+            date_published=data.get("date_published", ""), game_versions=data.get("game_versions") or [],
+            loaders=data.get("loaders") or [],
+            dependencies=[
+                ModrinthDependency(d.get("project_id"), d.get("version_id"), d.get("dependency_type", "required"), d.get("file_name"))
+                for d in data.get("dependencies") or []
+            ],
+            files=[ModrinthFile.from_json(f) for f in data.get("files") or []],
+        )
+
+    @property
+    def primary_file(self):
+        """Arquivo principal (ou o primeiro, ou None)."""
+        return next((f for f in self.files if f.primary), self.files[0] if self.files else None)
+
+@dataclass
+class ModrinthProject:
+    id: str
+    slug: str = ""
+    title: str = ""
+    description: str = ""
+    body: str = ""
+    project_type: str = ""
+    icon_url: str = None
+    downloads: int = 0
+    followers: int = 0
+    game_versions: list = field(default_factory=list)
+    loaders: list = field(default_factory=list)
+    categories: list = field(default_factory=list)
+    gallery: list = field(default_factory=list) # URLs das imagens
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            id=data.get("id"), slug=data.get("slug", ""), title=data.get("title", ""),
+            description=data.get("description", ""), body=data.get("body") or "",
+            project_type=data.get("project_type", ""), icon_url=data.get("icon_url"),
+            downloads=data.get("downloads", 0), followers=data.get("followers", 0),
+            game_versions=data.get("game_versions") or [], loaders=data.get("loaders") or [],
+            categories=data.get("categories") or [],
+            gallery=[g.get("url") for g in data.get("gallery") or [] if g.get("url")],
+        )
+
+@dataclass
+class ModrinthSearchHit:
+    project_id: str
+    slug: str = ""
+    title: str = "Mod Desconhecido"
+    author: str = "Autor Desconhecido"
+    description: str = ""
+    project_type: str = ""
+    icon_url: str = None
+    downloads: int = 0
+    follows: int = 0
+    categories: list = field(default_factory=list) # Inclui os loaders, no /search
+    versions: list = field(default_factory=list) # Versões do jogo
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            project_id=data.get("project_id"), slug=data.get("slug", ""),
+            title=data.get("title") or "Mod Desconhecido", author=data.get("author") or "Autor Desconhecido",
+            description=data.get("description", ""), project_type=data.get("project_type", ""),
+            icon_url=data.get("icon_url"), downloads=data.get("downloads", 0), follows=data.get("follows", 0),
+            categories=data.get("categories") or [], versions=data.get("versions") or [],
+        )
+
+@dataclass
+class ModrinthSearchResult:
+    hits: list # [ModrinthSearchHit]
+    total_hits: int = 0
+    offset: int = 0
+    limit: int = 0
+
+class ModrinthClient:
+    """
+    Cliente único da API v2 do Modrinth, compartilhado por todo o launcher.
+
+    - Ritmo: lê X-Ratelimit-Limit/Remaining/Reset de cada resposta. Quando
+      o orçamento fica baixo, espaça as requisições até o fim da janela; se
+      acabar, espera o reset antes de mandar a próxima.
+    - 429: espera o tempo de reset informado e tenta de novo.
+    - Lotes: buscas por vários IDs/hashes usam os endpoints de múltiplos IDs.
+    - GETs de metadados passam pelo HttpCache (com o mesmo ritmo).
+    - Os resultados são objetos tipados (ModrinthProject, ModrinthVersion...).
+    """
+
+    API = "https://api.modrinth.com/v2"
+    MAX_RETRIES = 4
+    BUDGET_RESERVE = 2 # Nunca gasta as últimas N requisições da janela
+    IDS_PER_REQUEST = 100
+    HASHES_PER_REQUEST = 500
+    DETAILS_TTL = 300 # Segundos que (projeto, versões) já convertidos ficam na memória
+    DETAILS_MEMORY = 32 # Projetos mantidos na memória (LRU)
+
+    def __init__(self, cache_dir, user_agent, index=None):
+        self.headers = {"User-Agent": user_agent}
+        self.cache = HttpCache(cache_dir, user_agent=user_agent, get_fn=self._paced_get)
+        self.index = index # ProjectIndex local, alimentado pelas respostas (opcional)
+        self._details = {} # project_id -> (guardado_em, projeto, versões)
+        self._details_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._limit = None
+        self._remaining = None
+        self._reset_at = 0.0
+
+    # --- Ritmo (rate limit) ---
+
+    def _wait_for_budget(self):
+        while True:
+            with self._lock:
+                now = time.time()
+                if self._remaining is None or now >= self._reset_at:
+                    self._remaining = None # Janela nova: ainda não sabemos o orçamento
+                    return
+                if self._remaining > self.BUDGET_RESERVE:
+                    # Orçamento baixo (menos de 1/4): espaça o que sobrou até o reset
+                    low = self._limit and self._remaining < self._limit // 4
+                    delay = (self._reset_at - now) / self._remaining if low else 0
+                    self._remaining -= 1
+                    break
+                delay = self._reset_at - now
+            print(f"[MODRINTH] Limite de requisições no fim, aguardando {delay:.1f}s...")
+            time.sleep(min(delay, 60) + 0.05)
+        if delay:
+            time.sleep(delay)
+
+    def _update_budget(self, resp):
+        try:
+            remaining = int(resp.headers["X-Ratelimit-Remaining"])
+            reset = float(resp.headers.get("X-Ratelimit-Reset", 60))
+            limit = int(resp.headers.get("X-Ratelimit-Limit", 0)) or None
+        except (KeyError, ValueError):
+            return
+        with self._lock:
+            self._remaining, self._limit = remaining, limit
+            self._reset_at = time.time() + reset
+
+    def _send(self, method, url, **kwargs):
+        """Faz a requisição respeitando o orçamento e repetindo as respostas 429."""
+        kwargs.setdefault("timeout", 30)
+        headers = dict(self.headers)
+        headers.update(kwargs.pop("headers", None) or {})
+        for attempt in range(self.MAX_RETRIES):
+            self._wait_for_budget()
+            resp = requests.request(method, url, headers=headers, **kwargs)
+            self._update_budget(resp)
+            if resp.status_code != 429 or attempt == self.MAX_RETRIES - 1:
+                return resp
+            try:
+                retry_after = float(resp.headers.get("X-Ratelimit-Reset") or resp.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                retry_after = 2 ** attempt
+            resp.close()
+            with self._lock:
+                self._remaining = 0
+                self._reset_at = time.time() + retry_after
+            print(f"[MODRINTH] 429 recebido, tentando de novo em {retry_after:.0f}s...")
+        return resp
+
+    def _paced_get(self, url, **kwargs):
+        return self._send("GET", url, **kwargs)
+
+    def _get_json(self, endpoint, params=None, cached=False, ttl=None, cancel_event=None):
+        url = f"{self.API}{endpoint}"
+        if cached:
+            return self.cache.get_json(url, params=params, ttl=ttl, cancel_event=cancel_event)
+        if cancel_event is not None:
+            resp = self._send("GET", url, params=params, stream=True)
+            resp.raise_for_status()
+            return json.loads(HttpCache._read_cancellable(resp, cancel_event))
+        resp = self._send("GET", url, params=params)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _post_json(self, endpoint, body):
+        resp = self._send("POST", f"{self.API}{endpoint}", json=body)
+        resp.raise_for_status()
+        return resp.json()
+
+    @staticmethod
+    def _chunks(items, size):
+        items = list(items)
+        for i in range(0, len(items), size):
+            yield items[i:i + size]
+
+    # --- Endpoints ---
+
+    def search(self, query=None, facets=None, offset=0, limit=20, index=None, ttl=None, cancel_event=None, cached=False):
+        """
+        (THREAD) /search -> ModrinthSearchResult. Por padrão NÃO vai para o
+        cache em disco: cada prefixo digitado e cada offset virariam um
+        arquivo novo (quem guarda as páginas é a memória do ModDownloader).
+        """
+        params = {"facets": json.dumps(facets or []), "offset": offset, "limit": limit}
+        if query:
+            params["query"] = query
+        if index:
+            params["index"] = index
+        data = self._get_json("/search", params, cached=cached, ttl=ttl, cancel_event=cancel_event)
+        result = ModrinthSearchResult(
+            hits=[ModrinthSearchHit.from_json(h) for h in data.get("hits", [])],
+            total_hits=data.get("total_hits", 0), offset=data.get("offset", offset), limit=data.get("limit", limit),
+        )
+        if self.index:
+            self.index.add_hits(result.hits)
+        return result
+
+    def get_project(self, project_id):
+        """(THREAD) Um projeto (id ou slug), via cache HTTP."""
+        return ModrinthProject.from_json(self._get_json(f"/project/{project_id}", cached=True))
+
+    def _remember_details(self, project_id, project, versions):
+        with self._details_lock:
+            self._details.pop(project_id, None)
+            self._details[project_id] = (time.time(), project, versions)
+            while len(self._details) > self.DETAILS_MEMORY:
+                self._details.pop(next(iter(self._details)))
+
+    def project_details(self, project_id, on_refresh=None):
+        """
+        (THREAD) (projeto, todas as versões) para a tela de detalhes.
+
+        Memória (já convertidos) -> HttpCache em disco. Uma cópia vencida é
+        devolvida na hora e revalidada em segundo plano; se o projeto ou as
+        versões mudarem, 'on_refresh(projeto, versões)' é chamado DESSE thread.
+        """
+        with self._details_lock:
+            entry = self._details.get(project_id)
+        if entry and time.time() - entry[0] < self.DETAILS_TTL:
+            return entry[1], entry[2]
+
+        def _refreshed(kind):
+            def _callback(data):
+                with self._details_lock:
+                    entry = self._details.get(project_id)
+                if not entry:
+                    return
+                project, versions = entry[1], entry[2]
+                if kind == "project":
+                    project = ModrinthProject.from_json(data)
+                else:
+                    versions = [ModrinthVersion.from_json(v) for v in data]
+                self._remember_details(project_id, project, versions)
+                if on_refresh:
+                    on_refresh(project, versions)
+            return _callback
+
+        project = ModrinthProject.from_json(
+            self.cache.get_json(f"{self.API}/project/{project_id}", on_refresh=_refreshed("project"))
+        )
+        versions = [
+            ModrinthVersion.from_json(v)
+            for v in self.cache.get_json(f"{self.API}/project/{project_id}/version", on_refresh=_refreshed("versions"))
+        ]
+        self._remember_details(project_id, project, versions)
+        if self.index:
+            self.index.add_project(project)
+        return project, versions
+
+    def get_projects(self, project_ids):
+        """(THREAD) Vários projetos em lotes de /projects?ids=. Retorna {id: projeto}."""
+        projects = {}
+        for chunk in self._chunks(dict.fromkeys(project_ids), self.IDS_PER_REQUEST):
+            for data in self._get_json("/projects", {"ids": json.dumps(chunk)}):
+                project = ModrinthProject.from_json(data)
+                projects[project.id] = project
+        return projects
+
+    def project_versions(self, project_id, game_versions=None, loaders=None):
+        """(THREAD) Versões de um projeto (mais nova primeiro), com filtros opcionais."""
+        params = {}
+        if game_versions:
+            params["game_versions"] = json.dumps(list(game_versions))
+        if loaders:
+            params["loaders"] = json.dumps(list(loaders))
+        data = self._get_json(f"/project/{project_id}/version", params or None, cached=True)
+        return [ModrinthVersion.from_json(v) for v in data]
+
+    def get_versions(self, version_ids):
+        """(THREAD) Várias versões em lotes de /versions?ids=. Retorna [versão]."""
+        versions = []
+        for chunk in self._chunks(dict.fromkeys(version_ids), self.IDS_PER_REQUEST):
+            versions.extend(ModrinthVersion.from_json(v) for v in self._get_json("/versions", {"ids": json.dumps(chunk)}))
+        return versions
+
+    def version_files(self, hashes, algorithm="sha1"):
+        """(THREAD) POST /version_files: {hash: versão} dos arquivos conhecidos."""
+        result = {}
+        for chunk in self._chunks(hashes, self.HASHES_PER_REQUEST):
+            data = self._post_json("/version_files", {"hashes": chunk, "algorithm": algorithm})
+            result.update({h: ModrinthVersion.from_json(v) for h, v in data.items()})
+        return result
+
+    def latest_versions(self, hashes, loaders, game_versions, algorithm="sha1"):
+        """(THREAD) POST /version_files/update: {hash: versão mais nova compatível}."""
+        result = {}
+        for chunk in self._chunks(hashes, self.HASHES_PER_REQUEST):
+            data = self._post_json("/version_files/update", {
+                "hashes": chunk, "algorithm": algorithm,
+                "loaders": list(loaders), "game_versions": list(game_versions),
+            })
+            result.update({h: ModrinthVersion.from_json(v) for h, v in data.items()})
+        return result
+
+# --- ÍNDICE LOCAL DE PROJETOS (MODRINTH) ---
+
+class ProjectIndex:
+    """
+    Índice local (SQLite) de todo projeto do Modrinth que o launcher já viu,
+    alimentado pelas respostas de /search e /project. Permite mostrar
+    resultados na hora (e sem internet) enquanto a busca remota não chega.
+
+    Usa FTS5 quando o SQLite tem suporte; senão, cai para LIKE.
+    Listas (categorias, versões, loaders) ficam como " a b c " para
+    filtrar com LIKE '% a %'.
+    """
+
+    FIELDS = ("slug", "title", "author", "description", "project_type", "icon_url",
+              "downloads", "follows", "categories", "game_versions", "loaders")
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.fts = False
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        try:
+            self._open()
+        except sqlite3.DatabaseError as e:
+            print(f"[INDEX] Índice corrompido ({e}), recriando...")
+            try:
+                os.remove(db_path)
+            except OSError:
+                pass
+            self._open()
+
+    def _open(self):
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False) # Acesso sempre sob self._lock
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS projects (
+                project_id TEXT PRIMARY KEY, slug TEXT, title TEXT, author TEXT, description TEXT,
+                project_type TEXT, icon_url TEXT, downloads INTEGER, follows INTEGER,
+                categories TEXT, game_versions TEXT, loaders TEXT, updated_at REAL
+            )
+        """)
+        try:
+            self.conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+                    project_id UNINDEXED, title, description, categories,
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            print(f"[INDEX] SQLite sem FTS5 ({e}); usando busca simples (LIKE).")
+        self.conn.commit()
+
+    @staticmethod
+    def _as_words(values):
+        return f" {' '.join(values)} " if values else ""
+
+    def _upsert(self, rows):
+        """rows: [(project_id, {campo: valor})]. Campos vazios não apagam o que já existe."""
+        if not rows:
+            return
+        columns = ", ".join(("project_id",) + self.FIELDS + ("updated_at",))
+        marks = ", ".join("?" * (len(self.FIELDS) + 2))
+        updates = ", ".join(f"{f} = COALESCE(NULLIF(excluded.{f}, ''), {f})" for f in self.FIELDS)
+        sql = (f"INSERT INTO projects ({columns}) VALUES ({marks}) "
+               f"ON CONFLICT(project_id) DO UPDATE SET {updates}, updated_at = excluded.updated_at")
+        now = time.time()
+        with self._lock:
+            try:
+                with self.conn:
+                    self.conn.executemany(sql, [
+                        (project_id,) + tuple(values.get(f, "") for f in self.FIELDS) + (now,)
+                        for project_id, values in rows
+                    ])
+                    if self.fts:
+                        ids = [(project_id,) for project_id, _ in rows]
+                        self.conn.executemany("DELETE FROM projects_fts WHERE project_id = ?", ids)
+                        self.conn.executemany("""
+                            INSERT INTO projects_fts (project_id, title, description, categories)
+                            SELECT project_id, title, description, categories FROM projects WHERE project_id = ?
+                        """, ids)
+            except sqlite3.Error as e:
+                print(f"[INDEX] Não foi possível atualizar o índice: {e}")
+
+    def add_hits(self, hits):
+        """Guarda os ModrinthSearchHit de uma página de busca."""
+        self._upsert([(h.project_id, {
+            "slug": h.slug, "title": h.title, "author": h.author, "description": h.description,
+            "project_type": h.project_type, "icon_url": h.icon_url or "",
+            "downloads": h.downloads, "follows": h.follows,
+            "categories": self._as_words(h.categories), "game_versions": self._as_words(h.versions),
+        }) for h in hits if h.project_id])
+
+    def add_project(self, project):
+        """Guarda um ModrinthProject (tem os loaders separados das categorias)."""
+        self._upsert([(project.id, {
+            "slug": project.slug, "title": project.title, "description": project.description,
+            "project_type": project.project_type, "icon_url": project.icon_url or "",
+            "downloads": project.downloads, "follows": project.followers,
+            "categories": self._as_words(project.categories + project.loaders),
+            "game_versions": self._as_words(project.game_versions), "loaders": self._as_words(project.loaders),
+        })] if project.id else [])
+
+    def search(self, query, project_type, game_version=None, loaders=None, limit=50):
+        """
+        Busca local com os mesmos filtros do /search (tipo, versão do jogo,
+        loaders). Sem texto, devolve os mais baixados. Retorna [ModrinthSearchHit].
+        """
+        where, args = ["p.project_type = ?"], [project_type]
+        if game_version:
+            where.append("p.game_versions LIKE ?")
+            args.append(f"% {game_version} %")
+        if loaders:
+            where.append("(" + " OR ".join("p.categories LIKE ?" for _ in loaders) + ")")
+            args.extend(f"% {l} %" for l in loaders)
+
+        words = re.findall(r"\w+", query or "")
+        source, order = "projects p", "p.downloads DESC"
+        if words and self.fts:
+            # Prefixo em cada palavra: "sodi" já acha "sodium"
+            source = "projects_fts f JOIN projects p ON p.project_id = f.project_id"
+            where.append("projects_fts MATCH ?")
+            args.append(" ".join(f'"{w}"*' for w in words))
+            order = "bm25(projects_fts, 0, 10.0, 1.0, 2.0), p.downloads DESC" # Título pesa mais
+        elif words:
+            for w in words:
+                where.append("(p.title LIKE ? OR p.description LIKE ?)")
+                args.extend([f"%{w}%", f"%{w}%"])
+
+        sql = (f"SELECT p.project_id, p.slug, p.title, p.author, p.description, p.project_type, p.icon_url, "
+               f"p.downloads, p.follows, p.categories, p.game_versions FROM {source} "
+               f"WHERE {' AND '.join(where)} ORDER BY {order} LIMIT ?")
+        with self._lock:
+            try:
+                rows = self.conn.execute(sql, args + [limit]).fetchall()
+            except sqlite3.Error as e:
+                print(f"[INDEX] Erro na busca local: {e}")
+                return []
+        return [
+            ModrinthSearchHit(
+                project_id=r[0], slug=r[1] or "", title=r[2] or "Mod Desconhecido",
+                author=r[3] or "Autor Desconhecido", description=r[4] or "", project_type=r[5] or "",
+                icon_url=r[6] or None, downloads=r[7] or 0, follows=r[8] or 0,
+                categories=(r[9] or "").split(), versions=(r[10] or "").split(),
+            )
+            for r in rows
+        ]
+
+# --- VERIFICADOR DE ATUALIZAÇÕES (MODRINTH) ---
+
+class FileHashCache:
+    """
+    Cache de hashes (sha1) dos arquivos de uma instância, em
+    '<instância>/.raposo_hashes.json'. Um arquivo só é relido se o tamanho
+    ou o mtime mudarem.
+    """
+
+    FILE_NAME = ".raposo_hashes.json"
+
+    def __init__(self, instance_dir):
+        self.instance_dir = instance_dir
+        self.path = os.path.join(instance_dir, self.FILE_NAME)
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except Exception:
+            self.entries = {}
+
+    @staticmethod
+    def _hash_file(path):
+        sha1 = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(DOWNLOAD_BUFFER_SIZE), b""):
+                sha1.update(chunk)
+        return sha1.hexdigest()
+
+    def sha1(self, path):
+        """(THREAD) sha1 do arquivo, do cache se (tamanho, mtime) não mudaram."""
+        rel_path = os.path.relpath(path, self.instance_dir).replace(os.sep, "/")
+        st = os.stat(path)
+        with self._lock:
+            entry = self.entries.get(rel_path)
+        if entry and entry.get("size") == st.st_size and entry.get("mtime") == st.st_mtime_ns:
+            return entry["sha1"]
+        digest = self._hash_file(path)
+        with self._lock:
+            self.entries[rel_path] = {"size": st.st_size, "mtime": st.st_mtime_ns, "sha1": digest}
+            self._dirty = True
+        return digest
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            # Esquece arquivos que não existem mais
+            self.entries = {
+                rel: e for rel, e in self.entries.items()
+                if os.path.exists(os.path.join(self.instance_dir, rel))
+            }
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.entries, f, indent=2)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                print(f"[UPDATE] Não foi possível salvar o cache de hashes: {e}")
+
+class ModUpdateChecker:
+    """
+    Descobre atualizações de TODOS os mods/resourcepacks/shaders de uma
+    instância com poucas requisições em lote ao Modrinth:
+      1. POST /v2/version_files        -> que versão é cada arquivo
+      2. POST /v2/version_files/update -> versão mais nova compatível
+         (uma chamada por grupo de loaders, com a versão do jogo)
+      3. GET  /v2/projects?ids=[...]   -> nomes dos projetos
+    """
+
+    # pasta -> extensões consideradas
+    FOLDERS = {"mods": (".jar",), "resourcepacks": (".zip",), "shaderpacks": (".zip",)}
+
+    def __init__(self, client, instance_dir, game_version, loader):
+        self.client = client
+        self.instance_dir = instance_dir
+        self.game_version = game_version
+        self.loader = loader
+        self.hashes = FileHashCache(instance_dir)
+
+    def _list_files(self):
+        files = []
+        for folder, extensions in self.FOLDERS.items():
+            folder_path = os.path.join(self.instance_dir, folder)
+            if not os.path.isdir(folder_path):
+                continue
+            for name in sorted(os.listdir(folder_path)):
+                path = os.path.join(folder_path, name)
+                if os.path.isfile(path) and name.lower().endswith(extensions):
+                    files.append((folder, path))
+        return files
+
+    def _loaders_for(self, folder, current_version):
+        if folder == "mods":
+            # Igual ao download: NeoForge também aceita mods de Forge
+            return [self.loader, "forge"] if self.loader == "neoforge" else [self.loader]
+        return sorted(current_version.loaders) or ["minecraft"]
+
+    def identify(self, progress_cb=None):
+        """
+        (THREAD) Identifica os arquivos instalados no Modrinth.
+        Retorna (por_hash, versões): {sha1: (pasta, caminho)} e {sha1: versão}.
+        """
+        files = self._list_files()
+        if not files:
+            return {}, {}
+
+        # Hashes (em paralelo; só relê o que mudou)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            digests = list(executor.map(lambda item: self.hashes.sha1(item[1]), files))
+        self.hashes.save()
+        by_hash = {digest: item for digest, item in zip(digests, files)}
+        if progress_cb: progress_cb(f"Identificando {len(by_hash)} arquivos no Modrinth...")
+
+        return by_hash, self.client.version_files(list(by_hash))
+
+    def check(self, progress_cb=None):
+        """
+        (THREAD) Retorna a lista de atualizações:
+        [{"path", "title", "current", "latest", "file"}], onde 'file' é o
+        arquivo principal da versão nova.
+        """
+        # 1 e 2. Hashes + que versão é cada arquivo
+        by_hash, current = self.identify(progress_cb)
+        if not current:
+            return []
+
+        # 3. Mais nova compatível, agrupando por loaders
+        groups = {}
+        for digest, version in current.items():
+            folder = by_hash[digest][0]
+            groups.setdefault(tuple(self._loaders_for(folder, version)), []).append(digest)
+
+        if progress_cb: progress_cb(f"Procurando atualizações para {len(current)} projetos...")
+        latest = {}
+        for loaders, group_hashes in groups.items():
+            latest.update(self.client.latest_versions(group_hashes, loaders, [self.game_version]))
+
+        updates = []
+        for digest, new_version in latest.items():
+            old_version = current.get(digest)
+            if not old_version or new_version.id == old_version.id:
+                continue
+            if new_version.date_published <= old_version.date_published:
+                continue # "Atualização" para uma versão mais velha
+            primary = new_version.primary_file
+            if not primary or not primary.url:
+                continue
+            updates.append({
+                "path": by_hash[digest][1],
+                "project_id": new_version.project_id,
+                "title": new_version.project_id,
+                "current": old_version.version_number or "?",
+                "latest": new_version.version_number or "?",
+                "file": primary,
+            })
+
+        # 4. Nomes dos projetos (uma requisição)
+        if updates:
+            try:
+                projects = self.client.get_projects(u["project_id"] for u in updates)
+                for update in updates:
+                    project = projects.get(update["project_id"])
+                    update["title"] = (project and project.title) or update["title"]
+            except Exception as e:
+                print(f"[UPDATE] Não foi possível buscar os nomes dos projetos: {e}")
+        return sorted(updates, key=lambda u: u["title"].lower())
+
+    def apply(self, updates, download_fn, progress_cb=None, max_workers=6):
+        """
+        (THREAD) Baixa todas as atualizações em paralelo. O arquivo antigo só
+        é apagado depois que o novo foi baixado e verificado.
+        Retorna (ok, falhas).
+        """
+        def _apply_one(update):
+            primary = update["file"]
+            folder = os.path.dirname(update["path"])
+            new_path = os.path.join(folder, primary.filename)
+            download_fn(primary.url, new_path, primary.filename, sha1=primary.hashes.get("sha1"), sha512=primary.hashes.get("sha512"), size=primary.size)
+            if os.path.normcase(new_path) != os.path.normcase(update["path"]):
+                os.remove(update["path"])
+            return update
+
+        ok, failed = [], []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(_apply_one, u): u for u in updates}
+            for future in concurrent.futures.as_completed(futures):
+                update = futures[future]
+                try:
+                    future.result()
+                    ok.append(update)
+                except Exception as e:
+                    print(f"[UPDATE] Falha ao atualizar {update['title']}: {e}")
+                    failed.append((update, e))
+                if progress_cb:
+                    progress_cb(len(ok) + len(failed), len(updates))
+        return ok, failed
+
+# --- RESOLVEDOR DE DEPENDÊNCIAS (MODRINTH) ---
+
+class DependencyResolver:
+    """
+    Percorre as dependências de uma versão de mod do Modrinth (nível por
+    nível) e devolve o conjunto de versões a baixar, já sem o que a
+    instância tem instalado.
+
+    - Dependência com 'version_id': buscadas em lote (/v2/versions?ids=).
+    - Dependência só com 'project_id': a versão mais nova compatível com a
+      versão do jogo e o loader, buscadas em paralelo.
+
+    'resolve_projects' faz o mesmo para uma fila inteira de projetos: as
+    raízes em paralelo e as dependências de todas juntas, num passe só, e
+    diz quais raízes puxaram cada dependência.
+    'game_version'/'loaders' = None não filtram (ex: shaders).
+    """
+
+    def __init__(self, client, game_version, loaders, fallback_loaders=None, installed_project_ids=()):
+        self.client = client
+        self.game_version = game_version
+        self.loaders = loaders
+        self.fallback_loaders = fallback_loaders
+        self.installed = set(installed_project_ids)
+
+    def _version_for_project(self, project_id):
+        """(THREAD) Versão mais nova do projeto compatível com a instância (ou None)."""
+        game_versions = [self.game_version] if self.game_version else None
+        for loaders in [self.loaders] + ([self.fallback_loaders] if self.fallback_loaders else []):
+            versions = self.client.project_versions(project_id, game_versions, loaders)
+            if versions:
+                return versions[0]
+        return None
+
+    def _version_or_none(self, project_id):
+        try:
+            return self._version_for_project(project_id)
+        except Exception as e:
+            print(f"[DEPS] Falha ao buscar versões de {project_id}: {e}")
+            return None
+
+    def resolve(self, root_version, include_optional=False, progress_cb=None):
+        """
+        (THREAD) Retorna (versões, faltando): as versões a baixar (a raiz
+        primeiro) e os project_ids obrigatórios sem versão compatível.
+        """
+        return self._resolve({root_version.project_id: root_version}, [], include_optional, progress_cb)
+
+    def resolve_projects(self, project_ids, include_optional=False, follow_dependencies=True, progress_cb=None):
+        """
+        (THREAD) Resolve vários projetos de uma vez. Retorna (versões,
+        faltando, já_instalados, puxado_por); um projeto que falhar vai para
+        'faltando' sem derrubar o resto. 'puxado_por' = {project_id da
+        dependência: {project_ids das raízes que dependem dela}}.
+        """
+        roots = list(dict.fromkeys(project_ids))
+        skipped = [p for p in roots if p in self.installed]
+        roots = [p for p in roots if p not in self.installed]
+        if progress_cb: progress_cb(f"Procurando versões compatíveis de {len(roots)} projetos...")
+
+        resolved, missing = {}, []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            for project_id, version in zip(roots, executor.map(self._version_or_none, roots)):
+                if version is None:
+                    missing.append(project_id)
+                else:
+                    resolved[project_id] = version
+        if not follow_dependencies:
+            return list(resolved.values()), missing, skipped, {}
+        root_ids = set(resolved)
+        edges = {}
+        versions, missing = self._resolve(resolved, missing, include_optional, progress_cb, edges)
+        return versions, missing, skipped, self._pulled_by(root_ids, edges)
+
+    @staticmethod
+    def _pulled_by(root_ids, edges):
+        """Inverte o grafo: {dependência: {raízes que chegam nela}}."""
+        pulled_by = {}
+        for root in root_ids:
+            stack, reached = [root], {root}
+            while stack:
+                for child in edges.get(stack.pop(), ()):
+                    if child not in reached:
+                        reached.add(child)
+                        stack.append(child)
+            for project_id in reached - {root}:
+                pulled_by.setdefault(project_id, set()).add(root)
+        return pulled_by
+
+    def _resolve(self, resolved, missing, include_optional, progress_cb, edges=None):
+        """
+        Expande 'resolved' ({project_id: versão}) nível por nível, no lugar.
+        Se 'edges' for passado, recebe {project_id: {project_ids das dependências}}.
+        """
+        edges = {} if edges is None else edges
+        wanted = {"required", "optional"} if include_optional else {"required"}
+        seen = set(self.installed) | set(resolved) | set(missing)
+        frontier = list(resolved.values())
+        depth = 0
+
+        while frontier:
+            depth += 1
+            version_ids, project_ids = set(), []
+            parents_of_version = {} # version_id -> project_ids que pedem essa versão
+            for version in frontier:
+                for dep in version.dependencies:
+                    if dep.dependency_type not in wanted:
+                        continue
+                    project_id, version_id = dep.project_id, dep.version_id
+                    if project_id:
+                        edges.setdefault(version.project_id, set()).add(project_id)
+                    elif version_id:
+                        parents_of_version.setdefault(version_id, set()).add(version.project_id)
+                    if project_id in seen:
+                        continue
+                    if version_id:
+                        version_ids.add(version_id)
+                    elif project_id:
+                        project_ids.append(project_id)
+                    if project_id:
+                        seen.add(project_id)
+            if not version_ids and not project_ids:
+                break
+            if progress_cb: progress_cb(f"Resolvendo dependências (nível {depth}, {len(version_ids) + len(project_ids)} projetos)...")
+
+            next_frontier = []
+            if version_ids:
+                for version in self.client.get_versions(sorted(version_ids)):
+                    project_id = version.project_id
+                    for parent in parents_of_version.get(version.id, ()):
+                        edges.setdefault(parent, set()).add(project_id)
+                    if project_id in resolved or project_id in self.installed:
+                        continue
+                    seen.add(project_id)
+                    resolved[project_id] = version
+                    next_frontier.append(version)
+            if project_ids:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+                    for project_id, version in zip(project_ids, executor.map(self._version_for_project, project_ids)):
+                        if version is None:
+                            missing.append(project_id)
+                            continue
+                        resolved[project_id] = version
+                        next_frontier.append(version)
+            frontier = next_frontier
+
+        return list(resolved.values()), missing
+
+# --- INSTALADOR DE .MRPACK ---
+
+class MrpackInstaller:
+    """
+    Instala um .mrpack SEM extrair o pacote inteiro numa pasta temporária:
+
+    - 'files' do manifesto: respeita env.client == "unsupported", tenta cada
+      URL de downloads[] em ordem e verifica sha1/sha512/fileSize. Arquivos
+      que já estão no destino com o hash certo não são baixados de novo.
+    - overrides/ e depois client-overrides/ são copiados direto do zip para
+      o destino; entradas cujo CRC32 já bate com o arquivo existente são puladas.
+    """
+
+    MANIFEST = "modrinth.index.json"
+    OVERRIDE_FOLDERS = ("overrides/", "client-overrides/") # Nesta ordem: client vence
+
+    def __init__(self, mrpack_path, target_dir, download_fn):
+        self.mrpack_path = mrpack_path
+        self.target_dir = os.path.abspath(target_dir)
+        self.download_fn = download_fn
+
+    def read_manifest(self):
+        with zipfile.ZipFile(self.mrpack_path, "r") as zf:
+            try:
+                return json.loads(zf.read(self.MANIFEST))
+            except KeyError:
+                raise Exception("Arquivo .mrpack inválido (não contém modrinth.index.json).")
+
+    def _safe_target(self, rel_path):
+        """Caminho final dentro do destino (bloqueia '../' e caminhos absolutos)."""
+        target = os.path.abspath(os.path.join(self.target_dir, rel_path))
+        if os.path.commonpath([self.target_dir, target]) != self.target_dir:
+            raise Exception(f"Caminho inválido no .mrpack: {rel_path}")
+        return target
+
+    @staticmethod
+    def _file_matches(path, size=None, sha1=None, sha512=None):
+        if not os.path.isfile(path) or (size is not None and os.path.getsize(path) != size):
+            return False
+        if not sha1 and not sha512:
+            return False
+        hasher = hashlib.sha1() if sha1 else hashlib.sha512()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(DOWNLOAD_BUFFER_SIZE), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest() == (sha1 or sha512).lower()
+
+    def _download_one(self, file_info, target):
+        """(THREAD) Tenta cada URL de downloads[] até um passar na verificação."""
+        hashes = file_info.get("hashes", {})
+        name = os.path.basename(target)
+        last_error = None
+        for url in file_info.get("downloads", []):
+            try:
+                return self.download_fn(
+                    url, target, name, sha1=hashes.get("sha1"),
+                    sha512=hashes.get("sha512"), size=file_info.get("fileSize")
+                )
+            except Exception as e:
+                last_error = e
+                print(f"[MRPACK] {name}: falhou em {url} ({e}), tentando o próximo...")
+        raise last_error or Exception(f"{name}: nenhum URL de download no manifesto")
+
+    def download_files(self, manifest, progress_cb=None, max_workers=10):
+        """
+        (THREAD) Baixa os 'files' do manifesto. Retorna (baixados, pulados, falhas).
+        """
+        tasks, skipped = [], 0
+        for file_info in manifest.get("files", []):
+            rel_path = file_info.get("path")
+            if not rel_path:
+                print("[AVISO] Entrada de arquivo inválida no manifesto (sem 'path').")
+                continue
+            if (file_info.get("env") or {}).get("client") == "unsupported":
+                print(f"[MRPACK] Pulando arquivo só de servidor: {rel_path}")
+                continue
+            target = self._safe_target(rel_path)
+            hashes = file_info.get("hashes", {})
+            if self._file_matches(target, file_info.get("fileSize"), hashes.get("sha1"), hashes.get("sha512")):
+                skipped += 1
+                continue
+            tasks.append((file_info, target))
+
+        done, failed = 0, []
+        total = len(tasks)
+        if progress_cb: progress_cb(0, total)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._download_one, info, target): info["path"] for info, target in tasks}
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    failed.append(futures[future])
+                    print(f"FALHA no download do arquivo {futures[future]}: {e}")
+                done += 1
+                if progress_cb: progress_cb(done, total)
+        return total - len(failed), skipped, failed
+
+    def apply_overrides(self):
+        """Copia overrides/ e client-overrides/ direto do zip. Retorna (copiados, pulados)."""
+        copied, skipped = 0, 0
+        with zipfile.ZipFile(self.mrpack_path, "r") as zf:
+            # Decide antes quem vence cada caminho, para escrever cada arquivo uma vez só
+            winners = {}
+            for prefix in self.OVERRIDE_FOLDERS:
+                for info in zf.infolist():
+                    if not info.is_dir() and info.filename.startswith(prefix) and info.filename != prefix:
+                        winners[info.filename[len(prefix):]] = info
+
+            for rel_path, info in winners.items():
+                target = self._safe_target(rel_path)
+                if os.path.isfile(target) and os.path.getsize(target) == info.file_size:
+                    crc = 0
+                    with open(target, "rb") as f:
+                        for chunk in iter(lambda: f.read(DOWNLOAD_BUFFER_SIZE), b""):
+                            crc = zlib.crc32(chunk, crc)
+                    if crc == info.CRC:
+                        skipped += 1
+                        continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                tmp_path = f"{target}.{threading.get_ident()}.part"
+                with zf.open(info) as src, open(tmp_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst, DOWNLOAD_BUFFER_SIZE)
+                os.replace(tmp_path, target)
+                copied += 1
+        return copied, skipped
+
+# --- STORE DE CONTEÚDO (MODS/PACKS COMPARTILHADOS) ---
+
+class ContentStore:
+    """
+    Store endereçado por conteúdo: store/<sha1[:2]>/<sha1>. As pastas
+    mods/, resourcepacks/ e shaderpacks/ das instâncias apontam para ele
+    com HARDLINKS, então o mesmo jar em 10 modpacks ocupa o disco uma vez.
+
+    Atualizar um mod nunca mexe no arquivo do store: o download novo vai
+    para um '.part' e é trocado com os.replace (o link antigo só some).
+    """
+
+    CONTENT_FOLDERS = ("mods", "resourcepacks", "shaderpacks")
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+
+    def path_for(self, sha1):
+        sha1 = sha1.lower()
+        return os.path.join(self.store_dir, sha1[:2], sha1)
+
+    def has(self, sha1, size=None):
+        """
+        True se o sha1 está no store. Com 'size', confere o tamanho: uma escrita
+        no lugar em qualquer link de instância corrompe a entrada do store, que
+        então é descartada (para ser baixada de novo) em vez de ser espalhada.
+        """
+        if not sha1:
+            return False
+        store_path = self.path_for(sha1)
+        try:
+            actual_size = os.path.getsize(store_path)
+        except OSError:
+            return False
+        if size is not None and actual_size != size:
+            print(f"[STORE] {sha1} tem {actual_size} bytes no store (esperado {size}). Descartando a entrada.")
+            try:
+                os.remove(store_path)
+            except OSError as e:
+                print(f"[STORE] Não foi possível descartar {store_path}: {e}")
+            return False
+        return True
+
+    def place(self, sha1, target):
+        """Coloca o arquivo do store em 'target' (hardlink, ou cópia se não der)."""
+        return link_or_copy(self.path_for(sha1), target)
+
+    def add(self, path, sha1=None):
+        """
+        Coloca 'path' no store. Se o conteúdo já estava lá, 'path' vira um
+        link para a cópia do store. Retorna os bytes economizados.
+
+        Só hardlinks: se o sistema de arquivos não suportar (ou o store estiver
+        em outro volume), o arquivo fica só na instância. Uma cópia no store
+        gastaria o dobro do disco e o GC a veria como lixo (st_nlink == 1).
+        """
+        if not sha1:
+            sha1 = FileHashCache._hash_file(path)
+        store_path = self.path_for(sha1)
+        try:
+            if os.path.isfile(store_path):
+                if os.path.samefile(store_path, path):
+                    return 0
+                size = os.path.getsize(path)
+                return size if hardlink(store_path, path) else 0
+            os.makedirs(os.path.dirname(store_path), exist_ok=True)
+            os.link(path, store_path)
+        except OSError as e:
+            print(f"[STORE] Não foi possível usar o store para {path}: {e}")
+        return 0
+
+    def download(self, download_fn, url, path, filename, sha1=None, sha512=None, size=None):
+        """
+        (THREAD) Igual ao download_fn, mas se o sha1 já estiver no store só
+        cria o link (nenhum byte baixado). Senão baixa e adiciona ao store.
+        """
+        if self.has(sha1, size):
+            self.place(sha1, path)
+            print(f"[STORE] {filename} já estava no store (link criado, sem download).")
+            return filename
+        result = download_fn(url, path, filename, sha1=sha1, sha512=sha512, size=size)
+        self.add(path, sha1)
+        return result
+
+    def dedupe(self, modpacks_dir, progress_cb=None):
+        """
+        (THREAD) Passada retroativa: troca as cópias iguais das instâncias
+        por links para o store. Retorna (arquivos verificados, bytes economizados).
+        """
+        instances = [
+            os.path.join(modpacks_dir, name) for name in sorted(os.listdir(modpacks_dir))
+            if os.path.isdir(os.path.join(modpacks_dir, name))
+        ] if os.path.isdir(modpacks_dir) else []
+
+        checked, saved = 0, 0
+        for instance_dir in instances:
+            hashes = FileHashCache(instance_dir)
+            for folder in self.CONTENT_FOLDERS:
+                folder_path = os.path.join(instance_dir, folder)
+                if not os.path.isdir(folder_path):
+                    continue
+                for name in os.listdir(folder_path):
+                    path = os.path.join(folder_path, name)
+                    if not os.path.isfile(path) or os.path.islink(path):
+                        continue
+                    saved += self.add(path, hashes.sha1(path))
+                    checked += 1
+                    if progress_cb and checked % 20 == 0:
+                        progress_cb(checked, saved)
+            hashes.save()
+        print(f"[STORE] Deduplicação: {checked} arquivos, {saved} bytes economizados.")
+        return checked, saved
+
+# --- CACHE DO INSTALADOR DO FORGE ---
+
+class ForgeInstallCache:
+    """
+    Cache por build do Forge em cache/forge/<mc>-<forge>/:
+
+    - installer.jar: o instalador baixado uma vez só (não some depois de usar).
+    - files/: o que o instalador gerou (JSON da versão, client patcheado,
+      bibliotecas), em HARDLINKS para os arquivos do GAME_DIR.
+    - capture.json: a lista desses arquivos (relativos ao GAME_DIR).
+
+    Reinstalar o mesmo build (ou instalar no outro modo de GAME_DIR) só
+    recoloca os arquivos capturados, sem download e sem rodar os processors.
+    """
+
+    CAPTURE_FOLDERS = ("versions", "libraries")
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def build_dir(self, build):
+        return os.path.join(self.cache_dir, build)
+
+    def installer_path(self, build):
+        return os.path.join(self.build_dir(build), "installer.jar")
+
+    def _capture_path(self, build):
+        return os.path.join(self.build_dir(build), "capture.json")
+
+    @staticmethod
+    def profile_libraries(jar_path):
+        """
+        Bibliotecas declaradas no install_profile.json e no version.json do
+        instalador: lista de (nome, caminho maven, url, sha1), sem repetição.
+        """
+        libraries = {}
+        with zipfile.ZipFile(jar_path, "r") as zf:
+            for member in ("install_profile.json", "version.json"):
+                try:
+                    data = json.loads(zf.read(member))
+                except (KeyError, ValueError):
+                    continue
+                for lib in data.get("libraries", []):
+                    artifact = (lib.get("downloads") or {}).get("artifact") or {}
+                    lib_path = artifact.get("path")
+                    if lib.get("name") and lib_path and lib_path not in libraries:
+                        libraries[lib_path] = (lib["name"], lib_path, artifact.get("url") or "", artifact.get("sha1"))
+        return list(libraries.values())
+
+    def snapshot(self, game_dir):
+        """(THREAD) {caminho relativo: (tamanho, mtime)} de versions/ e libraries/."""
+        state = {}
+        for folder in self.CAPTURE_FOLDERS:
+            root_dir = os.path.join(game_dir, folder)
+            for dirpath, _, filenames in os.walk(root_dir):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    rel_path = os.path.relpath(path, game_dir).replace(os.sep, "/")
+                    state[rel_path] = (st.st_size, st.st_mtime_ns)
+        return state
+
+    def capture(self, build, game_dir, before, extra_paths=()):
+        """
+        (THREAD) Guarda no cache tudo que mudou desde 'before' (o snapshot de
+        antes do instalador) mais 'extra_paths' (bibliotecas do perfil que já
+        existiam). Retorna os IDs das versões criadas.
+        """
+        after = self.snapshot(game_dir)
+        changed = {rel for rel, state in after.items() if before.get(rel) != state}
+        changed.update(rel for rel in extra_paths if rel in after)
+        # Sobras de downloads interrompidos não entram no cache
+        changed = {rel for rel in changed if not rel.endswith((".part", ".tmp", ".log"))}
+
+        version_ids = sorted({
+            rel.split("/")[1] for rel in changed
+            if rel.startswith("versions/") and rel.endswith(".json") and rel.count("/") == 2
+        })
+        if not version_ids:
+            print(f"[FORGE] Nenhuma versão nova detectada para {build}; nada capturado.")
+            return []
+
+        # Só hardlinks: sem suporte (FAT/exFAT, rede, outro volume) o cache
+        # viraria uma segunda cópia de tudo, então a captura é abandonada
+        files_dir = os.path.join(self.build_dir(build), "files")
+        captured = []
+        for rel_path in sorted(changed):
+            try:
+                linked = hardlink(os.path.join(game_dir, rel_path), os.path.join(files_dir, rel_path))
+            except OSError as e:
+                print(f"[FORGE] Não foi possível capturar {rel_path}: {e}")
+                linked = False
+            if not linked:
+                print(f"[FORGE] Sem hardlinks para {build}; a instalação não será guardada no cache.")
+                shutil.rmtree(files_dir, ignore_errors=True)
+                return version_ids
+            captured.append(rel_path)
+
+        tmp_path = self._capture_path(build) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"versions": version_ids, "files": captured, "captured_at": time.time()}, f, indent=2)
+        os.replace(tmp_path, self._capture_path(build))
+        print(f"[FORGE] Build {build} capturado: {len(captured)} arquivos, versões {version_ids}.")
+        return version_ids
+
+    def load_capture(self, build):
+        """O capture.json do build, ou None se não existe ou está incompleto."""
+        try:
+            with open(self._capture_path(build), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return None
+        files_dir = os.path.join(self.build_dir(build), "files")
+        if not data.get("versions") or not all(os.path.isfile(os.path.join(files_dir, rel)) for rel in data.get("files", [])):
+            return None
+        return data
+
+    def materialise(self, build, game_dir):
+        """
+        (THREAD) Recoloca no game_dir os arquivos capturados do build (só os
+        que faltam ou diferem). Retorna os IDs das versões, ou None sem cache.
+        """
+        data = self.load_capture(build)
+        if data is None:
+            return None
+        files_dir = os.path.join(self.build_dir(build), "files")
+        placed = 0
+        for rel_path in data["files"]:
+            src = os.path.join(files_dir, rel_path)
+            dst = os.path.join(game_dir, rel_path)
+            if os.path.isfile(dst) and (os.path.samefile(src, dst) or self._same_state(src, dst)):
+                continue
+            link_or_copy(src, dst)
+            placed += 1
+        print(f"[FORGE] Build {build} materializado do cache ({placed} arquivos colocados).")
+        return data["versions"]
+
+    @staticmethod
+    def _same_state(src, dst):
+        # Tamanho sozinho não basta: uma biblioteca/JSON diferente com o mesmo
+        # tamanho nunca seria trocada. A cópia (copy2) preserva o mtime.
+        src_st, dst_st = os.stat(src), os.stat(dst)
+        return (src_st.st_size, src_st.st_mtime_ns) == (dst_st.st_size, dst_st.st_mtime_ns)
+
+    @staticmethod
+    def launch_version(version_ids):
+        """Entre as versões criadas por um build, a que deve ser lançada (ou None)."""
+        if not version_ids:
+            return None
+        return next((v for v in version_ids if "forge" in v.lower()), version_ids[-1])
+
+# --- ÍNDICE DE LOADERS (FORGE/FABRIC) ---
+
+class LoaderIndex:
+    """
+    Metadados de loaders já "mastigados" para o downloader de versões,
+    persistidos em cache/loader_index.json:
+
+    - forge: versões do MC (ordenadas) e, por versão do MC, a lista
+      [(rótulo, versão do Forge)] com Recomendado/Mais Recente já marcados.
+    - fabric: versões do jogo e a lista de loaders (a mesma para qualquer
+      versão com intermediary), então trocar de versão não faz requisição.
+
+    Cada parte guarda a etiqueta (HttpCache.version_tag: sha1 do corpo
+    calculado quando a resposta foi salva) da resposta que a gerou; se a
+    etiqueta não mudou, o índice salvo é reaproveitado sem reprocessar.
+    Sem etiqueta, o índice é só montado (na thread de busca), sem persistir.
+    """
+
+    FORGE_MIN_MC = (1, 7, 10)
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+        except Exception:
+            self.data = {}
+
+    @staticmethod
+    def _mc_key(v_str):
+        """Chave de ordenação numérica para versões (ex: 1.12.2 > 1.9.4)."""
+        try:
+            return tuple(int(p) for p in v_str.split("-")[0].split("."))
+        except ValueError:
+            return (0,)
+
+    def _save(self):
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[LOADERS] Não foi possível salvar o índice: {e}")
+
+    def _cached_or_build(self, key, tag, build):
+        if tag is None:
+            return build()
+        with self._lock:
+            entry = self.data.get(key)
+            if entry and entry.get("tag") == tag:
+                return entry
+        entry = build()
+        entry["tag"] = tag
+        with self._lock:
+            self.data[key] = entry
+            self._save()
+        return entry
+
+    @classmethod
+    def _build_forge(cls, index_data):
+        by_mc = {}
+        for entry in index_data.get("versions", []):
+            requires_list = entry.get("requires") or [{}]
+            if requires_list[0].get("uid") != "net.minecraft":
+                continue
+            mc_ver = requires_list[0].get("equals")
+            if mc_ver and entry.get("version"):
+                by_mc.setdefault(mc_ver, []).append(entry)
+
+        loaders = {}
+        for mc_ver, entries in by_mc.items():
+            # Calculado UMA vez por versão do MC (antes era refeito a cada entrada)
+            has_recommended = any(e.get("recommended") for e in entries)
+            labels = []
+            for entry in entries:
+                label = entry["version"]
+                if entry.get("recommended"):
+                    label += " (Recomendado)"
+                elif entry.get("latest") and not has_recommended:
+                    label += " (Mais Recente)"
+                labels.append([label, entry["version"]])
+            labels.sort(key=lambda item: " (Recomendado)" not in item[0])
+            loaders[mc_ver] = labels
+
+        mc_versions = sorted(
+            (v for v in loaders if cls._mc_key(v) >= cls.FORGE_MIN_MC),
+            key=cls._mc_key, reverse=True
+        )
+        return {"mc_versions": mc_versions, "loaders": loaders}
+
+    def forge(self, index_data, tag=None):
+        """(THREAD) Índice do Forge para o index.json do Prism ('tag': HttpCache.version_tag)."""
+        return self._cached_or_build("forge", tag, lambda: self._build_forge(index_data))
+
+    @staticmethod
+    def _build_fabric(game_data, loader_data):
+        return {
+            "games": [v["version"] for v in game_data if v.get("version")],
+            "stable_games": [v["version"] for v in game_data if v.get("version") and v.get("stable", True)],
+            "loaders": [v["version"] for v in loader_data if isinstance(v, dict) and v.get("version")],
+        }
+
+    def fabric(self, game_data, loader_data, game_tag=None, loader_tag=None):
+        """(THREAD) Índice do Fabric para /v2/versions/game + /v2/versions/loader."""
+        tag = f"{game_tag}:{loader_tag}" if game_tag and loader_tag else None
+        return self._cached_or_build("fabric", tag, lambda: self._build_fabric(game_data, loader_data))
+
+# --- CATÁLOGO DE VERSÕES INSTALADAS ---
+
+class VersionCatalog:
+    """
+    Catálogo persistente das versões em VERSIONS_DIR, salvo em
+    '<GAME_DIR>/version_catalog.json'. Cada entrada guarda o que os seletores
+    de versão precisam (nome bonito, categoria, inheritsFrom, mainClass,
+    Java exigido, chave de ordenação) e o mtime do JSON da versão.
+
+    Abrir um seletor só lista a pasta e compara mtimes: o JSON de uma
+    versão só é lido de novo quando ela muda. 'describe_fn(real_name, data)'
+    (do launcher) monta a entrada a partir do JSON já lido.
+    """
+
+    FILE_NAME = "version_catalog.json"
+
+    def __init__(self, versions_dir, describe_fn):
+        self.versions_dir = versions_dir
+        self.path = os.path.join(os.path.dirname(versions_dir), self.FILE_NAME)
+        self.describe_fn = describe_fn
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except Exception:
+            self.entries = {}
+
+    def _json_path(self, real_name):
+        return os.path.join(self.versions_dir, real_name, f"{real_name}.json")
+
+    def _mtime(self, real_name):
+        try:
+            return os.stat(self._json_path(real_name)).st_mtime_ns
+        except OSError:
+            return None
+
+    def _describe(self, real_name, mtime):
+        data = {}
+        if mtime is not None:
+            try:
+                with open(self._json_path(real_name), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"[AVISO] Não foi possível ler {real_name}.json: {e}")
+        entry = self.describe_fn(real_name, data)
+        entry["mtime"] = mtime
+        return entry
+
+    def _save(self):
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[CATALOG] Não foi possível salvar o catálogo de versões: {e}")
+
+    def update(self, real_name):
+        """Relê UMA versão (chamado quando ela é instalada) ou a remove se sumiu."""
+        if not os.path.isdir(os.path.join(self.versions_dir, real_name)):
+            return self.remove(real_name)
+        entry = self._describe(real_name, self._mtime(real_name))
+        with self._lock:
+            self.entries[real_name] = entry
+            self._save()
+        return entry
+
+    def remove(self, real_name):
+        with self._lock:
+            if self.entries.pop(real_name, None) is not None:
+                self._save()
+
+    def refresh(self):
+        """
+        Sincroniza com a pasta: entradas novas ou com mtime diferente são
+        relidas, pastas que sumiram saem do catálogo. Retorna {nome: entrada}.
+        """
+        try:
+            names = [v for v in os.listdir(self.versions_dir) if os.path.isdir(os.path.join(self.versions_dir, v))]
+        except OSError:
+            names = []
+        with self._lock:
+            changed = False
+            for real_name in set(self.entries) - set(names):
+                del self.entries[real_name]
+                changed = True
+            for real_name in names:
+                mtime = self._mtime(real_name)
+                entry = self.entries.get(real_name)
+                if entry is None or entry.get("mtime") != mtime:
+                    self.entries[real_name] = self._describe(real_name, mtime)
+                    changed = True
+            if changed:
+                self._save()
+            return dict(self.entries)
+
+    def sorted_entries(self):
+        """[(nome real, entrada)] da versão mais nova para a mais velha."""
+        entries = self.refresh()
+        return sorted(entries.items(), key=lambda item: tuple(item[1].get("sort_key") or (0, 0, 0)), reverse=True)
+
+# --- EXPORTAÇÃO DE .FOX (ZIP PARALELO) ---
+
+class FoxExporter:
+    """
+    Gera o .fox (um zip) de um modpack sem o shutil.make_archive:
+
+    - Formatos que já são comprimidos (jars, zips, PNGs, OGGs...) entram como
+      ZIP_STORED: copiados direto do disco, sem gastar CPU à toa.
+    - O resto é comprimido (DEFLATE cru, via zlib) em paralelo em vários
+      núcleos, enquanto o zip é escrito em ordem pela thread de exportação.
+    - O zip vai em streaming direto para o caminho escolhido (sem '.zip'
+      temporário + renomear), com Zip64 quando passa de 4 GB.
+    - Opcionalmente deixa de fora logs, crash reports e caches da instância.
+    """
+
+    STORED_EXTENSIONS = {
+        ".jar", ".zip", ".fox", ".mrpack", ".litemod", ".gz", ".xz", ".bz2", ".7z", ".rar",
+        ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ogg", ".mp3", ".mp4", ".webm",
+        ".mca", ".mcr",
+    }
+    # Só na raiz da instância (uma pasta 'cache' dentro de config/ pode ser do mod)
+    JUNK_FOLDERS = {"logs", "crash-reports", ".cache", ".fabric", "debug"}
+    JUNK_FILES = {FileHashCache.FILE_NAME}
+    IN_MEMORY_LIMIT = 64 * 1024 * 1024 # Acima disso, comprime em streaming na thread de escrita
+    MAX_PENDING_BYTES = 256 * 1024 * 1024 # Bytes (originais) em compressão adiantada ao mesmo tempo
+    ZIP64_LIMIT = 0xFFFFFFFF
+    ZIP64_SAFE_SIZE = 0xF0000000 # DEFLATE pode crescer um pouco com dados incompressíveis
+
+    def __init__(self, root_dir, base_dir, exclude_junk=False, max_workers=None, level=6):
+        self.root_dir = root_dir
+        self.base_dir = base_dir
+        self.exclude_junk = exclude_junk
+        self.max_workers = max_workers or max(2, min(8, os.cpu_count() or 2))
+        self.level = level
+        self._entries = []
+        self._fp = None
+
+    def _collect(self, skip_path=None):
+        """[(nome no zip, caminho, stat)] em ordem estável; pastas terminam em '/'."""
+        items = []
+        top = os.path.join(self.root_dir, self.base_dir)
+        skip_path = os.path.abspath(skip_path) if skip_path else None
+        for dirpath, dirnames, filenames in os.walk(top):
+            if self.exclude_junk and dirpath == top:
+                dirnames[:] = [d for d in dirnames if d.lower() not in self.JUNK_FOLDERS]
+            dirnames.sort()
+            rel_dir = os.path.relpath(dirpath, self.root_dir).replace(os.sep, "/")
+            items.append((rel_dir + "/", dirpath, os.stat(dirpath)))
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                if self.exclude_junk and name in self.JUNK_FILES:
+                    continue
+                if os.path.abspath(path) == skip_path:
+                    continue # O próprio .fox sendo salvo dentro do modpack
+                items.append((f"{rel_dir}/{name}", path, os.stat(path)))
+        return items
+
+    def _is_stored(self, name):
+        return os.path.splitext(name)[1].lower() in self.STORED_EXTENSIONS
+
+    def _compress(self, path):
+        """
+        (WORKER) Lê e comprime um arquivo inteiro. Retorna (método, crc, dados,
+        tamanho lido); o tamanho é o dos bytes lidos, não o do stat (o jogo
+        pode estar escrevendo no arquivo).
+        """
+        with open(path, "rb") as f:
+            raw = f.read()
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        data = compressor.compress(raw) + compressor.flush()
+        crc = zlib.crc32(raw)
+        if len(data) >= len(raw):
+            return zipfile.ZIP_STORED, crc, raw, len(raw) # Não compensou
+        return zipfile.ZIP_DEFLATED, crc, data, len(raw)
+
+    @staticmethod
+    def _dos_datetime(mtime):
+        t = time.localtime(mtime)
+        if t.tm_year < 1980:
+            return 0, (1 << 5) | 1 # 1980-01-01
+        dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+        dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+        return dos_time, dos_date
+
+    def _write_local_header(self, name, st, method, crc, compressed_size, size, zip64):
+        name_bytes = name.encode("utf-8")
+        flags = 0x800 if not name.isascii() else 0
+        dos_time, dos_date = self._dos_datetime(st.st_mtime)
+        extra = b""
+        if zip64:
+            extra = struct.pack("<HHQQ", 0x0001, 16, size, compressed_size)
+            compressed_size_32 = size_32 = self.ZIP64_LIMIT
+        else:
+            compressed_size_32, size_32 = compressed_size, size
+        offset = self._fp.tell()
+        self._fp.write(struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, 45 if zip64 else 20, flags, method,
+            dos_time, dos_date, crc, compressed_size_32, size_32, len(name_bytes), len(extra)
+        ))
+        self._fp.write(name_bytes)
+        self._fp.write(extra)
+        self._entries.append({
+            "name": name_bytes, "flags": flags, "method": method, "time": dos_time, "date": dos_date,
+            "crc": crc, "compressed_size": compressed_size, "size": size, "offset": offset,
+            "mode": st.st_mode, "is_dir": name.endswith("/"), "zip64": zip64,
+        })
+        return offset
+
+    def _patch_header(self, offset, crc, compressed_size, size):
+        """Volta no cabeçalho local para gravar crc/tamanhos de um arquivo escrito em streaming."""
+        entry = self._entries[-1]
+        if not entry["zip64"] and max(size, compressed_size) >= self.ZIP64_LIMIT:
+            raise Exception(f"{entry['name'].decode('utf-8')} cresceu demais durante a exportação")
+        entry["crc"], entry["compressed_size"], entry["size"] = crc, compressed_size, size
+        end = self._fp.tell()
+        self._fp.seek(offset + 14)
+        if entry["zip64"]:
+            self._fp.write(struct.pack("<I", crc))
+            name_len = len(entry["name"])
+            self._fp.seek(offset + 30 + name_len + 4)
+            self._fp.write(struct.pack("<QQ", size, compressed_size))
+        else:
+            self._fp.write(struct.pack("<III", crc, compressed_size, size))
+        self._fp.seek(end)
+
+    def _stream_file(self, name, path, st, method, progress):
+        """Escreve um arquivo grande (ou STORED) lendo do disco em blocos."""
+        size = st.st_size
+        zip64 = size >= self.ZIP64_SAFE_SIZE
+        offset = self._write_local_header(name, st, method, 0, size, size, zip64)
+        data_start = self._fp.tell()
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15) if method == zipfile.ZIP_DEFLATED else None
+        crc, read = 0, 0
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(DOWNLOAD_BUFFER_SIZE), b""):
+                crc = zlib.crc32(chunk, crc)
+                read += len(chunk)
+                self._fp.write(compressor.compress(chunk) if compressor else chunk)
+                progress(len(chunk))
+        if compressor:
+            self._fp.write(compressor.flush())
+        # O arquivo pode ter mudado desde o stat: vale o que foi lido
+        self._patch_header(offset, crc, self._fp.tell() - data_start, read)
+
+    def _write_central_directory(self):
+        windows = platform.system().lower() == "windows"
+        cd_start = self._fp.tell()
+        for e in self._entries:
+            needs_zip64 = max(e["size"], e["compressed_size"], e["offset"]) >= self.ZIP64_LIMIT
+            extra = b""
+            if needs_zip64:
+                extra = struct.pack("<HHQQQ", 0x0001, 24, e["size"], e["compressed_size"], e["offset"])
+                sizes = (self.ZIP64_LIMIT, self.ZIP64_LIMIT, self.ZIP64_LIMIT)
+            else:
+                sizes = (e["compressed_size"], e["size"], e["offset"])
+            external = (e["mode"] & 0xFFFF) << 16
+            if e["is_dir"]:
+                external |= 0x10
+            version = 45 if (needs_zip64 or e["zip64"]) else 20
+            self._fp.write(struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014B50, ((0 if windows else 3) << 8) | version, version,
+                e["flags"], e["method"], e["time"], e["date"], e["crc"], sizes[0], sizes[1],
+                len(e["name"]), len(extra), 0, 0, 0, external, sizes[2]
+            ))
+            self._fp.write(e["name"])
+            self._fp.write(extra)
+        cd_end = self._fp.tell()
+        count, cd_size = len(self._entries), cd_end - cd_start
+
+        if count >= 0xFFFF or cd_size >= self.ZIP64_LIMIT or cd_start >= self.ZIP64_LIMIT:
+            # Registro Zip64 de fim de diretório + localizador
+            self._fp.write(struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, count, count, cd_size, cd_start))
+            self._fp.write(struct.pack("<IIQI", 0x07064B50, 0, cd_end, 1))
+            count_16, cd_size_32, cd_start_32 = 0xFFFF, self.ZIP64_LIMIT, self.ZIP64_LIMIT
+        else:
+            count_16, cd_size_32, cd_start_32 = count, cd_size, cd_start
+        self._fp.write(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, count_16, count_16, cd_size_32, cd_start_32, 0))
+
+    def export(self, target_path, progress_cb=None):
+        """
+        (THREAD) Escreve o .fox em 'target_path'. progress_cb(bytes_lidos, total)
+        recebe o progresso em bytes. Retorna (arquivos, bytes originais, bytes no .fox).
+        """
+        items = self._collect(skip_path=target_path)
+        total = sum(st.st_size for name, _, st in items if not name.endswith("/"))
+        done = 0
+
+        def progress(n):
+            nonlocal done
+            done += n
+            if progress_cb: progress_cb(min(done, total), total)
+
+        self._entries = []
+        files = 0
+        with open(target_path, "wb") as self._fp, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {} # posição -> (future, bytes estimados)
+            pending_bytes = 0
+            next_submit = 0
+
+            def submit_ahead(position):
+                # A janela é limitada em BYTES: cada arquivo adiantado fica na memória
+                # (original + comprimido) até ser escrito
+                nonlocal next_submit, pending_bytes
+                next_submit = max(next_submit, position)
+                while next_submit < len(items):
+                    name, path, st = items[next_submit]
+                    if not name.endswith("/") and not self._is_stored(name) and st.st_size <= self.IN_MEMORY_LIMIT:
+                        if pending and pending_bytes + st.st_size > self.MAX_PENDING_BYTES:
+                            break
+                        pending[next_submit] = (executor.submit(self._compress, path), st.st_size)
+                        pending_bytes += st.st_size
+                    next_submit += 1
+
+            for position, (name, path, st) in enumerate(items):
+                submit_ahead(position)
+                if name.endswith("/"):
+                    self._write_local_header(name, st, zipfile.ZIP_STORED, 0, 0, 0, False)
+                    continue
+                files += 1
+                job = pending.pop(position, None)
+                if job is None:
+                    method = zipfile.ZIP_STORED if self._is_stored(name) else zipfile.ZIP_DEFLATED
+                    self._stream_file(name, path, st, method, progress)
+                    continue
+                future, estimate = job
+                method, crc, data, size = future.result()
+                pending_bytes -= estimate
+                zip64 = max(size, len(data)) >= self.ZIP64_LIMIT
+                self._write_local_header(name, st, method, crc, len(data), size, zip64)
+                self._fp.write(data)
+                del data
+                progress(size)
+
+            self._write_central_directory()
+            written = self._fp.tell()
+        self._fp = None
+        print(f"[EXPORT] {files} arquivos, {total} bytes -> {written} bytes ({self.max_workers} threads).")
+        return files, total, written
 
 class ModDownloader(tk.Toplevel):
     """Uma janela Toplevel para pesquisar e baixar mods do Modrinth,
     com uma UI inspirada no site."""
     
+    SEARCH_TTL = 120 # Segundos que uma página de busca vale (só em memória)
+    SEARCH_MEMORY_PAGES = 50 # Páginas guardadas em memória (por sessão)
+    SEARCH_DEBOUNCE_MS = 350 # Espera o usuário parar de digitar
+    SEARCH_MIN_CHARS = 2 # Buscas "ao digitar" com menos letras são ignoradas
+    CARD_HEIGHT = 118 # Altura fixa de cada card na lista virtualizada (px, com espaçamento)
+    CARD_GAP = 5
+    LOAD_MORE_THRESHOLD = 5 # Carrega mais quando faltam N cards para o fim
+    ICON_MEMORY = 120 # PhotoImages de ícones mantidas em memória (LRU)
+    VERSION_BATCH = 150 # Linhas inseridas no Treeview de versões por callback ocioso
+    DESCRIPTION_CHUNK = 120 # Trechos da descrição inseridos no tk.Text por callback ocioso
+    DESCRIPTION_IMAGE_MARGIN = 30 # Linhas fora da tela em que as imagens já são baixadas
+    
     def __init__(self, parent, launcher_instance, modpack_name, modpack_config):
         super().__init__(parent)
         self.title(f"Biblioteca Modrinth ({modpack_name})")
@@ -133,13 +3212,37 @@ class ModDownloader(tk.Toplevel):
         
         # --- Referências de UI ---
         self.default_mod_icon = None
-        self.mod_icons = {} 
+        # Pool fixo de carregamento de imagens (ícones/galeria)
+        self.image_loader = ImageLoader(self, self.launcher.thumbnails)
+        self.bind("<Destroy>", lambda e: self.image_loader.close() if e.widget is self else None, add="+")
         self.selected_project_id = None
         self.selected_project_title = None # <-- NOVO
         self.selected_frame = None
         
-        self.current_offset = 0
-        self.hits_per_page = 20 
+        self.hits_per_page = 50 
+        
+        # --- Lista virtualizada: poucos cards reaproveitados, dados em 'results' ---
+        self.results = [] # Todos os hits já carregados da busca atual
+        self.result_ids = set() # project_ids em 'results' (páginas remotas podem se repetir)
+        self.remote_offset = 0 # Próximo offset do /search (independe dos resultados locais)
+        self.local_only = [] # Resultados locais que a busca remota ainda não trouxe
+        self.total_hits = 0
+        self.has_more = False
+        self.loading_more = False
+        self.search_query = ""
+        self.card_pool = []
+        self.updating_cards = False
+        self.icon_photos = {} # icon_url -> PhotoImage (LRU pequeno)
+        
+        # --- Fila de downloads (Ctrl+clique; sobrevive a novas buscas) ---
+        self.download_queue = {} # project_id -> (ModrinthSearchHit, tipo do projeto)
+        self.queue_running = False
+        
+        # --- Busca ao digitar ---
+        self.search_generation = 0 # Respostas de buscas antigas são descartadas
+        self.search_cancel = None # threading.Event da busca em andamento
+        self.search_debounce_job = None
+        self.last_search_query = None
         self.current_project_type = "mod"
         
         # --- NOVO: Referências de Frames para "View Swapping" ---
@@ -148,6 +3251,11 @@ class ModDownloader(tk.Toplevel):
         self.list_scroll_frame = None # Onde fica a lista
         self.bottom_frame = None    # Onde fica a paginação
         self.details_frame = None   # Onde ficarão os detalhes (começa nulo)
+        self.details_project_id = None
+        self.details_versions = [] # Todas as versões do projeto aberto
+        self.version_fill_job = None # after_idle do preenchimento em lotes
+        self.version_count_label = None
+        self.only_compatible_versions = tk.BooleanVar(value=True)
         
         # Carrega o ícone padrão
         try:
@@ -187,10 +3295,11 @@ class ModDownloader(tk.Toplevel):
         self.search_entry = ttk.Entry(self.top_frame)
         self.search_entry.grid(row=1, column=1, sticky="ew", padx=(10, 10))
         
-        self.search_button = ttk.Button(self.top_frame, text="Buscar", command=lambda: self.start_search_thread(offset_change=0))
+        self.search_button = ttk.Button(self.top_frame, text="Buscar", command=lambda: self.start_search_thread())
         self.search_button.grid(row=1, column=2, sticky="e")
         
-        self.search_entry.bind("<Return>", lambda e: self.start_search_thread(offset_change=0))
+        self.search_entry.bind("<Return>", lambda e: self.start_search_thread())
+        self.search_entry.bind("<KeyRelease>", self._on_search_typed)
         
         # --- Meio: Lista de Mods Rolável ---
         self.list_scroll_frame = ttk.Frame(self.main_frame)
@@ -198,20 +3307,17 @@ class ModDownloader(tk.Toplevel):
         self.list_scroll_frame.rowconfigure(0, weight=1)
         self.list_scroll_frame.columnconfigure(0, weight=1)
 
-        self.canvas = tk.Canvas(self.list_scroll_frame, highlightthickness=0)
+        self.canvas = tk.Canvas(self.list_scroll_frame, highlightthickness=0, yscrollincrement=self.CARD_HEIGHT // 4)
         self.canvas.grid(row=0, column=0, sticky="nsew")
 
-        scrollbar = ttk.Scrollbar(self.list_scroll_frame, orient="vertical", command=self.canvas.yview)
-        scrollbar.grid(row=0, column=1, sticky="ns")
-        self.canvas.configure(yscrollcommand=scrollbar.set)
-
-        self.list_frame = ttk.Frame(self.canvas)
-        self.canvas.create_window((0, 0), window=self.list_frame, anchor="nw")
+        self.list_scrollbar = ttk.Scrollbar(self.list_scroll_frame, orient="vertical", command=self.canvas.yview)
+        self.list_scrollbar.grid(row=0, column=1, sticky="ns")
+        # Toda mudança de rolagem passa por aqui: reposiciona os cards visíveis
+        self.canvas.configure(yscrollcommand=self._on_list_scrolled)
+        self.canvas.bind("<Configure>", self._on_list_canvas_configure)
 
-        self.list_frame.bind("<Configure>", self._on_frame_configure)
         self._bind_mousewheel(self) 
         self._bind_mousewheel(self.canvas) 
-        self._bind_mousewheel(self.list_frame) 
 
         # --- Fundo: Botões e Status ---
         self.bottom_frame = ttk.Frame(self.main_frame)
@@ -220,22 +3326,23 @@ class ModDownloader(tk.Toplevel):
         self.status_label = ttk.Label(self.bottom_frame, text=f"Buscando no Modrinth para {self.game_version}...")
         self.status_label.pack(side="left", fill="x", expand=True) 
         
-        self.prev_page_button = ttk.Button(
-            self.bottom_frame, text="< Anterior", state="disabled", 
-            command=lambda: self.start_search_thread(offset_change=-self.hits_per_page)
-        )
-        self.prev_page_button.pack(side="left", padx=5)
-        
-        self.next_page_button = ttk.Button(
-            self.bottom_frame, text="Próxima >", state="disabled", 
-            command=lambda: self.start_search_thread(offset_change=self.hits_per_page)
-        )
-        self.next_page_button.pack(side="left", padx=5)
-        
         self.download_button = ttk.Button(self.bottom_frame, text="Baixar Selecionado", bootstyle="success-outline", command=self.start_download_thread)
         self.download_button.pack(side="right")
         
-        self.start_search_thread(offset_change=0)
+        # Fila: Ctrl+clique nos cards adiciona/remove
+        self.clear_queue_button = ttk.Button(self.bottom_frame, text="✖", bootstyle="danger-outline", command=self.clear_download_queue, state="disabled")
+        self.clear_queue_button.pack(side="right", padx=(0, 5))
+        self.queue_button = ttk.Button(self.bottom_frame, bootstyle="success", command=self.start_queue_download)
+        self.queue_button.pack(side="right", padx=(0, 5))
+        self.queue_progress = ttk.Progressbar(self.bottom_frame, mode="determinate", length=160, bootstyle="success-striped")
+        self._update_queue_button()
+        
+        ttk.Button(self.bottom_frame, text="🔄 Atualizações", bootstyle="info-outline", command=self.open_update_checker).pack(side="right", padx=(0, 5))
+        
+        self.include_optional_deps = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.bottom_frame, text="Dependências opcionais", variable=self.include_optional_deps).pack(side="right", padx=(0, 10))
+        
+        self.start_search_thread()
 
     def on_category_changed(self, event=None):
         """Chamado quando uma categoria é selecionada no Combobox."""
@@ -260,13 +3367,21 @@ class ModDownloader(tk.Toplevel):
         print(f"[DEBUG] Categoria alterada para: {self.current_project_type}")
         
         # 3. Inicia uma nova busca (resetando para a página 1)
-        self.start_search_thread(offset_change=0)
+        self.start_search_thread()
 
     # --- Funções Auxiliares para a Lista Rolável ---
 
-    def _on_frame_configure(self, event=None):
-        """Atualiza a região de rolagem do canvas."""
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+    def _on_list_scrolled(self, first, last):
+        """yscrollcommand do canvas: atualiza a scrollbar e os cards visíveis."""
+        self.list_scrollbar.set(first, last)
+        self._update_visible_cards()
+
+    def _on_list_canvas_configure(self, event):
+        """Redimensionou: ajusta a largura dos cards e quantos cabem na tela."""
+        for card in self.card_pool:
+            self.canvas.itemconfigure(card["window"], width=event.width - 15)
+            card["desc"].config(wraplength=max(200, event.width - 330))
+        self._update_visible_cards()
 
     def _bind_mousewheel(self, widget):
         """Aplica o bind de rolagem do mouse (cross-platform)."""
@@ -287,41 +3402,11 @@ class ModDownloader(tk.Toplevel):
 
     def _on_details_canvas_configure(self, event, canvas, canvas_window_id):
         """
-        (MODIFICADO) Chamado quando o canvas da VIEW DE DETALHES é redimensionado.
-        Força o frame *interno* a ter a mesma largura do canvas *externo*.
-        TAMBÉM re-calcula a largura do HTMLLabel.
+        Chamado quando o canvas da VIEW DE DETALHES é redimensionado.
+        Força o frame *interno* a ter a mesma largura do canvas *externo*;
+        a descrição (tk.Text) quebra as linhas sozinha.
         """
-        # Pega a largura ATUAL do canvas (a "janela" visível)
-        canvas_width = event.width
-        
-        # 1. Atualiza a largura do 'scrollable_frame' (que está *dentro* do canvas)
-        canvas.itemconfig(canvas_window_id, width=canvas_width)
-        
-        # --- MUDANÇA AQUI ---
-        # 2. Se o HTMLLabel já foi criado, atualiza a sua largura
-        if self.details_html_label and self.details_scroll_frame:
-            try:
-                # Pega a largura do frame (que agora é a largura do canvas)
-                # O 'self.details_scroll_frame' é o 'content_frame'
-                width_pixels = self.details_scroll_frame.winfo_width()
-                
-                # Converte para caracteres
-                char_width = 8 
-                padding_pixels = 30 # (padding=15 * 2)
-                width_in_chars = max(10, (width_pixels - padding_pixels) // char_width)
-                
-                # Reconfigura o HTMLLabel com a nova largura
-                self.details_html_label.configure(width=width_in_chars)
-                
-                # Força a atualização da altura (isto é o que faltava!)
-                # O 'update_idletasks()' força o HTMLLabel a calcular sua
-                # nova altura, o que dispara o bind <Configure> do 
-                # 'scrollable_frame' (Passo 1), que atualiza a 'scrollregion'.
-                self.details_scroll_frame.update_idletasks()
-
-            except Exception as e:
-                print(f"Erro ao reconfigurar HTMLLabel: {e}")
-        # --- FIM DA MUDANÇA ---
+        canvas.itemconfig(canvas_window_id, width=event.width)
 
     # --- Funções de UI Atualizadas ---
 
@@ -332,55 +3417,37 @@ class ModDownloader(tk.Toplevel):
         except tk.TclError:
             pass # Janela foi fechada
 
-    def _load_mod_icon(self, icon_label, icon_url):
-        """(THREAD) Baixa o ícone de um mod e o exibe no label fornecido."""
-        try:
-            headers = {'User-Agent': f'RaposoLauncher/{self.launcher.LAUNCHER_VERSION}'}
-            resp = requests.get(icon_url, headers=headers)
-            resp.raise_for_status()
-            
-            img_data = BytesIO(resp.content)
-            img = Image.open(img_data).resize((64, 64), Image.Resampling.LANCZOS)
-            
-            # Guarda a referência para o Tkinter não "perder" a imagem
-            photo = ImageTk.PhotoImage(img)
-            self.mod_icons[icon_url] = photo 
-            
-            # Agenda a atualização da imagem na thread da UI
-            self.after(0, icon_label.config, {"image": photo})
-            
-        except Exception as e:
-            # Se falhar, ele fica com o ícone padrão que já foi setado
-            print(f"Erro ao carregar ícone {icon_url}: {e}")
+    def _load_mod_icon(self, icon_label, icon_url, channel="list", priority=0):
+        """Agenda o ícone de um mod no pool de imagens (se falhar, fica o ícone padrão)."""
+        self.image_loader.request(
+            channel, icon_url,
+            lambda photo: self._set_label_image(icon_label, photo),
+            size=(64, 64), priority=priority
+        )
+
+    def _load_gallery_image(self, image_label, image_url, max_width=550, priority=0):
+        """Agenda uma imagem da galeria (já redimensionada, do cache) no pool de imagens."""
+        self.image_loader.request(
+            "details", image_url,
+            lambda photo: self._set_label_image(image_label, photo, ""), # Remove o texto "Carregando"
+            max_width=max_width, priority=priority,
+            on_error=lambda e: image_label.config(text="Erro ao carregar imagem.")
+        )
 
-    def _load_gallery_image(self, image_label, image_url, max_width=550):
-        """(THREAD) Baixa uma imagem da galeria, redimensiona e exibe no label."""
+    @staticmethod
+    def _set_label_image(label, photo, text=None):
+        """
+        Mostra a imagem no label e guarda a referência NO PRÓPRIO label:
+        quando o card/detalhes é destruído, a PhotoImage é liberada junto.
+        """
         try:
-            headers = {'User-Agent': f'RaposoLauncher/{self.launcher.LAUNCHER_VERSION}'}
-            resp = requests.get(image_url, headers=headers)
-            resp.raise_for_status()
-            
-            img_data = BytesIO(resp.content)
-            img = Image.open(img_data)
-            
-            # Redimensiona mantendo o aspecto
-            if img.width > max_width:
-                w_percent = (max_width / float(img.width))
-                h_size = int((float(img.height) * float(w_percent)))
-                img = img.resize((max_width, h_size), Image.Resampling.LANCZOS)
-            
-            # Converte para o Tkinter
-            photo = ImageTk.PhotoImage(img)
-            
-            # Guarda a referência para o Tkinter não "perder" a imagem
-            self.gallery_photos.append(photo) 
-            
-            # Agenda a atualização da imagem na thread da UI
-            self.after(0, image_label.config, {"image": photo, "text": ""}) # Remove o texto "Carregando"
-            
-        except Exception as e:
-            print(f"Erro ao carregar imagem da galeria {image_url}: {e}")
-            self.after(0, image_label.config, {"text": "Erro ao carregar imagem."})
+            if text is None:
+                label.config(image=photo)
+            else:
+                label.config(image=photo, text=text)
+            label.image = photo
+        except tk.TclError:
+            pass # Label já foi destruído (ex: nova busca)
 
     def on_mod_selected(self, event, project_id, frame, title, author):
         """Chamado quando um 'card' de mod é clicado."""
@@ -404,167 +3471,537 @@ class ModDownloader(tk.Toplevel):
         
         # Habilita o botão de download
         self.download_button.config(state="normal")
+        self._restyle_cards() # O card antigo pode voltar para a cor de "na fila"
+
+    def _create_card(self):
+        """Cria UM card vazio do pool (os dados são ligados depois, em '_bind_card')."""
+        mod_frame = ttk.Frame(self.canvas, padding=10, bootstyle="secondary")
+        mod_frame.columnconfigure(1, weight=1)
+        
+        # --- Coluna 0: Ícone ---
+        icon_label = ttk.Label(mod_frame, image=self.default_mod_icon, bootstyle="secondary")
+        icon_label.grid(row=0, column=0, rowspan=4, sticky="nw", padx=(0, 10))
+        
+        # --- Coluna 1: Informações ---
+        title_label = ttk.Label(mod_frame, font=("Helvetica", 12, "bold"), bootstyle="secondary-inverse")
+        title_label.grid(row=0, column=1, sticky="w")
+        author_label = ttk.Label(mod_frame, bootstyle="secondary-inverse")
+        author_label.grid(row=1, column=1, sticky="w")
+        desc_label = ttk.Label(mod_frame, wraplength=max(200, self.canvas.winfo_width() - 330), justify="left", bootstyle="secondary-inverse")
+        desc_label.grid(row=2, column=1, sticky="nw", pady=(5, 0))
+
+        # --- Coluna 2: Estatísticas ---
+        stats_frame = ttk.Frame(mod_frame, bootstyle="secondary")
+        stats_frame.grid(row=0, column=2, rowspan=4, sticky="ne", padx=(10, 0))
+        downloads_label = ttk.Label(stats_frame, bootstyle="secondary-inverse")
+        downloads_label.pack(anchor="e")
+        followers_label = ttk.Label(stats_frame, bootstyle="secondary-inverse")
+        followers_label.pack(anchor="e")
+
+        window = self.canvas.create_window(
+            0, 0, window=mod_frame, anchor="nw", state="hidden",
+            width=max(self.canvas.winfo_width() - 15, 200), height=self.CARD_HEIGHT - self.CARD_GAP
+        )
+        card = {
+            "frame": mod_frame, "window": window, "icon": icon_label, "title": title_label,
+            "author": author_label, "desc": desc_label, "downloads": downloads_label,
+            "followers": followers_label, "index": None, "data": None,
+        }
+        
+        # --- Bind de Clique (Simples e Duplo): feito UMA vez, lê o dado atual do card ---
+        click_func = lambda e, c=card: self._on_card_clicked(e, c)
+        double_click_func = lambda e, c=card: self._on_card_double_clicked(e, c)
+        ctrl_click_func = lambda e, c=card: self._on_card_ctrl_clicked(e, c)
+        for widget in [mod_frame] + mod_frame.winfo_children() + stats_frame.winfo_children():
+            widget.bind("<Button-1>", click_func)
+            widget.bind("<Double-Button-1>", double_click_func)
+            widget.bind("<Control-Button-1>", ctrl_click_func)
+        return card
+
+    def _bind_card(self, card, index):
+        """Liga o card do pool ao resultado 'index' (troca só textos e imagem)."""
+        mod_data = self.results[index] # ModrinthSearchHit
+        card["index"], card["data"] = index, mod_data
+        project_id = mod_data.project_id
+
+        description = mod_data.description or "Sem descrição."
+        if len(description) > 180:
+            description = description[:177].rstrip() + "..."
+        card["title"].config(text=mod_data.title)
+        card["author"].config(text=f"by {mod_data.author}")
+        card["desc"].config(text=description)
+        card["downloads"].config(text=f"📥 {mod_data.downloads:,} Downloads")
+        card["followers"].config(text=f"⭐ {mod_data.follows:,} Seguidores")
+
+        card["frame"].config(bootstyle=self._card_style(project_id))
+        if project_id and project_id == self.selected_project_id:
+            self.selected_frame = card["frame"]
+
+        icon_url = mod_data.icon_url
+        photo = self.icon_photos.pop(icon_url, None) if icon_url else None
+        if photo:
+            self.icon_photos[icon_url] = photo # Volta para o fim do LRU
+            card["icon"].config(image=photo)
+            return
+        card["icon"].config(image=self.default_mod_icon)
+        if icon_url:
+            def _on_icon(photo, card=card, mod_data=mod_data, icon_url=icon_url):
+                self.icon_photos[icon_url] = photo
+                while len(self.icon_photos) > self.ICON_MEMORY:
+                    self.icon_photos.pop(next(iter(self.icon_photos)))
+                if card["data"] is mod_data: # O card ainda mostra este mod?
+                    card["icon"].config(image=photo)
+            self.image_loader.request("list", icon_url, _on_icon, size=(64, 64), priority=index)
+
+    def _update_visible_cards(self):
+        """
+        Posiciona o pool de cards sobre os resultados visíveis. O resultado
+        'i' sempre usa o card 'i % tamanho_do_pool', então rolar uma linha
+        só religa o card que saiu da tela.
+        """
+        if self.updating_cards or not self.canvas.winfo_exists():
+            return
+        self.updating_cards = True # Mexer nos itens do canvas pode disparar yscrollcommand
+        try:
+            self._place_cards()
+        finally:
+            self.updating_cards = False
+
+    def _place_cards(self):
+        view_height = max(self.canvas.winfo_height(), self.CARD_HEIGHT)
+        first = max(0, int(self.canvas.canvasy(0) // self.CARD_HEIGHT))
+        needed = view_height // self.CARD_HEIGHT + 2
+        while len(self.card_pool) < needed:
+            self.card_pool.append(self._create_card())
+
+        pool_size = len(self.card_pool)
+        for index in range(first, first + pool_size):
+            card = self.card_pool[index % pool_size]
+            if index < len(self.results):
+                if card["index"] != index or card["data"] is not self.results[index]:
+                    self._bind_card(card, index)
+                self.canvas.coords(card["window"], 0, index * self.CARD_HEIGHT)
+                self.canvas.itemconfigure(card["window"], state="normal")
+            else:
+                card["index"], card["data"] = None, None
+                self.canvas.itemconfigure(card["window"], state="hidden")
+
+        # Rolagem infinita
+        if self.has_more and not self.loading_more and first + needed >= len(self.results) - self.LOAD_MORE_THRESHOLD:
+            self._load_more_results()
+
+    def _refresh_list(self):
+        """Atualiza a altura rolável (N resultados x altura do card) e os cards visíveis."""
+        self.canvas.configure(scrollregion=(0, 0, 1, len(self.results) * self.CARD_HEIGHT))
+        self._update_visible_cards()
+
+    def _on_card_clicked(self, event, card):
+        mod_data = card["data"]
+        if not mod_data or not mod_data.project_id:
+            return
+        self.on_mod_selected(event, mod_data.project_id, card["frame"], mod_data.title, mod_data.author)
+
+    def _on_card_ctrl_clicked(self, event, card):
+        mod_data = card["data"]
+        if not mod_data or not mod_data.project_id:
+            return
+        self.toggle_queued(mod_data)
+
+    def _card_style(self, project_id):
+        if project_id and project_id == self.selected_project_id:
+            return "primary"
+        if project_id in self.download_queue:
+            return "success" # Na fila
+        return "secondary"
+
+    def _restyle_cards(self):
+        """Atualiza a cor dos cards visíveis (seleção/fila) sem religá-los."""
+        for card in self.card_pool:
+            if card["data"] is not None:
+                card["frame"].config(bootstyle=self._card_style(card["data"].project_id))
+
+    # --- Fila de downloads ---
+
+    def toggle_queued(self, hit):
+        """Ctrl+clique: põe/tira o projeto da fila de downloads."""
+        if self.queue_running:
+            return self.set_status("Aguarde a fila atual terminar.", WARNING)
+        if self.current_project_type == "modpack":
+            return self.set_status("Modpacks são instalados um por vez (botão 'Baixar Selecionado').", WARNING)
+        if hit.project_id in self.download_queue:
+            del self.download_queue[hit.project_id]
+            self.set_status(f"{hit.title} removido da fila ({len(self.download_queue)} na fila).", INFO)
+        else:
+            self.download_queue[hit.project_id] = (hit, self.current_project_type)
+            self.set_status(f"{hit.title} adicionado à fila ({len(self.download_queue)} na fila).", INFO)
+        self._update_queue_button()
+        self._restyle_cards()
+
+    def clear_download_queue(self):
+        if self.queue_running:
+            return
+        self.download_queue.clear()
+        self._update_queue_button()
+        self._restyle_cards()
+
+    def _update_queue_button(self):
+        count = len(self.download_queue)
+        if self.queue_running:
+            return
+        self.queue_button.config(
+            text=f"📥 Baixar fila ({count})" if count else "📥 Fila (Ctrl+clique)",
+            state="normal" if count else "disabled"
+        )
+        self.clear_queue_button.config(state="normal" if count else "disabled")
+
+    def start_queue_download(self):
+        """Resolve e baixa a fila inteira de uma vez."""
+        if self.queue_running or not self.download_queue:
+            return
+        self.queue_running = True
+        items = list(self.download_queue.values())
+        self.queue_button.config(state="disabled", text=f"📥 Baixando fila ({len(items)})...")
+        self.clear_queue_button.config(state="disabled")
+        self.queue_progress.config(value=0, maximum=1)
+        self.queue_progress.pack(side="right", padx=(0, 10), before=self.clear_queue_button)
+        threading.Thread(
+            target=self._queue_download_thread, args=(items, self.include_optional_deps.get()), daemon=True
+        ).start()
+
+    def _queue_download_thread(self, items, include_optional):
+        """
+        (THREAD) 1. Resolve a fila num passe em lote por tipo de projeto
+        (raízes em paralelo + dependências de todos juntas, sem repetir o que
+        já está instalado). 2. Baixa tudo em paralelo com uma barra só.
+        3. Mostra o relatório por item.
+        """
+        report = [] # (project_id, arquivo, resultado, estilo)
+        titles = {hit.project_id: hit.title for hit, _ in items}
+        pulled_by = {} # dependência -> raízes da fila que dependem dela
+        try:
+            status = lambda text: self.after(0, self.set_status, text, INFO)
+            installed = self._installed_project_ids()
+            by_type = {}
+            for hit, project_type in items:
+                by_type.setdefault(project_type, []).append(hit.project_id)
+
+            jobs = []
+            for project_type, project_ids in by_type.items():
+                resolver = self._resolver_for(project_type, installed)
+                versions, missing, skipped, type_pulled_by = resolver.resolve_projects(
+                    project_ids, include_optional=include_optional,
+                    follow_dependencies=project_type == "mod", progress_cb=status
+                )
+                for dep_id, roots in type_pulled_by.items():
+                    pulled_by.setdefault(dep_id, set()).update(roots)
+                target_dir = self._target_dir_for(project_type)
+                jobs.extend((version, target_dir) for version in versions)
+                installed.update(v.project_id for v in versions) # Dependência comum não baixa duas vezes
+                report.extend((p, "-", "Já instalado", SECONDARY) for p in skipped)
+                report.extend((p, "-", "Sem versão compatível", WARNING) for p in missing)
+
+            # Nomes das dependências (e de quem faltou) numa requisição só
+            unknown = [v.project_id for v, _ in jobs if v.project_id not in titles] + [r[0] for r in report if r[0] not in titles]
+            if unknown:
+                try:
+                    titles.update({pid: p.title for pid, p in self.launcher.modrinth.get_projects(unknown).items()})
+                except Exception as e:
+                    print(f"[QUEUE] Não foi possível buscar os nomes das dependências: {e}")
 
-    def _create_mod_widget(self, mod_data):
-        """Cria o 'card' de mod individual e o adiciona na lista."""
-        
-        project_id = mod_data.get("project_id")
-        if not project_id:
-            return
+            def _progress(done, total):
+                self.after(0, self.queue_progress.config, {"value": done, "maximum": max(total, 1)})
+                self.after(0, self.set_status, f"Baixando fila: {done} de {total} arquivos...", INFO)
 
-        # --- O 'Card' Principal ---
-        mod_frame = ttk.Frame(self.list_frame, padding=10, bootstyle="secondary")
-        mod_frame.pack(fill="x", pady=(5, 0), padx=(5, 10))
-        
-        mod_frame.columnconfigure(1, weight=1)
-        
-        # --- Coluna 0: Ícone ---
-        icon_label = ttk.Label(mod_frame, image=self.default_mod_icon, bootstyle="secondary")
-        icon_label.grid(row=0, column=0, rowspan=4, sticky="nw", padx=(0, 10))
-        
-        icon_url = mod_data.get("icon_url")
-        if icon_url:
-            threading.Thread(target=self._load_mod_icon, args=(icon_label, icon_url), daemon=True).start()
-            
-        # --- Coluna 1: Informações ---
-        title = mod_data.get("title", "Mod Desconhecido")
-        author = mod_data.get("author", "Autor Desconhecido")
-        description = mod_data.get("description", "Sem descrição.")
+            status(f"Baixando {len(jobs)} arquivos...")
+            for version, filename, error in self._download_batch(jobs, progress_cb=_progress):
+                if error:
+                    report.append((version.project_id, filename or "-", f"Erro: {error}", DANGER))
+                else:
+                    report.append((version.project_id, filename, "Baixado", SUCCESS))
+        except Exception as e:
+            print(f"[QUEUE] Erro na fila de downloads: {e}")
+            report.append((None, "-", f"Erro: {e}", DANGER))
+
+        def _name(project_id):
+            if project_id is None:
+                return "Fila"
+            name = titles.get(project_id, project_id)
+            return name if any(hit.project_id == project_id for hit, _ in items) else f"{name} (dependência)"
+        report = [(pid, _name(pid), filename, result, style) for pid, filename, result, style in report]
+        self.after(0, self._finish_queue_download, report, pulled_by)
+
+    def _finish_queue_download(self, report, pulled_by=None):
+        """
+        report: [(project_id, nome, arquivo, resultado, estilo)].
+        pulled_by: {dependência: {raízes}}; se uma dependência falhar, as
+        raízes que precisam dela ficam na fila.
+        """
+        self.queue_running = False
+        self.queue_progress.pack_forget()
+        ok = sum(1 for r in report if r[4] == SUCCESS)
+        failed = [r for r in report if r[4] in (DANGER, WARNING)]
+        if any(r[0] is None for r in failed):
+            pass # A fila inteira falhou: continua toda na fila
+        else:
+            # Sai da fila quem deu certo; quem falhou (ou tem dependência que
+            # falhou) fica para tentar de novo
+            failed_ids = {r[0] for r in failed}
+            for project_id in list(failed_ids):
+                failed_ids.update((pulled_by or {}).get(project_id, ()))
+            self.download_queue = {pid: item for pid, item in self.download_queue.items() if pid in failed_ids}
+        self._update_queue_button()
+        self._restyle_cards()
+        style = WARNING if failed else SUCCESS
+        self.set_status(f"Fila concluída: {ok} arquivos baixados, {len(failed)} com problema.", style)
+        self._show_queue_report(report)
+
+    def _show_queue_report(self, report):
+        """Janela com o resultado de cada item da fila."""
+        dialog = tk.Toplevel(self)
+        dialog.title("Resultado da fila")
+        dialog.geometry("680x380")
+        self.launcher._set_dialog_icon(dialog)
 
-        title_label = ttk.Label(mod_frame, text=title, font=("Helvetica", 12, "bold"), bootstyle="secondary-inverse")
-        title_label.grid(row=0, column=1, sticky="w")
-        
-        author_label = ttk.Label(mod_frame, text=f"by {author}", bootstyle="secondary-inverse")
-        author_label.grid(row=1, column=1, sticky="w")
-        
-        desc_label = ttk.Label(mod_frame, text=description, wraplength=450, justify="left", bootstyle="secondary-inverse")
-        desc_label.grid(row=2, column=1, sticky="w", pady=(5, 0))
+        frame = ttk.Frame(dialog, padding=15)
+        frame.pack(fill="both", expand=True)
+        report_tv = ttk.Treeview(frame, columns=("projeto", "arquivo", "resultado"), show="headings")
+        report_tv.heading("projeto", text="Projeto")
+        report_tv.heading("arquivo", text="Arquivo")
+        report_tv.heading("resultado", text="Resultado")
+        report_tv.column("projeto", width=200)
+        report_tv.column("arquivo", width=230)
+        report_tv.column("resultado", width=200)
+        for style in (SUCCESS, WARNING, DANGER, SECONDARY):
+            report_tv.tag_configure(style, foreground=self.launcher.style.colors.get(style))
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=report_tv.yview)
+        report_tv.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        report_tv.pack(side="left", fill="both", expand=True)
+        # Problemas primeiro
+        order = {DANGER: 0, WARNING: 1, SUCCESS: 2, SECONDARY: 3}
+        for _, name, filename, result, style in sorted(report, key=lambda r: (order.get(r[4], 4), r[1].lower())):
+            report_tv.insert("", "end", values=(name, filename, result), tags=(style,))
+
+    def _on_card_double_clicked(self, event, card):
+        mod_data = card["data"]
+        if not mod_data or not mod_data.project_id:
+            return
+        self.on_mod_double_clicked(event, mod_data.project_id, mod_data.title, mod_data.author)
 
-        # --- Coluna 2: Estatísticas ---
-        stats_frame = ttk.Frame(mod_frame, bootstyle="secondary")
-        stats_frame.grid(row=0, column=2, rowspan=4, sticky="ne", padx=(10, 0))
-        
-        downloads = mod_data.get("downloads", 0)
-        followers = mod_data.get("follows", 0)
-        
-        ttk.Label(stats_frame, text=f"📥 {downloads:,} Downloads", bootstyle="secondary-inverse").pack(anchor="e")
-        ttk.Label(stats_frame, text=f"⭐ {followers:,} Seguidores", bootstyle="secondary-inverse").pack(anchor="e")
-        
-        # --- Bind de Clique (Simples e Duplo) ---
-        
-        # --- MUDANÇA AQUI (CORREÇÃO DO BUG) ---
-        # O clique simples (seleciona) agora TAMBÉM passa o 'title' e 'author'
-        click_func = lambda e, p=project_id, f=mod_frame, t=title, a=author: self.on_mod_selected(e, p, f, t, a)
-        # --- FIM DA MUDANÇA ---
-        
-        # Clique Duplo (abre detalhes)
-        double_click_func = lambda e, p=project_id, t=title, a=author: self.on_mod_double_clicked(e, p, t, a)
-        
-        mod_frame.bind("<Button-1>", click_func)
-        mod_frame.bind("<Double-Button-1>", double_click_func)
-        
-        # Binda em todos os widgets filhos também
-        for widget in mod_frame.winfo_children() + stats_frame.winfo_children():
-            widget.bind("<Button-1>", click_func)
-            widget.bind("<Double-Button-1>", double_click_func)
+    def _on_search_typed(self, event=None):
+        """Reagenda a busca a cada tecla (debounce); só busca quando o usuário para de digitar."""
+        if event is not None and event.keysym in ("Return", "KP_Enter", "Left", "Right", "Up", "Down", "Home", "End", "Tab"):
+            return
+        if self.search_debounce_job:
+            self.after_cancel(self.search_debounce_job)
+        self.search_debounce_job = self.after(self.SEARCH_DEBOUNCE_MS, self._run_typeahead_search)
 
-    def start_search_thread(self, event=None, offset_change=0):
-        """Inicia o thread de busca, com suporte a offset."""
+    def _run_typeahead_search(self):
+        self.search_debounce_job = None
+        query = self.search_entry.get().strip()
+        if query == self.last_search_query:
+            return # Só mexeu no cursor / mesma busca
+        if 0 < len(query) < self.SEARCH_MIN_CHARS:
+            return
+        self.start_search_thread()
+
+    def start_search_thread(self, event=None):
+        """Inicia uma nova busca (a lista volta para o topo)."""
         query = self.search_entry.get().strip()
         
-        # --- LÓGICA DE OFFSET ---
-        if offset_change == 0:
-            # Se é uma nova busca (offset_change=0), reseta o offset
-            self.current_offset = 0
-        else:
-            # Se é mudança de página, calcula o novo offset
-            self.current_offset += offset_change
-        
-        # Garante que o offset não seja negativo
-        if self.current_offset < 0:
-            self.current_offset = 0
-        # --- FIM DA LÓGICA ---
+        # Nova busca: cancela a anterior (debounce pendente e HTTP em andamento)
+        if self.search_debounce_job:
+            self.after_cancel(self.search_debounce_job)
+            self.search_debounce_job = None
+        if self.search_cancel:
+            self.search_cancel.set()
+        self.search_cancel = threading.Event()
+        self.search_generation += 1
+        self.last_search_query = query
             
-        self.set_status(f"Buscando (Página {self.current_offset // self.hits_per_page + 1})...", INFO)
+        self.set_status("Buscando...", INFO)
         
-        # Desabilita TODOS os botões de navegação
         self.search_button.config(state="disabled")
         self.download_button.config(state="disabled") 
-        self.next_page_button.config(state="disabled")
-        self.prev_page_button.config(state="disabled")
         
         # Limpa o estado da seleção
         self.selected_project_id = None
         self.selected_frame = None
         
-        # Limpa a lista de mods (destrói os frames antigos)
-        for child in self.list_frame.winfo_children():
-            child.destroy()
-        
-        # Reposiciona o scroll para o topo
+        # Cancela os ícones pendentes (e o pré-carregamento) da busca anterior
+        self.image_loader.new_generation("list")
+        self.image_loader.new_generation("prefetch")
+        
+        # Esvazia a lista (os cards do pool só são escondidos, não destruídos)
+        self.results = []
+        self.result_ids = set()
+        self.remote_offset = 0
+        self.local_only = []
+        self.total_hits = 0
+        self.has_more = False
+        self.loading_more = True
+        self.search_query = query
+        self._refresh_list()
         self.canvas.yview_moveto(0)
         
-        threading.Thread(target=self._search_thread, args=(query, self.current_offset), daemon=True).start()
+        threading.Thread(
+            target=self._search_thread,
+            args=(query, 0, self.search_generation, self.search_cancel),
+            daemon=True
+        ).start()
 
-    def _search_thread(self, query, offset):
-        """(THREAD) Busca na API do Modrinth, com suporte a offset E categoria."""
+    def _load_more_results(self):
+        """Rolagem infinita: busca a próxima página e anexa no fim da lista."""
+        if self.loading_more or not self.has_more:
+            return
+        self.loading_more = True
+        self.set_status(f"Carregando mais... ({len(self.results)} de {self.total_hits:,})", INFO)
+        threading.Thread(
+            target=self._search_thread,
+            args=(self.search_query, self.remote_offset, self.search_generation, self.search_cancel),
+            daemon=True
+        ).start()
+
+    def _search_filters(self):
+        """(versão do jogo, loaders) usados na busca; None quando o tipo não filtra por eles."""
+        # --- MUDANÇA AQUI ---
+        # 1. Versão do jogo APENAS se NÃO for shader E NÃO for modpack
+        game_version = None
+        if self.current_project_type != "shader" and self.current_project_type != "modpack":
+        # --- FIM DA MUDANÇA ---
+            game_version = self.game_version
+
+        # 2. Loader APENAS se for um mod
+        loaders = None
+        if self.current_project_type == "mod":
+            loaders = [self.loader]
+            if self.loader == "forge":
+                loaders.append("neoforge")
+        return game_version, loaders
+
+    def _build_search_params(self, query, offset):
+        """Monta os parâmetros do /v2/search (facets de categoria, versão e loader)."""
+        # --- Lógica de Facets (CORRIGIDA) ---
+        
+        facets_list = [
+            [f"project_type:{self.current_project_type}"]
+        ]
+        
+        game_version, loaders = self._search_filters()
+        if game_version:
+            facets_list.append([f"versions:{game_version}"])
+        if loaders:
+            facets_list.append(["categories:" + l for l in loaders])
+        
+        if query:
+            return {"query": query, "facets": facets_list, "offset": offset, "limit": self.hits_per_page}
+        return {"index": "downloads", "facets": facets_list, "offset": offset, "limit": self.hits_per_page}
+
+    def _get_search_page(self, params, cancel_event=None):
+        """
+        (THREAD) Uma página de busca: memória (TTL curto) -> rede.
+        A chave é o próprio conjunto de parâmetros (busca, facets, offset, index).
+        A memória é compartilhada pela busca, pelo pré-carregamento e pelo
+        diálogo, então todo acesso passa pelo search_memory_lock.
+        """
+        key = json.dumps(params, sort_keys=True)
+        memory = self.launcher.search_memory
+        with self.launcher.search_memory_lock:
+            hit = memory.get(key)
+        if hit and time.time() - hit[0] < self.SEARCH_TTL:
+            return hit[1]
+
+        data = self.launcher.modrinth.search(**params, cancel_event=cancel_event)
+        with self.launcher.search_memory_lock:
+            memory.pop(key, None)
+            memory[key] = (time.time(), data)
+            while len(memory) > self.SEARCH_MEMORY_PAGES:
+                memory.pop(next(iter(memory)), None) # Descarta a página mais antiga
+        return data
+
+    def _prefetch_search_page(self, query, offset):
+        """(THREAD) Pré-carrega a próxima página (e os ícones dela) em segundo plano."""
         try:
-            # --- Lógica de Facets (CORRIGIDA) ---
-            
-            facets_list = [
-                [f"project_type:{self.current_project_type}"]
-            ]
-            
-            # --- MUDANÇA AQUI ---
-            # 1. Adiciona a versão do jogo APENAS se NÃO for shader E NÃO for modpack
-            if self.current_project_type != "shader" and self.current_project_type != "modpack":
-            # --- FIM DA MUDANÇA ---
-                facets_list.append([f"versions:{self.game_version}"])
+            hits = self._get_search_page(self._build_search_params(query, offset)).hits
+        except Exception as e:
+            print(f"[DEBUG] Falha ao pré-carregar a página {offset // self.hits_per_page + 1}: {e}")
+            return
+        for i, hit in enumerate(hits):
+            if hit.icon_url:
+                self.image_loader.prefetch("prefetch", hit.icon_url, size=(64, 64), priority=1000 + i)
 
-            # 2. Adiciona o loader APENAS se for um mod
-            if self.current_project_type == "mod":
-                loaders = [self.loader]
-                if self.loader == "forge":
-                    loaders.append("neoforge")
-                facets_list.append(["categories:" + l for l in loaders])
-            
-            facets = json.dumps(facets_list)
-            
-            if query:
-                params = {"query": query, "facets": facets, "offset": offset, "limit": self.hits_per_page}
-            else:
-                params = {"sort": "downloads", "facets": facets, "offset": offset, "limit": self.hits_per_page}
-            
-            headers = {'User-Agent': f'RaposoLauncher/{self.launcher.LAUNCHER_VERSION}'}
-            
-            resp = requests.get("https://api.modrinth.com/v2/search", params=params, headers=headers)
-            resp.raise_for_status()
-            
-            data = resp.json()
-            hits = data.get("hits", []) 
-            
-            def _populate_mod_list():
-                if not hits:
-                    self.set_status("Nenhum item encontrado nesta página.", WARNING)
-                    if self.current_offset > 0:
-                        self.prev_page_button.config(state="normal")
-                    return
-                
-                for mod_data in hits:
-                    self._create_mod_widget(mod_data)
-                
-                self.set_status(f"Mostrando {len(hits)} itens (Página {self.current_offset // self.hits_per_page + 1}).", SUCCESS)
+    def _show_local_results(self, generation, hits):
+        """Mostra os resultados do índice local enquanto a busca remota não chega."""
+        if generation != self.search_generation or self.results or not hits:
+            return
+        self.results = list(hits)
+        self.total_hits = len(hits)
+        self.set_status(f"{len(hits)} resultados locais. Buscando no Modrinth...", INFO)
+        self._refresh_list()
 
-                if len(hits) == self.hits_per_page:
-                    self.next_page_button.config(state="normal")
+    def _search_thread(self, query, offset, generation, cancel_event):
+        """(THREAD) Busca na API do Modrinth, com suporte a offset E categoria."""
+        try:
+            if offset == 0:
+                # 1. Índice local: aparece na hora (e funciona offline)
+                game_version, loaders = self._search_filters()
+                local_hits = self.launcher.project_index.search(
+                    query, self.current_project_type, game_version, loaders, limit=self.hits_per_page
+                )
+                self.after(0, self._show_local_results, generation, local_hits)
+
+            # 2. Modrinth
+            data = self._get_search_page(self._build_search_params(query, offset), cancel_event)
+            hits = data.hits
+            
+            def _append_results():
+                if generation != self.search_generation:
+                    return # Chegou depois de uma busca mais nova: descarta
+                self.loading_more = False
+                if offset == 0:
+                    # A ordem do Modrinth manda; os locais que ele não trouxe vão para o fim
+                    self.local_only = self.results
+                    self.results, self.result_ids = [], set()
+                self.remote_offset = offset + len(hits)
+                self.total_hits = data.total_hits or self.remote_offset
+                for hit in hits:
+                    if hit.project_id not in self.result_ids:
+                        self.result_ids.add(hit.project_id)
+                        self.results.append(hit)
+                self.has_more = len(hits) == self.hits_per_page and self.remote_offset < self.total_hits
+                if not self.has_more and self.local_only:
+                    extra = [h for h in self.local_only if h.project_id not in self.result_ids]
+                    self.result_ids.update(h.project_id for h in extra)
+                    self.results.extend(extra)
+                    self.local_only = []
                 
-                if self.current_offset > 0:
-                    self.prev_page_button.config(state="normal")
+                if not self.results:
+                    self.set_status("Nenhum item encontrado.", WARNING)
+                else:
+                    self.set_status(f"Mostrando {len(self.results)} de {self.total_hits:,} itens.", SUCCESS)
+                self._refresh_list()
 
-            self.after(0, _populate_mod_list) 
+                if self.has_more:
+                    # A próxima página já vai estar pronta quando o usuário rolar até ela
+                    threading.Thread(
+                        target=self._prefetch_search_page,
+                        args=(query, offset + self.hits_per_page), daemon=True
+                    ).start()
+
+            self.after(0, _append_results) 
             
+        except RequestCancelled:
+            pass # Substituída por uma busca mais nova
         except Exception as e:
-            self.after(0, self.set_status, f"Erro na busca: {e}", DANGER)
+            def _show_error(msg=f"Erro na busca: {e}"):
+                if generation == self.search_generation:
+                    self.loading_more = False # Rolar de novo tenta outra vez
+                    if offset == 0 and self.results:
+                        # Sem rede: os resultados locais continuam na tela
+                        self.set_status(f"Sem conexão com o Modrinth: mostrando {len(self.results)} resultados locais.", WARNING)
+                    else:
+                        self.set_status(msg, DANGER)
+            self.after(0, _show_error)
         finally:
             self.after(0, self.search_button.config, {"state": "normal"})
 
@@ -609,40 +4046,29 @@ class ModDownloader(tk.Toplevel):
         self.set_status(f"Buscando versão para {project_id}...", INFO)
         self.download_button.config(state="disabled")
         
-        threading.Thread(target=self._download_thread, args=(project_id,), daemon=True).start()
+        # Variáveis Tk só são lidas na thread da UI
+        threading.Thread(target=self._download_thread, args=(project_id, self.include_optional_deps.get()), daemon=True).start()
 
-    def _download_thread(self, project_id):
+    def _download_thread(self, project_id, include_optional):
         """(THREAD) Busca a versão correta e baixa para a pasta certa."""
         try:
             # 1. Busca as versões do projeto
-            headers = {'User-Agent': f'RaposoLauncher/{self.launcher.LAUNCHER_VERSION}'}
-            
-            params = {}
+            client = self.launcher.modrinth
             
             # --- CORREÇÃO AQUI ---
             # Adiciona a versão do jogo APENAS se NÃO for shader
-            if self.current_project_type != "shader": # Usando a sua correção
+            game_versions = [self.game_version] if self.current_project_type != "shader" else None
             # --- FIM DA CORREÇÃO ---
-                params["game_versions"] = json.dumps([self.game_version])
             
             # Adiciona o loader SÓ SE for um mod
-            if self.current_project_type == "mod":
-                 params["loaders"] = json.dumps([self.loader])
-                 
-            url = f"https://api.modrinth.com/v2/project/{project_id}/version"
+            loaders = [self.loader] if self.current_project_type == "mod" else None
             
-            resp = requests.get(url, params=params, headers=headers)
-            resp.raise_for_status()
-            
-            versions = resp.json()
+            versions = client.project_versions(project_id, game_versions, loaders)
             
             # Fallback (Apenas para mods)
             if not versions and self.current_project_type == "mod" and (self.loader == "neoforge" or self.loader == "forge"):
                 print("Fallback: Tentando buscar por 'forge'...")
-                params["loaders"] = json.dumps(["forge"])
-                resp = requests.get(url, params=params, headers=headers)
-                resp.raise_for_status()
-                versions = resp.json()
+                versions = client.project_versions(project_id, game_versions, ["forge"])
 
             if not versions:
                 raise Exception(f"Nenhuma versão compatível foi encontrada.")
@@ -651,12 +4077,10 @@ class ModDownloader(tk.Toplevel):
             latest_version = versions[0]
             
             # 3. Pega o arquivo principal
-            file_to_download = latest_version.get("files", [{}])[0]
-            file_url = file_to_download.get("url")
-            file_name = file_to_download.get("filename")
-            
-            if not file_url or not file_name:
+            file_to_download = latest_version.primary_file
+            if not file_to_download or not file_to_download.url or not file_to_download.filename:
                 raise Exception("API retornou uma versão sem arquivo.")
+            file_name = file_to_download.filename
             
             # --- CORREÇÃO AQUI ---
             target_dir = self.mods_dir 
@@ -670,24 +4094,213 @@ class ModDownloader(tk.Toplevel):
             else:
                 print(f"[DEBUG] Salvando Mod em: {target_dir}")
 
-            # 4. Baixa o arquivo
-            self.after(0, self.set_status, f"Baixando {file_name}...")
-            
-            file_path = os.path.join(target_dir, file_name)
-            self.launcher.download_file(file_url, file_path, file_name) 
-            
-            self.after(0, self.set_status, f"✅ {file_name} baixado!", SUCCESS)
+            # 4. Mods: resolve as dependências (sem repetir o que já está instalado)
+            to_download = [latest_version]
+            missing = []
+            if self.current_project_type == "mod" and latest_version.dependencies:
+                to_download, missing = self._resolve_dependencies(latest_version, include_optional)
+
+            # 5. Baixa tudo em paralelo (com verificação de hash)
+            self.after(0, self.set_status, f"Baixando {file_name}" + (f" + {len(to_download) - 1} dependências..." if len(to_download) > 1 else "..."))
+            failed = self._download_versions(to_download, target_dir)
+            
+            if failed:
+                self.after(0, self.set_status, f"⚠ {file_name} baixado, mas {len(failed)} arquivos falharam: {', '.join(failed)}", WARNING)
+            elif missing:
+                self.after(0, self.set_status, f"⚠ {file_name} baixado, mas {len(missing)} dependências não têm versão para {self.game_version}.", WARNING)
+            elif len(to_download) > 1:
+                self.after(0, self.set_status, f"✅ {file_name} e {len(to_download) - 1} dependências baixados!", SUCCESS)
+            else:
+                self.after(0, self.set_status, f"✅ {file_name} baixado!", SUCCESS)
 
         except Exception as e:
             self.after(0, self.set_status, f"Erro ao baixar: {e}", DANGER)
         finally:
             self.after(0, self.download_button.config, {"state": "normal"})
 
+    def _installed_project_ids(self):
+        """(THREAD) project_ids do Modrinth já instalados nesta instância (pelos hashes)."""
+        try:
+            checker = ModUpdateChecker(self.launcher.modrinth, os.path.join(MODPACKS_DIR, self.modpack_name), self.game_version, self.loader)
+            return {v.project_id for v in checker.identify()[1].values()}
+        except Exception as e:
+            print(f"[DEPS] Não foi possível identificar os mods instalados: {e}")
+            return set()
+
+    def _resolver_for(self, project_type, installed=()):
+        """DependencyResolver com os mesmos filtros do download de cada tipo."""
+        if project_type == "mod":
+            return DependencyResolver(
+                self.launcher.modrinth, self.game_version, [self.loader],
+                fallback_loaders=["forge"] if self.loader in ("forge", "neoforge") else None,
+                installed_project_ids=installed
+            )
+        game_version = None if project_type == "shader" else self.game_version
+        return DependencyResolver(self.launcher.modrinth, game_version, None, installed_project_ids=installed)
+
+    def _target_dir_for(self, project_type):
+        if project_type == "resourcepack":
+            return self.resourcepacks_dir
+        if project_type == "shader":
+            return self.shaderpacks_dir
+        return self.mods_dir
+
+    def _resolve_dependencies(self, root_version, include_optional):
+        """(THREAD) Retorna (versões a baixar, dependências sem versão compatível)."""
+        resolver = self._resolver_for("mod", self._installed_project_ids())
+        versions, missing = resolver.resolve(
+            root_version, include_optional=include_optional,
+            progress_cb=lambda text: self.after(0, self.set_status, text)
+        )
+        if missing:
+            print(f"[DEPS] Dependências sem versão compatível: {missing}")
+        return versions, missing
+
+    def _download_versions(self, versions, target_dir):
+        """(THREAD) Baixa o arquivo principal de cada versão em paralelo. Retorna os nomes que falharam."""
+        results = [r for r in self._download_batch([(v, target_dir) for v in versions]) if r[1]]
+        failed = [filename for _, filename, error in results if error]
+        if failed and len(failed) == len(results):
+            raise Exception(f"Falha ao baixar {', '.join(failed)}")
+        return failed
+
+    def _download_batch(self, jobs, progress_cb=None, max_workers=6):
+        """
+        (THREAD) Baixa o arquivo principal de cada (versão, pasta) em paralelo.
+        Retorna [(versão, nome_do_arquivo, erro_ou_None)], na ordem de 'jobs';
+        'progress_cb(feitos, total)' é chamado a cada arquivo terminado.
+        """
+        results = [None] * len(jobs)
+        futures = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for i, (version, target_dir) in enumerate(jobs):
+                primary = version.primary_file
+                if not primary or not primary.url:
+                    results[i] = (version, None, Exception("Versão sem arquivo para baixar."))
+                    continue
+                future = executor.submit(
+                    self.launcher.download_to_instance, primary.url,
+                    os.path.join(target_dir, primary.filename), primary.filename,
+                    sha1=primary.hashes.get("sha1"), sha512=primary.hashes.get("sha512"), size=primary.size
+                )
+                futures[future] = (i, version, primary.filename)
+            done = len(jobs) - len(futures)
+            for future in concurrent.futures.as_completed(futures):
+                i, version, filename = futures[future]
+                try:
+                    future.result()
+                    results[i] = (version, filename, None)
+                except Exception as e:
+                    print(f"[DOWNLOAD] Falha ao baixar {filename}: {e}")
+                    results[i] = (version, filename, e)
+                done += 1
+                if progress_cb:
+                    progress_cb(done, len(jobs))
+        return results
+
+    def open_update_checker(self):
+        """Abre a janela que verifica (e aplica) atualizações de tudo que está instalado."""
+        dialog = tk.Toplevel(self)
+        dialog.title(f"Atualizações ({self.modpack_name})")
+        dialog.geometry("640x420")
+        dialog.grab_set()
+        self.launcher._set_dialog_icon(dialog)
+
+        frame = ttk.Frame(dialog, padding=15)
+        frame.pack(fill="both", expand=True)
+
+        status_label = ttk.Label(frame, text="Calculando hashes dos arquivos...")
+        status_label.pack(anchor="w", pady=(0, 10))
+
+        tv_frame = ttk.Frame(frame)
+        tv_frame.pack(fill="both", expand=True)
+        updates_tv = ttk.Treeview(tv_frame, columns=("nome", "atual", "nova"), show="headings")
+        updates_tv.heading("nome", text="Projeto")
+        updates_tv.heading("atual", text="Instalada")
+        updates_tv.heading("nova", text="Nova")
+        updates_tv.column("nome", width=260)
+        updates_tv.column("atual", width=150)
+        updates_tv.column("nova", width=150)
+        scrollbar = ttk.Scrollbar(tv_frame, orient="vertical", command=updates_tv.yview)
+        updates_tv.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        updates_tv.pack(side="left", fill="both", expand=True)
+
+        progress = ttk.Progressbar(frame, mode="indeterminate", bootstyle="success-striped")
+        progress.pack(fill="x", pady=(10, 0))
+        progress.start(10)
+
+        update_all_button = ttk.Button(frame, text="⬆ Atualizar todos", bootstyle="success-outline", state="disabled")
+        update_all_button.pack(fill="x", pady=(10, 0))
+
+        checker = ModUpdateChecker(
+            self.launcher.modrinth, os.path.join(MODPACKS_DIR, self.modpack_name), self.game_version, self.loader
+        )
+        state = {"updates": []}
+
+        def set_status(text, style=INFO):
+            if dialog.winfo_exists():
+                status_label.config(text=text, bootstyle=style)
+
+        def show_updates(updates):
+            if not dialog.winfo_exists():
+                return
+            progress.stop()
+            state["updates"] = updates
+            for update in updates:
+                updates_tv.insert("", "end", values=(update["title"], update["current"], update["latest"]))
+            if updates:
+                set_status(f"{len(updates)} atualizações disponíveis para {self.game_version} ({self.loader}).", SUCCESS)
+                update_all_button.config(state="normal")
+            else:
+                set_status("Tudo atualizado!", SUCCESS)
+
+        def check_thread():
+            try:
+                updates = checker.check(progress_cb=lambda text: dialog.after(0, set_status, text))
+                dialog.after(0, show_updates, updates)
+            except Exception as e:
+                print(f"[UPDATE] Erro ao verificar atualizações: {e}")
+                dialog.after(0, progress.stop)
+                dialog.after(0, set_status, f"Erro ao verificar atualizações: {e}", DANGER)
+
+        def on_progress(done, total):
+            def _update():
+                if dialog.winfo_exists():
+                    progress.config(value=done)
+                    set_status(f"Atualizando... ({done}/{total})")
+            dialog.after(0, _update)
+
+        def apply_thread(updates):
+            ok, failed = checker.apply(updates, self.launcher.download_to_instance, progress_cb=on_progress)
+            def _done():
+                if not dialog.winfo_exists():
+                    return
+                for item in updates_tv.get_children():
+                    updates_tv.delete(item)
+                for update, error in failed:
+                    updates_tv.insert("", "end", values=(update["title"], update["current"], f"FALHOU: {error}"))
+                if failed:
+                    set_status(f"{len(ok)} atualizados, {len(failed)} falharam.", WARNING)
+                else:
+                    set_status(f"✅ {len(ok)} projetos atualizados!", SUCCESS)
+            dialog.after(0, _done)
+
+        def on_update_all():
+            updates = state["updates"]
+            if not updates:
+                return
+            update_all_button.config(state="disabled")
+            progress.config(mode="determinate", maximum=len(updates), value=0)
+            threading.Thread(target=apply_thread, args=(updates,), daemon=True).start()
+
+        update_all_button.config(command=on_update_all)
+        threading.Thread(target=check_thread, daemon=True).start()
+
     def _install_modpack_thread(self, project_id, project_title):
         """(THREAD) Baixa, descompacta e instala um modpack .mrpack"""
         
         temp_mrpack_path = None
-        temp_extract_dir = os.path.join(BASE_DIR, f"temp_mrpack_{project_id}")
         
         # Define um 'new_pack_name' inicial (limpo) para o caso de erro
         sanitized_title = re.sub(r'[\\/:*?"<>|]', '', project_title).strip()
@@ -697,42 +4310,28 @@ class ModDownloader(tk.Toplevel):
         try:
             # --- 1. Encontrar a URL do .mrpack ---
             self.after(0, self.set_status, "Buscando o arquivo .mrpack...")
-            headers = {'User-Agent': f'RaposoLauncher/{self.launcher.LAUNCHER_VERSION}'}
-            
-            url = f"https://api.modrinth.com/v2/project/{project_id}/version"
-            resp = requests.get(url, params={"loaders": "null", "game_versions": "null"}, headers=headers)
-            resp.raise_for_status()
-            versions = resp.json()
+            versions = self.launcher.modrinth.project_versions(project_id)
             if not versions:
                 raise Exception("Nenhuma versão encontrada para este modpack.")
             latest_version = versions[0]
-            mrpack_file_info = None
-            for f in latest_version.get("files", []):
-                if f.get("filename", "").endswith(".mrpack"):
-                    mrpack_file_info = f
-                    break
+            mrpack_file_info = next((f for f in latest_version.files if (f.filename or "").endswith(".mrpack")), None)
             if not mrpack_file_info:
                 raise Exception("Nenhum arquivo .mrpack encontrado na versão mais recente.")
             
-            file_url = mrpack_file_info.get("url")
-            file_name = mrpack_file_info.get("filename")
+            file_name = mrpack_file_info.filename
             
             # --- 2. Baixar o .mrpack ---
             self.after(0, self.set_status, f"Baixando {file_name}...")
             temp_mrpack_path = os.path.join(BASE_DIR, file_name)
-            self.launcher.download_file(file_url, temp_mrpack_path, file_name)
+            self.launcher.download_file(
+                mrpack_file_info.url, temp_mrpack_path, file_name,
+                sha1=mrpack_file_info.hashes.get("sha1"), sha512=mrpack_file_info.hashes.get("sha512"),
+                size=mrpack_file_info.size
+            )
             
-            # --- 3. Descompactar e Ler o Manifesto ---
+            # --- 3. Ler o Manifesto (direto do zip, sem extrair) ---
             self.after(0, self.set_status, "Lendo o manifesto do modpack...")
-            if os.path.exists(temp_extract_dir):
-                shutil.rmtree(temp_extract_dir) 
-            with zipfile.ZipFile(temp_mrpack_path, 'r') as zf:
-                zf.extractall(temp_extract_dir)
-            manifest_path = os.path.join(temp_extract_dir, "modrinth.index.json")
-            if not os.path.exists(manifest_path):
-                raise Exception("Arquivo .mrpack inválido (não contém modrinth.index.json).")
-            with open(manifest_path, 'r', encoding='utf-8') as f:
-                manifest = json.load(f)
+            manifest = MrpackInstaller(temp_mrpack_path, MODPACKS_DIR, self.launcher.download_file).read_manifest()
             
             # --- 4. Preparar o Novo Modpack ---
             manifest_name = manifest.get("name", project_title)
@@ -751,53 +4350,29 @@ class ModDownloader(tk.Toplevel):
             os.makedirs(target_dir, exist_ok=True) 
             print(f"[DEBUG] Criando novo modpack em: {target_dir}")
 
-            # --- 5. Copiar Overrides ---
-            self.after(0, self.set_status, "Copiando arquivos de configuração...")
-            overrides_dir = os.path.join(temp_extract_dir, "overrides")
-            if os.path.exists(overrides_dir):
-                print(f"[DEBUG] Copiando 'overrides' para {target_dir}")
-                shutil.copytree(overrides_dir, target_dir, dirs_exist_ok=True)
-            
-            # --- 6. Baixar todos os arquivos (Mods, Resource Packs, etc.) ---
-            files_to_download = manifest.get("files", [])
-            total_files = len(files_to_download)
-            
-            if not files_to_download:
+            installer = MrpackInstaller(temp_mrpack_path, target_dir, self.launcher.download_to_instance)
+
+            # --- 5. Baixar todos os arquivos (Mods, Resource Packs, etc.) ---
+            if not manifest.get("files"):
                 print("[AVISO] Este modpack não tem nenhum arquivo no manifesto.")
             else:
-                print(f"[DEBUG] {total_files} arquivos para baixar...")
-                tasks = []
-                for file_info in files_to_download:
-                    file_target_path_str = file_info.get("path")
-                    file_download_url = file_info.get("downloads", [None])[0]
-                    if not file_target_path_str or not file_download_url:
-                        print(f"[AVISO] Entrada de arquivo inválida no manifesto: {file_info.get('path')}")
-                        continue
-                    target_file_path = os.path.join(target_dir, file_target_path_str)
-                    os.makedirs(os.path.dirname(target_file_path), exist_ok=True)
-                    file_dl_name = file_target_path_str.split('/')[-1]
-                    tasks.append( (file_download_url, target_file_path, file_dl_name) )
-
-                self.after(0, self.launcher.progressbar.config, {"mode": "determinate", "maximum": total_files, "value": 0})
-                completed_count = 0
-                last_reported_percent = -1
-                with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                    futures = {
-                        executor.submit(self.launcher.download_file, url, path, filename): filename 
-                        for (url, path, filename) in tasks
-                    }
-                    for future in concurrent.futures.as_completed(futures):
-                        filename = futures[future]
-                        try:
-                            future.result()
-                        except Exception as e:
-                            print(f"FALHA no download do arquivo {filename}: {e}")
-                        completed_count += 1
-                        current_percent = int((completed_count / total_files) * 100)
-                        if current_percent > last_reported_percent:
-                            self.after(0, self.launcher.progressbar.config, {"value": completed_count})
-                            self.after(0, self.set_status, f"Baixando arquivos ({current_percent}%)")
-                            last_reported_percent = current_percent
+                progress_state = {"last_percent": -1}
+                def _on_progress(done, total):
+                    current_percent = int((done / total) * 100) if total else 100
+                    if current_percent > progress_state["last_percent"]:
+                        self.after(0, self.launcher.progressbar.config, {"mode": "determinate", "maximum": max(total, 1), "value": done})
+                        self.after(0, self.set_status, f"Baixando arquivos ({current_percent}%)")
+                        progress_state["last_percent"] = current_percent
+
+                downloaded, skipped, failed = installer.download_files(manifest, progress_cb=_on_progress)
+                print(f"[MRPACK] {downloaded} arquivos baixados, {skipped} já estavam corretos, {len(failed)} falharam.")
+                if failed:
+                    raise Exception(f"{len(failed)} arquivos não puderam ser baixados/verificados: {', '.join(failed[:5])}")
+
+            # --- 6. Copiar Overrides (overrides/ e depois client-overrides/) ---
+            self.after(0, self.set_status, "Copiando arquivos de configuração...")
+            copied, skipped = installer.apply_overrides()
+            print(f"[MRPACK] Overrides: {copied} copiados, {skipped} já iguais.")
             
             # --- 7. Criar o config.json (A PARTE MAIS IMPORTANTE) ---
             self.after(0, self.set_status, "Criando perfil do modpack...")
@@ -886,8 +4461,6 @@ class ModDownloader(tk.Toplevel):
             try:
                 if temp_mrpack_path and os.path.exists(temp_mrpack_path):
                     os.remove(temp_mrpack_path)
-                if os.path.exists(temp_extract_dir):
-                    shutil.rmtree(temp_extract_dir)
                 print("[DEBUG] Arquivos temporários do .mrpack removidos.")
             except Exception as e:
                 print(f"[AVISO] Falha ao limpar arquivos temporários: {e}")
@@ -935,8 +4508,10 @@ class ModDownloader(tk.Toplevel):
             lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
         )
         
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+        window_id = canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
         canvas.configure(yscrollcommand=scrollbar.set)
+        # BIND 2: O frame interno acompanha a largura do canvas
+        canvas.bind("<Configure>", lambda e: self._on_details_canvas_configure(e, canvas, window_id))
         
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
@@ -945,12 +4520,13 @@ class ModDownloader(tk.Toplevel):
         self._bind_mousewheel(scrollable_frame)
         
         # --- MUDANÇA AQUI ---
-        self.gallery_photos = []
         # Mapa para guardar os dados de download (URL, nome) de cada versão
         self.version_data_map = {} 
         # Referência para o widget da lista de versões
         self.version_treeview = None 
         # --- FIM DA MUDANÇA ---
+        self.details_project_id = project_id
+        self.details_versions = []
 
         # 5. Label de "Carregando..."
         loading_label = ttk.Label(scrollable_frame, text="Buscando dados do Modrinth...", bootstyle="info")
@@ -981,9 +4557,9 @@ class ModDownloader(tk.Toplevel):
             self.set_status(f"Erro: Dados não encontrados para a versão {selected_item}", DANGER)
             return
             
-        file_data = self.version_data_map[selected_item]
-        file_url = file_data["url"]
-        file_name = file_data["filename"]
+        file_data = self.version_data_map[selected_item] # ModrinthFile
+        file_url = file_data.url
+        file_name = file_data.filename
         
         # Determina a pasta de destino (igual ao _download_thread)
         target_dir = self.mods_dir 
@@ -1005,14 +4581,15 @@ class ModDownloader(tk.Toplevel):
         # Inicia o worker de download em um thread
         threading.Thread(
             target=self._specific_download_worker, 
-            args=(file_url, target_path, file_name), 
+            args=(file_url, target_path, file_name, file_data.hashes, file_data.size), 
             daemon=True
         ).start()
 
-    def _specific_download_worker(self, url, path, filename):
+    def _specific_download_worker(self, url, path, filename, hashes=None, size=None):
         """(THREAD) O worker que de fato baixa o arquivo."""
+        hashes = hashes or {}
         try:
-            self.launcher.download_file(url, path, filename)
+            self.launcher.download_to_instance(url, path, filename, sha1=hashes.get("sha1"), sha512=hashes.get("sha512"), size=size)
             self.after(0, self.set_status, f"✅ {filename} baixado!", SUCCESS)
         except Exception as e:
             self.after(0, self.set_status, f"Erro ao baixar {filename}: {e}", DANGER)
@@ -1020,14 +4597,17 @@ class ModDownloader(tk.Toplevel):
     def close_mod_details_view(self):
         """Destrói a view de detalhes e reexibe a lista."""
         
-        # 1. Destrói o frame de detalhes
+        # 1. Destrói o frame de detalhes (e cancela as imagens pendentes dele)
+        self.image_loader.new_generation("details")
+        self._cancel_version_fill()
+        self.details_project_id = None
+        self.details_versions = []
         if self.details_frame:
             self.details_frame.destroy()
             self.details_frame = None
             
         # --- MUDANÇA AQUI ---
         # 2. Limpa as listas de referências
-        self.gallery_photos.clear()
         self.version_data_map.clear()
         self.version_treeview = None
         # --- FIM DA MUDANÇA ---
@@ -1040,42 +4620,36 @@ class ModDownloader(tk.Toplevel):
     def _fetch_and_show_details(self, project_id, content_frame, loading_label, title, author):
         """(THREAD) Busca os dados E AS VERSÕES e preenche a janela de detalhes."""
         try:
-            # --- 1. Busca os dados completos do projeto ---
-            url = f"https://api.modrinth.com/v2/project/{project_id}"
-            headers = {'User-Agent': f'RaposoLauncher/{self.launcher.LAUNCHER_VERSION}'}
-            resp = requests.get(url, headers=headers)
-            resp.raise_for_status()
-            data = resp.json()
+            # --- 1. Busca os dados completos do projeto (via cache HTTP) ---
+            # --- 2. ... e TODAS as versões (o filtro é feito na lista) ---
+            # Cópia em cache aparece na hora; se o Modrinth mudar, a lista é refeita.
+            def _on_refresh(project, versions):
+                self.after(0, self._on_details_refreshed, project_id, versions)
 
-            # --- 2. Busca os dados das VERSÕES ---
-            # (Não aplicamos filtros, queremos TODAS as versões)
-            versions_url = f"https://api.modrinth.com/v2/project/{project_id}/version"
-            resp_versions = requests.get(versions_url, headers=headers)
-            resp_versions.raise_for_status()
-            versions_data = resp_versions.json()
+            data, versions_data = self.launcher.modrinth.project_details(project_id, on_refresh=_on_refresh)
             
             # --- 3. Prepara os dados para a UI ---
-            icon_url = data.get("icon_url")
-            project_slug = data.get("slug") 
-            body_markdown = data.get("body", "Sem descrição.")
-            downloads = data.get("downloads", 0)
-            followers = data.get("followers", 0)
-            game_versions = data.get("game_versions", [])
-            loaders = data.get("loaders", [])
-            gallery_data = data.get("gallery", [])
-
-            # Limpa o Markdown para texto puro
-            plain_text_description = body_markdown
+            icon_url = data.icon_url
+            project_slug = data.slug
+            body_markdown = data.body or "Sem descrição."
+            downloads = data.downloads
+            followers = data.followers
+            game_versions = data.game_versions
+            loaders = data.loaders
+            gallery_data = data.gallery
+
+            # Converte a descrição em trechos prontos para o tk.Text (aqui, fora da UI)
             try:
-                md = MarkdownIt()
-                html_content = md.render(body_markdown)
-                plain_text_description = strip_tags(html_content)
+                description_segments = DescriptionBuilder().build(body_markdown)
             except Exception as e:
-                print(f"Erro ao limpar Markdown: {e}")
+                print(f"Erro ao processar a descrição: {e}")
+                description_segments = [("text", body_markdown, (), None)]
             
             # --- 4. Função de População (para rodar na thread principal) ---
             # (Agora ela aceita 'versions_data' como argumento)
             def _populate_ui(project_data, all_versions):
+                if project_id != self.details_project_id or not content_frame.winfo_exists():
+                    return # O usuário já voltou para a lista (ou abriu outro projeto)
                 loading_label.destroy() # Remove o "Carregando"
                 
                 # --- Seções Antigas (Sem mudanças) ---
@@ -1088,7 +4662,7 @@ class ModDownloader(tk.Toplevel):
                 icon_label = ttk.Label(header_frame, image=self.default_mod_icon)
                 icon_label.grid(row=0, column=0, rowspan=2, sticky="nw", padx=(0, 15))
                 if icon_url:
-                    threading.Thread(target=self._load_mod_icon, args=(icon_label, icon_url), daemon=True).start()
+                    self._load_mod_icon(icon_label, icon_url, channel="details", priority=-1)
                 ttk.Label(header_frame, text=title, font=("Helvetica", 16, "bold"), wraplength=450).grid(row=0, column=1, sticky="w")
                 ttk.Label(header_frame, text=f"por {author}", font=("Helvetica", 11)).grid(row=1, column=1, sticky="w")
                 
@@ -1107,18 +4681,26 @@ class ModDownloader(tk.Toplevel):
                 if loaders:
                     ttk.Label(content_frame, text=f"Loaders: {', '.join(loaders)}", wraplength=550).pack(anchor="w", fill="x")
 
-                # --- Descrição (Texto Limpo) ---
+                # --- Descrição (formatada, inserida aos poucos) ---
                 ttk.Separator(content_frame).pack(fill="x", pady=10)
                 ttk.Label(content_frame, text="Descrição", font=("Helvetica", 12, "bold")).pack(anchor="w", pady=(0, 5))
-                ttk.Label(
-                    content_frame, 
-                    text=plain_text_description, # Usa o texto processado
-                    wraplength=550,              # Quebra a linha
-                    justify="left"
-                ).pack(fill="x", pady=(0, 15))
+                desc_frame = ttk.Frame(content_frame)
+                desc_frame.pack(fill="x", pady=(0, 15))
+                desc_text = tk.Text(
+                    desc_frame, wrap="word", height=22, relief="flat", padx=8, pady=8,
+                    cursor="arrow", highlightthickness=0, state="disabled"
+                )
+                desc_scroll = ttk.Scrollbar(desc_frame, orient="vertical", command=desc_text.yview)
+                def _on_desc_scrolled(first, last):
+                    desc_scroll.set(first, last)
+                    self._schedule_description_images(desc_text) # Imagens que entraram na tela
+                desc_text.configure(yscrollcommand=_on_desc_scrolled)
+                desc_scroll.pack(side="right", fill="y")
+                desc_text.pack(side="left", fill="both", expand=True)
+                self._render_description(desc_text, description_segments)
                 open_button = ttk.Button(
                     content_frame,
-                    text="Ver descrição formatada (com imagens) no Navegador", 
+                    text="Abrir a página no Modrinth (navegador)", 
                     command=lambda s=project_slug: self._open_mod_page(s),
                     bootstyle="primary-outline"
                 )
@@ -1130,12 +4712,10 @@ class ModDownloader(tk.Toplevel):
                     ttk.Label(content_frame, text="Galeria", font=("Helvetica", 12, "bold")).pack(anchor="w", pady=(0, 10))
                     gallery_frame = ttk.Frame(content_frame)
                     gallery_frame.pack(fill="x")
-                    for i, image_info in enumerate(gallery_data[:5]):
-                        image_url = image_info.get("url")
-                        if not image_url: continue
+                    for i, image_url in enumerate(gallery_data[:5]):
                         img_label = ttk.Label(gallery_frame, text=f"Carregando imagem {i+1}...", bootstyle="secondary")
                         img_label.pack(pady=5)
-                        threading.Thread(target=self._load_gallery_image, args=(img_label, image_url, 550), daemon=True).start()
+                        self._load_gallery_image(img_label, image_url, 550, priority=i)
                 
 
                 # --- MUDANÇA AQUI: Seção de Versões (NOVA) ---
@@ -1177,43 +4757,18 @@ class ModDownloader(tk.Toplevel):
                     tree_scroll.pack(side="right", fill="y")
                     self.version_treeview.pack(side="left", fill="x", expand=True)
 
-                    # Limpa o mapa de dados
-                    self.version_data_map.clear()
-
-                    # Preenche o Treeview
-                    for version in all_versions:
-                        version_id = version.get("id")
-                        if not version_id:
-                            continue
-                        
-                        # Pega o arquivo principal (o primeiro da lista)
-                        primary_file = version.get("files", [{}])[0]
-                        file_url = primary_file.get("url")
-                        file_name = primary_file.get("filename")
-                        
-                        if not file_url or not file_name:
-                            continue # Versão sem arquivo principal
-
-                        # Salva os dados de download
-                        self.version_data_map[version_id] = {
-                            "url": file_url,
-                            "filename": file_name
-                        }
-                        
-                        # Prepara os dados para a UI
-                        nome_versao = version.get("name", "Versão Desconhecida")
-                        tipo_versao = version.get("version_type", "-")
-                        versoes_jogo = ", ".join(version.get("game_versions", []))
-                        loaders_lista = ", ".join(version.get("loaders", []))
-
-                        # Insere na lista
-                        # O 'iid' é o ID da versão, que usaremos para o download
-                        self.version_treeview.insert(
-                            "", # Parente (raiz)
-                            "end", # Posição
-                            iid=version_id,
-                            values=(nome_versao, tipo_versao, versoes_jogo, loaders_lista)
-                        )
+                    # Filtro + contagem; as linhas entram em lotes (_fill_version_tree)
+                    filter_frame = ttk.Frame(content_frame)
+                    filter_frame.pack(fill="x", pady=(0, 5), before=tree_frame)
+                    ttk.Checkbutton(
+                        filter_frame, text=f"Só compatíveis com {self.game_version} ({self.loader})",
+                        variable=self.only_compatible_versions, command=self._fill_version_tree
+                    ).pack(side="left")
+                    self.version_count_label = ttk.Label(filter_frame, text="", bootstyle="secondary")
+                    self.version_count_label.pack(side="right")
+
+                    self.details_versions = all_versions
+                    self._fill_version_tree()
                         
                     # Botão de Download
                     download_v_button = ttk.Button(
@@ -1233,6 +4788,182 @@ class ModDownloader(tk.Toplevel):
             print(f"Erro ao buscar detalhes: {e}")
             self.after(0, loading_label.config, {"text": f"Erro ao buscar dados: {e}", "bootstyle": "danger"})
 
+    def _setup_description_tags(self, text):
+        colors = self.launcher.style.colors
+        mono = ("Consolas", 10) if platform.system() == "Windows" else ("Courier", 10)
+        text.configure(background=colors.inputbg, foreground=colors.inputfg)
+        text.tag_configure("h1", font=("Helvetica", 16, "bold"), spacing1=6, spacing3=4)
+        text.tag_configure("h2", font=("Helvetica", 14, "bold"), spacing1=6, spacing3=4)
+        text.tag_configure("h3", font=("Helvetica", 12, "bold"), spacing1=4, spacing3=2)
+        text.tag_configure("bold", font=("Helvetica", 10, "bold"))
+        text.tag_configure("italic", font=("Helvetica", 10, "italic"))
+        text.tag_configure("strike", overstrike=True)
+        text.tag_configure("code", font=mono, background=colors.bg)
+        text.tag_configure("codeblock", font=mono, background=colors.bg, lmargin1=15, lmargin2=15)
+        text.tag_configure("quote", lmargin1=20, lmargin2=20, foreground=colors.secondary)
+        text.tag_configure("hr", foreground=colors.secondary)
+        text.tag_configure("image_alt", foreground=colors.secondary)
+        text.tag_configure("link", foreground=colors.info, underline=True)
+        text.tag_bind("link", "<Enter>", lambda e: text.config(cursor="hand2"))
+        text.tag_bind("link", "<Leave>", lambda e: text.config(cursor="arrow"))
+
+    @staticmethod
+    def _description_link_tag(text, url):
+        """Uma tag por endereço, com o clique que abre o navegador."""
+        tag = text.link_tags.get(url)
+        if not tag:
+            tag = text.link_tags[url] = f"href{len(text.link_tags)}"
+            text.tag_bind(tag, "<Button-1>", lambda e: webbrowser.open(url))
+        return tag
+
+    def _render_description(self, text, segments):
+        """
+        Insere os trechos prontos do DescriptionBuilder em lotes de
+        DESCRIPTION_CHUNK por callback ocioso: READMEs longos não travam a
+        tela. Imagens entram como texto (alt) e só são baixadas quando
+        chegam perto da área visível (_load_visible_description_images).
+        """
+        self._setup_description_tags(text)
+        text.link_tags = {} # url -> tag
+        text.pending_images = {} # tag do placeholder -> url
+        text.images = [] # PhotoImages inseridas (a referência fica no widget)
+        text.image_check_job = None
+        chunks = iter(segments)
+        placeholders = itertools.count()
+
+        def _insert_chunk():
+            if not text.winfo_exists():
+                return
+            batch = list(itertools.islice(chunks, self.DESCRIPTION_CHUNK))
+            text.configure(state="normal")
+            for kind, value, extra, link in batch:
+                tags = ()
+                if link and link.startswith(("http://", "https://")):
+                    tags = ("link", self._description_link_tag(text, link))
+                if kind == "text":
+                    text.insert("end", value, extra + tags)
+                else:
+                    placeholder = f"img{next(placeholders)}"
+                    text.insert("end", f"🖼 {extra}", tags + ("image_alt", placeholder))
+                    text.pending_images[placeholder] = value
+            text.configure(state="disabled")
+            self._schedule_description_images(text)
+            if len(batch) == self.DESCRIPTION_CHUNK:
+                text.after_idle(_insert_chunk)
+
+        _insert_chunk()
+
+    def _schedule_description_images(self, text):
+        if getattr(text, "pending_images", None) and text.image_check_job is None:
+            text.image_check_job = text.after(100, self._load_visible_description_images, text)
+
+    def _load_visible_description_images(self, text):
+        """Pede ao pool de imagens só os placeholders que estão na tela (ou logo abaixo)."""
+        text.image_check_job = None
+        if not text.winfo_exists():
+            return
+        first = int(text.index("@0,0").split(".")[0])
+        last = int(text.index(f"@0,{text.winfo_height()}").split(".")[0]) + self.DESCRIPTION_IMAGE_MARGIN
+        max_width = min(800, max(200, (text.winfo_width() - 40) // 50 * 50)) # Múltiplos de 50: reaproveita o cache
+        for placeholder, url in list(text.pending_images.items()):
+            ranges = text.tag_ranges(placeholder)
+            if not ranges:
+                del text.pending_images[placeholder]
+                continue
+            line = int(str(ranges[0]).split(".")[0])
+            if not first - self.DESCRIPTION_IMAGE_MARGIN <= line <= last:
+                continue
+            del text.pending_images[placeholder]
+            self.image_loader.request(
+                "details", url,
+                lambda photo, p=placeholder: self._show_description_image(text, p, photo),
+                max_width=max_width, priority=line - first
+            )
+
+    @staticmethod
+    def _show_description_image(text, placeholder, photo):
+        """Troca o texto alternativo pela imagem, mantendo as tags (ex: link)."""
+        try:
+            ranges = text.tag_ranges(placeholder)
+            if not ranges:
+                return
+            start = text.index(ranges[0])
+            tags = [t for t in text.tag_names(start) if t not in ("image_alt", placeholder)]
+            text.configure(state="normal")
+            text.delete(start, ranges[1])
+            text.image_create(start, image=photo)
+            for tag in tags:
+                text.tag_add(tag, start)
+            text.configure(state="disabled")
+            text.images.append(photo)
+        except tk.TclError:
+            pass # Detalhes já foram fechados
+
+    def _version_is_compatible(self, version):
+        """A versão roda nesta instância? (mesmas regras do download)"""
+        if self.current_project_type not in ("shader", "modpack") and self.game_version not in version.game_versions:
+            return False
+        if self.current_project_type == "mod":
+            loaders = {self.loader, "forge"} if self.loader == "neoforge" else {self.loader}
+            return bool(loaders.intersection(version.loaders))
+        return True
+
+    def _cancel_version_fill(self):
+        if self.version_fill_job:
+            self.after_cancel(self.version_fill_job)
+            self.version_fill_job = None
+
+    def _fill_version_tree(self):
+        """
+        (Re)preenche o Treeview de versões em lotes de VERSION_BATCH linhas,
+        um lote por callback ocioso: projetos com milhares de versões abrem
+        na hora e a janela continua respondendo enquanto a lista cresce.
+        """
+        self._cancel_version_fill()
+        tree = self.version_treeview
+        if not tree or not tree.winfo_exists():
+            return
+        tree.delete(*tree.get_children())
+        self.version_data_map.clear()
+
+        versions = self.details_versions
+        if self.only_compatible_versions.get():
+            versions = [v for v in versions if self._version_is_compatible(v)]
+        self.version_count_label.config(text=f"{len(versions)} de {len(self.details_versions)} versões")
+        rows = iter(versions)
+
+        def _insert_batch():
+            self.version_fill_job = None
+            if tree is not self.version_treeview or not tree.winfo_exists():
+                return
+            batch = list(itertools.islice(rows, self.VERSION_BATCH))
+            for version in batch:
+                # Pega o arquivo principal
+                primary = version.primary_file
+                if not version.id or not primary or not primary.url or not primary.filename:
+                    continue # Versão sem arquivo principal
+                # Salva os dados de download (ModrinthFile)
+                self.version_data_map[version.id] = primary
+                # O 'iid' é o ID da versão, que usaremos para o download
+                tree.insert("", "end", iid=version.id, values=(
+                    version.name or "Versão Desconhecida",
+                    version.version_type or "-",
+                    ", ".join(version.game_versions),
+                    ", ".join(version.loaders),
+                ))
+            if len(batch) == self.VERSION_BATCH:
+                self.version_fill_job = self.after_idle(_insert_batch)
+
+        _insert_batch()
+
+    def _on_details_refreshed(self, project_id, versions):
+        """A revalidação em segundo plano trouxe versões novas: refaz a lista (se ainda aberta)."""
+        if project_id != self.details_project_id or not self.version_treeview:
+            return
+        print(f"[DEBUG] Versões de {project_id} atualizadas ({len(versions)}).")
+        self.details_versions = versions
+        self._fill_version_tree()
+
     def _open_mod_page(self, slug):
         """Abre a página do projeto no Modrinth no navegador padrão."""
         if not slug:
@@ -1251,6 +4982,14 @@ def offline_uuid_for(name: str) -> str:
     """Gera um UUID offline baseado no nome de usuário."""
     return str(uuid.uuid3(uuid.NAMESPACE_DNS, "OfflinePlayer:" + name))
 
+def format_size(num_bytes: int) -> str:
+    """Formata bytes para leitura humana (ex: 12.3 MB)."""
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
 # --- Classe Principal do Launcher ---
 class RaposoLauncher(ttk.Window):
     def __init__(self):
@@ -1278,6 +5017,39 @@ class RaposoLauncher(ttk.Window):
         
         self.LAUNCHER_VERSION = "v4.8.0"
         self.logo_clicks = 0
+
+        # Cache HTTP em disco para os metadados (Mojang, Fabric, Forge, Modrinth)
+        self.http_cache = HttpCache(
+            os.path.join(CACHE_DIR, "http"),
+            user_agent=f"RaposoLauncher/{self.LAUNCHER_VERSION}"
+        )
+        # Índice local dos projetos já vistos (busca instantânea/offline)
+        self.project_index = ProjectIndex(os.path.join(CACHE_DIR, "modrinth_index.sqlite"))
+        # Cliente do Modrinth (ritmo do rate limit, lotes, resultados tipados)
+        self.modrinth = ModrinthClient(
+            os.path.join(CACHE_DIR, "modrinth"),
+            user_agent=f"RaposoLauncher/{self.LAUNCHER_VERSION}",
+            index=self.project_index
+        )
+        # Miniaturas do Modrinth (ícones e galeria), já redimensionadas
+        self.thumbnails = ThumbnailCache(
+            os.path.join(CACHE_DIR, "thumbs"),
+            user_agent=f"RaposoLauncher/{self.LAUNCHER_VERSION}"
+        )
+        # Store compartilhado de mods/resourcepacks/shaders (hardlinks)
+        self.content_store = ContentStore(STORE_DIR)
+        # Páginas de busca do Modrinth já vistas nesta sessão (ModDownloader)
+        self.search_memory = {}
+        self.search_memory_lock = threading.Lock()
+        # Resolvedor de bibliotecas Maven (com cache negativo de 404)
+        self.maven = MavenResolver(
+            os.path.join(CACHE_DIR, "maven_missing.json"),
+            user_agent=f"RaposoLauncher/{self.LAUNCHER_VERSION}"
+        )
+        # Instaladores do Forge e o que eles geraram, por build
+        self.forge_cache = ForgeInstallCache(os.path.join(CACHE_DIR, "forge"))
+        # Loaders do Forge/Fabric indexados por versão do MC (downloader de versões)
+        self.loader_index = LoaderIndex(os.path.join(CACHE_DIR, "loader_index.json"))
         
         self.bg_photo = None
         self.bg_canvas = None
@@ -1438,7 +5210,8 @@ class RaposoLauncher(ttk.Window):
             text="📚 Biblioteca Modrinth", # <- Texto alterado
             bootstyle="success-outline", 
             command=self.open_mod_downloader
-        ).grid(row=2, column=0, columnspan=3, sticky="ew", padx=2, pady=2)
+        ).grid(row=2, column=0, columnspan=2, sticky="ew", padx=2, pady=2)
+        ttk.Button(button_frame, text="🧹 Manutenção", bootstyle="secondary-outline", command=self.open_maintenance_dialog).grid(row=2, column=2, sticky="ew", padx=2, pady=2)
         # --- FIM DA MUDANÇA ---
         
         # --- FIM DO CONTROLS_FRAME ---
@@ -1676,6 +5449,152 @@ class RaposoLauncher(ttk.Window):
         # 3. Abre a nova janela
         ModDownloader(self, self, modpack_name, config)
 
+    def open_maintenance_dialog(self):
+        """Abre a janela de manutenção (coletor de lixo do GAME_DIR)."""
+        dialog = tk.Toplevel(self)
+        dialog.title("Manutenção")
+        dialog.geometry("520x420")
+        dialog.resizable(False, False)
+        dialog.grab_set()
+        self._set_dialog_icon(dialog)
+
+        frame = ttk.Frame(dialog, padding=20)
+        frame.pack(fill="both", expand=True)
+
+        ttk.Label(frame, text="Limpeza de arquivos não usados", font=("Helvetica", 11, "bold")).pack(pady=(0, 5))
+        ttk.Label(
+            frame,
+            text="Remove versões, bibliotecas e assets que nenhum modpack usa mais, "
+                 "e troca mods repetidos entre modpacks por hardlinks.",
+            bootstyle="secondary", wraplength=470
+        ).pack(pady=(0, 10))
+
+        report_tv = ttk.Treeview(frame, columns=("area", "arquivos", "tamanho"), show="headings", height=7)
+        report_tv.heading("area", text="Área")
+        report_tv.heading("arquivos", text="Arquivos")
+        report_tv.heading("tamanho", text="Tamanho")
+        report_tv.column("area", width=230)
+        report_tv.column("arquivos", width=90, anchor="e")
+        report_tv.column("tamanho", width=110, anchor="e")
+        report_tv.pack(fill="x")
+
+        status_label = ttk.Label(frame, text="Clique em 'Analisar' para simular a limpeza.")
+        status_label.pack(pady=(10, 5), anchor="w")
+        progress = ttk.Progressbar(frame, mode="indeterminate", bootstyle="success-striped")
+        progress.pack(fill="x")
+
+        btn_frame = ttk.Frame(frame)
+        btn_frame.pack(fill="x", pady=(15, 0))
+        btn_frame.columnconfigure((0, 1, 2), weight=1)
+
+        def latest_versions():
+            # Manifesto do cache (ou da rede); stale serve, só queremos os IDs
+            manifest = self.http_cache.get_json(VERSION_MANIFEST_URL, on_refresh=lambda data: None)
+            return manifest.get("latest", {})
+
+        gc = GameDirGC(
+            GAME_DIR, MODPACKS_DIR, store_dir=STORE_DIR, latest_versions_fn=latest_versions,
+            forge_cache_dir=self.forge_cache.cache_dir
+        )
+        state = {"report": None}
+
+        def set_busy(busy, text):
+            if not dialog.winfo_exists():
+                return
+            status_label.config(text=text)
+            scan_btn.config(state="disabled" if busy else "normal")
+            clean_btn.config(state="disabled" if busy or not state["report"] else "normal")
+            dedupe_btn.config(state="disabled" if busy else "normal")
+            if busy:
+                progress.config(mode="indeterminate")
+                progress.start(10)
+            else:
+                progress.stop()
+
+        def show_report(report):
+            state["report"] = report
+            for item in report_tv.get_children():
+                report_tv.delete(item)
+            total_files = sum(r["count"] for r in report.values())
+            total_bytes = sum(r["bytes"] for r in report.values())
+            retained = sum(r["retained"] for r in report.values())
+            for area, result in report.items():
+                report_tv.insert("", "end", values=(area, result["count"], format_size(result["bytes"])))
+            if total_files:
+                text = f"{total_files} arquivos ({format_size(total_bytes)}) podem ser apagados."
+                if retained:
+                    text += f" Outros {format_size(retained)} seguem no cache do Forge (cache/forge)."
+                set_busy(False, text)
+            else:
+                state["report"] = None
+                set_busy(False, "Nada para limpar.")
+
+        def scan_thread():
+            try:
+                report = gc.scan()
+                dialog.after(0, show_report, report)
+            except Exception as e:
+                print(f"[GC] Erro na análise: {e}")
+                dialog.after(0, set_busy, False, f"Erro na análise: {e}")
+
+        def on_scan():
+            state["report"] = None
+            set_busy(True, "Analisando... (nada será apagado)")
+            threading.Thread(target=scan_thread, daemon=True).start()
+
+        def on_sweep_progress(done, total):
+            def update():
+                if dialog.winfo_exists():
+                    progress.stop()
+                    progress.config(mode="determinate", maximum=max(total, 1), value=done)
+            dialog.after(0, update)
+
+        def sweep_thread(report):
+            try:
+                removed, freed = gc.sweep(report, progress_cb=on_sweep_progress)
+                state["report"] = None
+                dialog.after(0, set_busy, False, f"{removed} arquivos apagados, {format_size(freed)} liberados.")
+            except Exception as e:
+                print(f"[GC] Erro na limpeza: {e}")
+                dialog.after(0, set_busy, False, f"Erro na limpeza: {e}")
+
+        def on_sweep():
+            report = state["report"]
+            if not report:
+                return
+            if self.game_process:
+                return messagebox.showerror("Jogo Aberto", "Feche o jogo antes de limpar os arquivos.", parent=dialog)
+            total_bytes = sum(r["bytes"] for r in report.values())
+            if not messagebox.askyesno(
+                "Confirmar Limpeza",
+                f"Apagar {format_size(total_bytes)} de arquivos que nenhum modpack usa?\n\nEles serão baixados de novo se forem necessários.",
+                parent=dialog
+            ):
+                return
+            set_busy(True, "Limpando...")
+            threading.Thread(target=sweep_thread, args=(report,), daemon=True).start()
+
+        def dedupe_thread():
+            def on_progress(checked, saved):
+                dialog.after(0, lambda: status_label.config(text=f"Deduplicando... {checked} arquivos, {format_size(saved)} economizados"))
+            try:
+                checked, saved = self.content_store.dedupe(MODPACKS_DIR, progress_cb=on_progress)
+                dialog.after(0, set_busy, False, f"{checked} arquivos no store, {format_size(saved)} economizados com hardlinks.")
+            except Exception as e:
+                print(f"[STORE] Erro na deduplicação: {e}")
+                dialog.after(0, set_busy, False, f"Erro na deduplicação: {e}")
+
+        def on_dedupe():
+            set_busy(True, "Deduplicando mods, resource packs e shaders dos modpacks...")
+            threading.Thread(target=dedupe_thread, daemon=True).start()
+
+        scan_btn = ttk.Button(btn_frame, text="🔍 Analisar", bootstyle="info-outline", command=on_scan)
+        scan_btn.grid(row=0, column=0, sticky="ew", padx=(0, 5))
+        clean_btn = ttk.Button(btn_frame, text="🧹 Limpar", bootstyle="danger-outline", command=on_sweep, state="disabled")
+        clean_btn.grid(row=0, column=1, sticky="ew", padx=5)
+        dedupe_btn = ttk.Button(btn_frame, text="🔗 Deduplicar", bootstyle="secondary-outline", command=on_dedupe)
+        dedupe_btn.grid(row=0, column=2, sticky="ew", padx=(5, 0))
+
     # ---------------------------
     # Java
     # ---------------------------
@@ -1954,15 +5873,17 @@ class RaposoLauncher(ttk.Window):
         # 2. Se não existir, baixa
         print(f"[DEBUG Vanilla] Arquivo {version_id}.json não encontrado. Baixando...")
         
-        # 2a. Busca o "cardápio" principal da Mojang
-        manifest_url = "https://launchermeta.mojang.com/mc/game/version_manifest.json"
-        manifest_resp = requests.get(manifest_url)
-        manifest_resp.raise_for_status()
-        manifest_data = manifest_resp.json()
-        
+        # 2a. Busca o "cardápio" principal da Mojang (via cache HTTP)
+        manifest_data = self.http_cache.get_json(VERSION_MANIFEST_URL)
+
         # 2b. Encontra a URL para a versão específica
         target_url = next((v["url"] for v in manifest_data["versions"] if v["id"] == version_id), None)
-        
+
+        if not target_url:
+            # Pode ser uma versão lançada depois do nosso cache: força revalidação
+            manifest_data = self.http_cache.get_json(VERSION_MANIFEST_URL, ttl=0)
+            target_url = next((v["url"] for v in manifest_data["versions"] if v["id"] == version_id), None)
+
         if not target_url:
             # Se não encontrar (ex: versão não existe), lança um erro claro
             raise FileNotFoundError(f"Versão '{version_id}' não foi encontrada no manifest da Mojang.")
@@ -1992,12 +5913,24 @@ class RaposoLauncher(ttk.Window):
         # retorna uma chave "muito baixa" para que eles fiquem no final.
         return (0, 0, 0)
 
-    def _get_pretty_version_name(self, real_name):
+    def _describe_version(self, real_name, data):
+        """Entrada do catálogo de versões (VersionCatalog) a partir do JSON já lido."""
+        return {
+            "pretty": self._get_pretty_version_name(real_name, data),
+            "category": self._classify_version(real_name),
+            "inheritsFrom": data.get("inheritsFrom"),
+            "mainClass": data.get("mainClass"),
+            "java": (data.get("javaVersion") or {}).get("majorVersion"),
+            "sort_key": list(self._version_key(real_name)),
+        }
+
+    def _get_pretty_version_name(self, real_name, data=None):
         """
         Converte um nome de pasta de versão (ex: 1.12.2-forge...) 
         em um nome legível (ex: 1.12.2 (Forge 47.1.3)).
         
-        AGORA LÊ O JSON PARA DESCOBRIR A VERSÃO BASE DO MC.
+        AGORA LÊ O JSON PARA DESCOBRIR A VERSÃO BASE DO MC
+        (ou usa 'data', se o JSON já foi lido pelo catálogo de versões).
         """
         name_low = real_name.lower()
         
@@ -2005,19 +5938,19 @@ class RaposoLauncher(ttk.Window):
         mc_version = ""
         version_json_path = os.path.join(VERSIONS_DIR, real_name, f"{real_name}.json")
         
-        if os.path.exists(version_json_path):
+        if data is None and os.path.exists(version_json_path):
             try:
                 with open(version_json_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                
-                # A versão base do MC está em 'inheritsFrom'
-                mc_version = data.get("inheritsFrom")
-                if not mc_version:
-                    # Se não herda, é a própria versão (ex: vanilla 1.20.1)
-                    mc_version = data.get("id", real_name)
-                    
             except Exception as e:
                 print(f"[AVISO] Não foi possível ler {real_name}.json: {e}")
+
+        if data:
+            # A versão base do MC está em 'inheritsFrom'
+            mc_version = data.get("inheritsFrom")
+            if not mc_version:
+                # Se não herda, é a própria versão (ex: vanilla 1.20.1)
+                mc_version = data.get("id", real_name)
         # --- FIM DA NOVA LÓGICA ---
 
         try:
@@ -2148,7 +6081,7 @@ class RaposoLauncher(ttk.Window):
         
         downloader_dialog = tk.Toplevel(parent_dialog)
         downloader_dialog.title("Baixar Versões")
-        downloader_dialog.geometry("300x520") 
+        downloader_dialog.geometry("300x600") 
         downloader_dialog.resizable(False, False)
         downloader_dialog.grab_set() 
 
@@ -2176,6 +6109,27 @@ class RaposoLauncher(ttk.Window):
 
         # --- Aba 5: NeoForge (REMOVIDA) ---
         
+        # --- Instalação completa (vale para todas as abas) ---
+        # Baixa jar, bibliotecas, nativos e assets JÁ, em vez de no primeiro START
+        install_full = tk.BooleanVar(value=True)
+        full_install_frame = ttk.Frame(downloader_dialog)
+        full_install_frame.pack(fill="x", padx=10, pady=(0, 10))
+        ttk.Checkbutton(full_install_frame, text="Instalar completo (jar, bibliotecas e assets)", variable=install_full).pack(anchor="w")
+        full_install_progress = ttk.Progressbar(full_install_frame, mode="determinate", bootstyle="success-striped")
+        full_install_status = ttk.Label(full_install_frame, text="", wraplength=270)
+
+        def preinstall_then(version_id, on_done):
+            """Se 'Instalar completo' estiver marcado, roda o plano de download inteiro e depois chama on_done()."""
+            if not install_full.get():
+                return on_done()
+            full_install_progress.pack(fill="x", pady=(5, 0))
+            full_install_status.pack(anchor="w", pady=(5, 0))
+            threading.Thread(
+                target=self._preinstall_version_thread,
+                args=(version_id, downloader_dialog, full_install_progress, full_install_status, on_done),
+                daemon=True
+            ).start()
+        
         
         # --- ###################### ---
         # --- SEÇÃO DA ABA VANILLA ---
@@ -2201,29 +6155,40 @@ class RaposoLauncher(ttk.Window):
                     version_listbox.insert("end", v_id)
             on_version_select(None)
         
+        def apply_manifest(manifest_data):
+            version_urls.clear()
+            local_versions = [v for v in os.listdir(VERSIONS_DIR) if os.path.isdir(os.path.join(VERSIONS_DIR,v))]
+            include_snapshot = self.show_snapshot.get()
+            include_alpha_beta = self.show_alpha_beta.get()
+            allowed_types = ["release"]
+            if include_snapshot: allowed_types.append("snapshot")
+            if include_alpha_beta: allowed_types.extend(["old_alpha", "old_beta"])
+            for v_entry in manifest_data.get("versions", []):
+                v_id = v_entry.get("id")
+                v_type = v_entry.get("type")
+                if v_type in allowed_types and v_id not in local_versions:
+                    version_urls[v_id] = v_entry.get("url")
+
+        def on_manifest_refreshed(manifest_data):
+            """(THREAD) O cache revalidou o manifest e ele mudou."""
+            def _refresh_ui():
+                apply_manifest(manifest_data)
+                update_listbox_view()
+            try:
+                downloader_dialog.after(0, _refresh_ui)
+            except (tk.TclError, RuntimeError):
+                pass # Janela já foi fechada
+
         def fetch_versions():
             try:
                 status_label.config(text="Buscando versões...", bootstyle=INFO)
-                download_button.config(state="disabled") 
+                download_button.config(state="disabled")
                 search_entry.config(state="disabled")
                 cb_snapshot.config(state="disabled")
                 cb_alpha_beta.config(state="disabled")
-                version_urls.clear()
-                manifest_url = "https://launchermeta.mojang.com/mc/game/version_manifest.json"
-                manifest_resp = requests.get(manifest_url)
-                manifest_resp.raise_for_status()
-                manifest_data = manifest_resp.json()
-                local_versions = [v for v in os.listdir(VERSIONS_DIR) if os.path.isdir(os.path.join(VERSIONS_DIR,v))]
-                include_snapshot = self.show_snapshot.get()
-                include_alpha_beta = self.show_alpha_beta.get()
-                allowed_types = ["release"]
-                if include_snapshot: allowed_types.append("snapshot")
-                if include_alpha_beta: allowed_types.extend(["old_alpha", "old_beta"])
-                for v_entry in manifest_data.get("versions", []):
-                    v_id = v_entry.get("id")
-                    v_type = v_entry.get("type")
-                    if v_type in allowed_types and v_id not in local_versions:
-                        version_urls[v_id] = v_entry.get("url")
+                # Mostra o que está em cache na hora e revalida em segundo plano
+                manifest_data = self.http_cache.get_json(VERSION_MANIFEST_URL, on_refresh=on_manifest_refreshed)
+                apply_manifest(manifest_data)
                 status_label.config(text="Selecione uma versão para baixar:")
             except Exception as e:
                 status_label.config(text=f"Erro ao buscar: {e}", bootstyle=DANGER)
@@ -2280,10 +6245,14 @@ class RaposoLauncher(ttk.Window):
                 version_json_path = os.path.join(version_path, f"{version_id}.json")
                 self.download_file(target_url, version_json_path, f"{version_id}.json")
                 status_label.config(text=f"{version_id}.json baixado!", bootstyle=SUCCESS)
-                new_versions = sorted([v for v in os.listdir(VERSIONS_DIR) if os.path.isdir(os.path.join(VERSIONS_DIR,v))])
-                version_combo["values"] = new_versions
-                version_combo.set(version_id)
-                downloader_dialog.destroy()
+
+                def finish():
+                    self.version_catalog.update(version_id)
+                    new_versions = sorted([v for v in os.listdir(VERSIONS_DIR) if os.path.isdir(os.path.join(VERSIONS_DIR,v))])
+                    version_combo["values"] = new_versions
+                    version_combo.set(version_id)
+                    downloader_dialog.destroy()
+                preinstall_then(version_id, finish)
             except Exception as e:
                 status_label.config(text=f"Erro no download: {e}", bootstyle=DANGER)
                 download_button.config(state="normal")
@@ -2301,7 +6270,7 @@ class RaposoLauncher(ttk.Window):
         # --- SEÇÃO DA ABA FABRIC ---
         # --- ##################### ---
         
-        fabric_loader_versions = [] 
+        fabric_index = {} # LoaderIndex.fabric(): versões do jogo + loaders
         fabric_ui_frame = ttk.Frame(fabric_tab_frame)
         fabric_ui_frame.pack(fill="x", padx=10, pady=5)
         fabric_ui_frame.columnconfigure(1, weight=1)
@@ -2325,10 +6294,14 @@ class RaposoLauncher(ttk.Window):
 
         def _handle_fabric_install_success(version_id):
             fabric_status_label.config(text=f"{version_id} instalado!", bootstyle=SUCCESS)
-            new_versions = sorted([v for v in os.listdir(VERSIONS_DIR) if os.path.isdir(os.path.join(VERSIONS_DIR,v))])
-            version_combo["values"] = new_versions
-            version_combo.set(version_id) 
-            downloader_dialog.destroy()
+
+            def finish():
+                self.version_catalog.update(version_id)
+                new_versions = sorted([v for v in os.listdir(VERSIONS_DIR) if os.path.isdir(os.path.join(VERSIONS_DIR,v))])
+                version_combo["values"] = new_versions
+                version_combo.set(version_id) 
+                downloader_dialog.destroy()
+            preinstall_then(version_id, finish)
 
         def _handle_fabric_install_failure(error_msg):
             fabric_status_label.config(text=f"Erro: {error_msg}", bootstyle=DANGER)
@@ -2354,9 +6327,7 @@ class RaposoLauncher(ttk.Window):
 
                 fabric_status_label.config(text="Buscando perfil de instalação...")
                 url = f"https://meta.fabricmc.net/v2/versions/loader/{mc_version}/{loader_version}/profile/json"
-                resp = requests.get(url)
-                resp.raise_for_status()
-                data = resp.json()
+                data = self.http_cache.get_json(url)
                 version_id = data.get("id")
                 if not version_id:
                     raise Exception("JSON de perfil inválido, 'id' não encontrado.")
@@ -2379,17 +6350,10 @@ class RaposoLauncher(ttk.Window):
         
         fabric_install_button.config(command=on_install_fabric_click)
 
-        def _populate_loader_combobox(versions):
-            nonlocal fabric_loader_versions
-            if not isinstance(versions, list):
+        def _populate_loader_combobox(all_loaders):
+            if not isinstance(all_loaders, list):
                 fabric_status_label.config(text="Erro: Resposta inesperada da API.", bootstyle=DANGER)
                 return
-            fabric_loader_versions = versions
-            all_loaders = [
-                v['loader']['version'] 
-                for v in versions 
-                if isinstance(v, dict) and v.get('loader') and v['loader'].get('version')
-            ]
             if all_loaders:
                 fabric_loader_combo.config(values=all_loaders)
                 fabric_loader_combo.set(all_loaders[0]) 
@@ -2401,13 +6365,31 @@ class RaposoLauncher(ttk.Window):
                 fabric_status_label.config(text="Nenhum loader encontrado para esta versão.", bootstyle=WARNING)
             fabric_loader_combo.config(state="readonly")
 
+        def _loader_names(data):
+            """Resposta de /v2/versions/loader/<mc> -> lista de versões do loader."""
+            if not isinstance(data, list):
+                return data
+            return [
+                v['loader']['version'] 
+                for v in data 
+                if isinstance(v, dict) and v.get('loader') and v['loader'].get('version')
+            ]
+
         def fetch_fabric_loader_versions(mc_version):
+            """(THREAD) Só para versões fora do índice (sem intermediary conhecido)."""
+            def on_refreshed(data):
+                # Só atualiza se o usuário ainda estiver na mesma versão do jogo
+                def _refresh_ui():
+                    if fabric_mc_combo.get() == mc_version:
+                        _populate_loader_combobox(_loader_names(data))
+                try:
+                    downloader_dialog.after(0, _refresh_ui)
+                except (tk.TclError, RuntimeError):
+                    pass
             try:
                 url = f"https://meta.fabricmc.net/v2/versions/loader/{mc_version}"
-                resp = requests.get(url)
-                resp.raise_for_status()
-                data = resp.json()
-                downloader_dialog.after(0, _populate_loader_combobox, data)
+                data = self.http_cache.get_json(url, on_refresh=on_refreshed)
+                downloader_dialog.after(0, _populate_loader_combobox, _loader_names(data))
             except Exception as e:
                 downloader_dialog.after(0, fabric_status_label.config, {"text": f"Erro ao buscar loaders: {e}", "bootstyle": DANGER})
 
@@ -2415,6 +6397,10 @@ class RaposoLauncher(ttk.Window):
             mc_version = fabric_mc_combo.get()
             if not mc_version or "Buscando" in mc_version or "Selecione" in mc_version:
                 return
+            # Os loaders do Fabric valem para toda versão com intermediary: vem do índice, sem rede
+            if mc_version in fabric_index.get("games", ()):
+                _populate_loader_combobox(fabric_index["loaders"])
+                return
             fabric_loader_combo.config(state="disabled", values=["Buscando loaders..."])
             fabric_loader_combo.set("Buscando loaders...")
             fabric_install_button.config(state="disabled")
@@ -2423,20 +6409,44 @@ class RaposoLauncher(ttk.Window):
         
         fabric_mc_combo.bind("<<ComboboxSelected>>", on_fabric_mc_selected)
 
-        def _populate_mc_combobox(versions):
-            stable_versions = [v["version"] for v in versions if v.get("stable", True)]
-            fabric_mc_combo.config(values=stable_versions)
+        def _populate_mc_combobox(index):
+            nonlocal fabric_index
+            fabric_index = index
+            fabric_mc_combo.config(values=index["stable_games"])
             fabric_mc_combo.set("Selecione uma versão...")
             fabric_mc_combo.config(state="readonly")
             fabric_status_label.config(text="Selecione uma versão do jogo.")
 
         def fetch_fabric_mc_versions():
+            """(THREAD) Busca versões do jogo e TODOS os loaders uma vez só, e indexa."""
+            sources = {}
+            urls = {key: f"https://meta.fabricmc.net/v2/versions/{key}" for key in ("game", "loader")}
+
+            def build_index():
+                return self.loader_index.fabric(
+                    sources["game"], sources["loader"],
+                    self.http_cache.version_tag(urls["game"]), self.http_cache.version_tag(urls["loader"])
+                )
+
+            def on_refreshed(key, data):
+                sources[key] = data
+                if "game" not in sources or "loader" not in sources:
+                    return # A outra lista ainda não chegou; o fluxo principal indexa
+                index = build_index()
+                def _refresh_ui():
+                    selected = fabric_mc_combo.get()
+                    _populate_mc_combobox(index)
+                    if selected in fabric_mc_combo.cget("values"):
+                        fabric_mc_combo.set(selected) # Mantém a seleção do usuário
+                try:
+                    downloader_dialog.after(0, _refresh_ui)
+                except (tk.TclError, RuntimeError):
+                    pass
             try:
-                url = "https://meta.fabricmc.net/v2/versions/game"
-                resp = requests.get(url)
-                resp.raise_for_status()
-                data = resp.json()
-                downloader_dialog.after(0, _populate_mc_combobox, data)
+                for key, url in urls.items():
+                    sources[key] = self.http_cache.get_json(url, on_refresh=lambda data, key=key: on_refreshed(key, data))
+                index = build_index()
+                downloader_dialog.after(0, _populate_mc_combobox, index)
             except Exception as e:
                 downloader_dialog.after(0, fabric_status_label.config, {"text": f"Erro ao buscar versões: {e}", "bootstyle": DANGER})
         
@@ -2449,7 +6459,7 @@ class RaposoLauncher(ttk.Window):
         # --- SEÇÃO DA ABA FORGE (AUTOMÁTICA) ---
         # --- ################################# ---
         
-        self.forge_version_data = [] 
+        self.forge_index = {} # LoaderIndex.forge(): loaders por versão do MC
         self.forge_loader_details = {} 
 
         forge_ui_frame = ttk.Frame(forge_tab_frame)
@@ -2487,10 +6497,7 @@ class RaposoLauncher(ttk.Window):
         def _on_forge_gui_complete(jar_path, jar_name):
             """Chamado pelo botão 'Concluído' da GUI."""
             try:
-                if jar_path and os.path.exists(jar_path):
-                    os.remove(jar_path)
-                    print(f"[DEBUG Forge] Limpeza GUI: {jar_path} removido.")
-                
+                # O instalador (jar_path) fica no cache do Forge para reinstalações
                 log_path = os.path.join(BASE_DIR, jar_name + ".log")
                 if jar_name and os.path.exists(log_path):
                     os.remove(log_path)
@@ -2498,6 +6505,7 @@ class RaposoLauncher(ttk.Window):
             except Exception as e:
                  print(f"[AVISO Forge] Falha ao limpar arquivos de instalação GUI: {e}")
             finally:
+                self.version_catalog.refresh() # O instalador antigo escolhe o nome da pasta
                 new_versions = sorted([v for v in os.listdir(VERSIONS_DIR) if os.path.isdir(os.path.join(VERSIONS_DIR,v))])
                 version_combo["values"] = new_versions
                 forge_versions = [v for v in new_versions if "forge" in v.lower()]
@@ -2505,8 +6513,11 @@ class RaposoLauncher(ttk.Window):
                     version_combo.set(forge_versions[-1])
                 downloader_dialog.destroy()
 
-        def _handle_forge_install_success(is_gui=False, jar_path=None, jar_name=None):
-            """(UI Thread) Chamado quando a instalação termina."""
+        def _handle_forge_install_success(is_gui=False, jar_path=None, jar_name=None, version_id=None):
+            """
+            (UI Thread) Chamado quando a instalação termina. 'version_id' é a
+            versão criada pelo instalador (vinda do cache do Forge), se conhecida.
+            """
             if is_gui:
                 forge_status_label.config(text="Instalador GUI aberto. Siga os passos e clique em 'Concluído'.", bootstyle=INFO)
                 forge_install_button.pack_forget() 
@@ -2515,14 +6526,20 @@ class RaposoLauncher(ttk.Window):
                 forge_refresh_btn.pack(pady=20) 
             else:
                 forge_status_label.config(text="Forge instalado com sucesso!", bootstyle=SUCCESS)
+                self.version_catalog.refresh()
                 
                 new_versions = sorted([v for v in os.listdir(VERSIONS_DIR) if os.path.isdir(os.path.join(VERSIONS_DIR,v))])
                 version_combo["values"] = new_versions
                 
+                if version_id in new_versions:
+                    version_combo.set(version_id)
+                    preinstall_then(version_id, lambda: downloader_dialog.after(2000, downloader_dialog.destroy))
+                    return
+
+                # Sem saber qual pasta o instalador criou, não pré-instala nada
                 forge_versions = [v for v in new_versions if "forge" in v.lower()]
                 if forge_versions:
                     version_combo.set(forge_versions[-1])
-                
                 downloader_dialog.after(2000, downloader_dialog.destroy)
 
 
@@ -2561,7 +6578,18 @@ class RaposoLauncher(ttk.Window):
                 except Exception as e:
                     raise Exception(f"Falha ao baixar base {mc_version_base}: {e}")
 
-                # 2. Baixar o instalador
+                build = f"{mc_version_base}-{forge_version_id}"
+                version_tuple = self._version_key(mc_version_base)
+
+                # 2. Build já instalado antes? Só recoloca o que foi capturado
+                if version_tuple >= (1, 13):
+                    forge_status_label.config(text=f"Procurando {build} no cache...", bootstyle=INFO)
+                    version_ids = self.forge_cache.materialise(build, GAME_DIR)
+                    if version_ids:
+                        downloader_dialog.after(0, _handle_forge_install_success, False, None, None, ForgeInstallCache.launch_version(version_ids))
+                        return
+
+                # 3. Baixar o instalador (fica no cache para a próxima vez)
                 
                 # <--- CORREÇÃO AQUI (Formato do Nome) ---
                 # O formato do nome é SEMPRE o mesmo.
@@ -2569,19 +6597,24 @@ class RaposoLauncher(ttk.Window):
                 # <--- FIM DA CORREÇÃO ---
                 
                 url = f"https://maven.minecraftforge.net/net/minecraftforge/forge/{mc_version_base}-{forge_version_id}/{jar_name}"
-                
-                temp_dir = os.path.join(GAME_DIR, "temp_installers")
-                os.makedirs(temp_dir, exist_ok=True)
-                jar_path = os.path.join(temp_dir, jar_name)
+                jar_path = self.forge_cache.installer_path(build)
 
-                forge_status_label.config(text=f"Baixando {jar_name}...")
-                self.download_file(url, jar_path, jar_name)
+                if os.path.exists(jar_path):
+                    print(f"[FORGE] Instalador {jar_name} já está no cache.")
+                else:
+                    forge_status_label.config(text=f"Baixando {jar_name}...")
+                    # Lista de candidatos: o download é verificado com o .sha1 publicado
+                    self.download_candidates([url], jar_path, jar_name)
                 
                 java_exec = self.get_selected_java("Java do Sistema")
                 
-                version_tuple = self._version_key(mc_version_base)
-                
                 if version_tuple >= (1, 13): 
+                    before = self.forge_cache.snapshot(GAME_DIR)
+
+                    def on_prefetch(done, total):
+                        forge_status_label.config(text=f"Baixando bibliotecas ({done}/{total})...", bootstyle=INFO)
+                    profile_libraries = self._prefetch_forge_libraries(jar_path, on_prefetch)
+
                     forge_status_label.config(text="Instalando silenciosamente (Moderno)...", bootstyle=INFO)
                     
                     main_class = "net.minecraftforge.installer.SimpleInstaller" 
@@ -2618,7 +6651,15 @@ class RaposoLauncher(ttk.Window):
                         raise Exception(stderr or stdout)
                     
                     print(f"[DEBUG Forge] Saída: {stdout}")
-                    downloader_dialog.after(0, _handle_forge_install_success, False, None, None) 
+
+                    # 4. Guarda o resultado do instalador para o próximo install deste build
+                    version_ids = []
+                    try:
+                        version_ids = self.forge_cache.capture(build, GAME_DIR, before, profile_libraries)
+                    except Exception as e:
+                        print(f"[AVISO FORGE] Não foi possível capturar a instalação: {e}")
+
+                    downloader_dialog.after(0, _handle_forge_install_success, False, None, None, ForgeInstallCache.launch_version(version_ids)) 
 
                 else: 
                     is_gui_install = True 
@@ -2634,15 +6675,10 @@ class RaposoLauncher(ttk.Window):
                 downloader_dialog.after(0, _handle_forge_install_failure, str(e))
             
             finally:
-                # 4. Limpar os arquivos
+                # 5. Limpar os logs (o instalador em si fica no cache)
                 try:
-                    if not is_gui_install:
-                        if jar_path and os.path.exists(jar_path):
-                            os.remove(jar_path)
-                            print(f"[DEBUG Forge] Limpeza: {jar_path} removido.")
-                        
-                        if jar_name:
-                            log_path = os.path.join(GAME_DIR, jar_name + ".log")
+                    if not is_gui_install and jar_name:
+                        for log_path in (os.path.join(GAME_DIR, jar_name + ".log"), jar_path + ".log"):
                             if os.path.exists(log_path):
                                 os.remove(log_path)
                                 print(f"[DEBUG Forge] Limpeza: {log_path} removido.")
@@ -2664,38 +6700,10 @@ class RaposoLauncher(ttk.Window):
         def _populate_forge_loader_combobox(mc_version):
             """(UI) Preenche a combobox de loaders do Forge."""
             try:
-                self.forge_loader_details.clear()
-                labels = []
-                
-                loaders_for_mc = []
-                for entry in self.forge_version_data:
-                    requires_list = entry.get("requires", [{}])
-                    mc_ver = ""
-                    if requires_list and requires_list[0].get("uid") == "net.minecraft":
-                        mc_ver = requires_list[0].get("equals")
-
-                    if mc_ver == mc_version:
-                        loaders_for_mc.append(entry)
-
-                if not loaders_for_mc:
-                    raise Exception("Nenhuma versão encontrada.")
-
-                for entry in loaders_for_mc:
-                    loader_version_id = entry.get("version")
-                    if not loader_version_id:
-                        continue
-                        
-                    label = loader_version_id
-                    if entry.get("recommended"):
-                        label += " (Recomendado)"
-                    
-                    elif entry.get("latest") and not any(e.g.get("recommended") for e in loaders_for_mc if isinstance(e, dict)): # Garante que 'e' é um dict
-                         label += " (Mais Recente)"
-                    
-                    self.forge_loader_details[label] = loader_version_id 
-                    labels.append(label)
-                
-                labels.sort(key=lambda x: " (Recomendado)" not in x)
+                # Rótulos já prontos (e ordenados) no índice: só um lookup
+                entries = self.forge_index.get("loaders", {}).get(mc_version, [])
+                self.forge_loader_details = {label: loader_version_id for label, loader_version_id in entries}
+                labels = [label for label, _ in entries]
 
                 if labels:
                     forge_loader_combo.config(values=labels)
@@ -2727,36 +6735,11 @@ class RaposoLauncher(ttk.Window):
             _populate_forge_loader_combobox(mc_version)
 
 
-        def _populate_forge_mc_combobox(data):
-            """(UI) Preenche a combobox de versões do MC."""
-            
-            def version_key(v_str):
-                """Cria uma chave de ordenação numérica para versões (ex: 1.12.2 > 1.9.4)."""
-                parts = v_str.split('-')[0] 
-                try:
-                    return tuple(int(p) for p in parts.split('.'))
-                except ValueError:
-                    return (0,) 
-            
+        def _populate_forge_mc_combobox(index):
+            """(UI) Preenche a combobox de versões do MC (índice já filtrado: 1.7.10+)."""
             try:
-                self.forge_version_data = data.get("versions", [])
-                if not self.forge_version_data:
-                    raise Exception("JSON de versões do Forge está vazio.")
-                
-                mc_versions_set = set()
-                for entry in self.forge_version_data:
-                    requires_list = entry.get("requires", [{}])
-                    if requires_list and requires_list[0].get("uid") == "net.minecraft":
-                        mc_ver = requires_list[0].get("equals")
-                        
-                        # <--- CORREÇÃO AQUI (O FILTRO) ---
-                        # Se a versão for 1.7.10 ou mais nova, adiciona
-                        if mc_ver and version_key(mc_ver) >= (1, 7, 10):
-                            mc_versions_set.add(mc_ver)
-                        # <--- FIM DA CORREÇÃO ---
-
-                
-                mc_versions = sorted(list(mc_versions_set), key=version_key, reverse=True)
+                self.forge_index = index
+                mc_versions = index.get("mc_versions", [])
                 
                 if not mc_versions:
                     raise Exception("Nenhuma versão do MC encontrada no JSON.")
@@ -2771,13 +6754,28 @@ class RaposoLauncher(ttk.Window):
 
         def fetch_forge_mc_versions():
             """(THREAD) Busca o JSON de mapeamento do Forge."""
+            url = "https://meta.prismlauncher.org/v1/net.minecraftforge/index.json"
+
+            def on_refreshed(data):
+                index = self.loader_index.forge(data, self.http_cache.version_tag(url))
+                def _refresh_ui():
+                    selected = forge_mc_combo.get()
+                    _populate_forge_mc_combobox(index)
+                    if selected in forge_mc_combo.cget("values"):
+                        forge_mc_combo.set(selected)
+                        _populate_forge_loader_combobox(selected)
+                try:
+                    downloader_dialog.after(0, _refresh_ui)
+                except (tk.TclError, RuntimeError):
+                    pass
             try:
-                url = "https://meta.prismlauncher.org/v1/net.minecraftforge/index.json"
-                resp = requests.get(url)
-                resp.raise_for_status()
-                data = resp.json()
-                
-                downloader_dialog.after(0, _populate_forge_mc_combobox, data)
+                data = self.http_cache.get_json(url, on_refresh=on_refreshed)
+                if not data.get("versions"):
+                    raise Exception("JSON de versões do Forge está vazio.")
+                # Indexa (ou reaproveita o índice salvo) fora da thread da UI
+                index = self.loader_index.forge(data, self.http_cache.version_tag(url))
+
+                downloader_dialog.after(0, _populate_forge_mc_combobox, index)
             except Exception as e:
                 downloader_dialog.after(0, forge_status_label.config, {"text": f"Erro ao buscar versões: {e}", "bootstyle": DANGER})
 
@@ -2916,9 +6914,9 @@ class RaposoLauncher(ttk.Window):
         
         # --- Listas de Versões (Lógica de Classificação) ---
         
-        # 1. Pega todos os nomes reais e classifica
-        real_versions_list = [v for v in os.listdir(VERSIONS_DIR) if os.path.isdir(os.path.join(VERSIONS_DIR,v))]
-        real_versions_sorted = sorted(real_versions_list, key=self._version_key, reverse=True)
+        # 1. Pega todos os nomes reais, já classificados, do catálogo de versões
+        #    (só relê o JSON das versões que mudaram desde a última vez)
+        catalog_entries = self.version_catalog.sorted_entries()
 
         # 2. Cria o "banco de dados" de versões
         #    all_versions_classified = { "vanilla": [ ("1.20.1 (Vanilla)", "1.20.1"), ("1.19.4", "1.19.4") ],
@@ -2931,9 +6929,9 @@ class RaposoLauncher(ttk.Window):
         # Usaremos isso para o 'confirmar'
         dialog.version_mapping = {}
 
-        for real_name in real_versions_sorted:
-            category = self._classify_version(real_name)
-            pretty_name = self._get_pretty_version_name(real_name)
+        for real_name, entry in catalog_entries:
+            category = entry["category"]
+            pretty_name = entry["pretty"]
             
             # Lida com nomes bonitos duplicados (ex: dois "1.20.1 (Forge)")
             display_name = pretty_name
@@ -3169,6 +7167,9 @@ class RaposoLauncher(ttk.Window):
         os.makedirs(VERSIONS_DIR, exist_ok=True)
         os.makedirs(LIBRARIES_DIR, exist_ok=True)
         os.makedirs(ASSETS_DIR, exist_ok=True)
+
+        # Catálogo das versões instaladas (um por GAME_DIR)
+        self.version_catalog = VersionCatalog(VERSIONS_DIR, self._describe_version)
         
         print(f"[DEBUG] GAME_DIR definido para: {GAME_DIR}")
 
@@ -3363,12 +7364,17 @@ class RaposoLauncher(ttk.Window):
         if not file_path:
             return # Usuário cancelou
 
+        exclude_junk = messagebox.askyesno(
+            "Exportar Modpack",
+            "Deixar de fora logs, crash reports e caches?\n(Recomendado: o .fox fica menor)"
+        )
+
         # 3. Inicia o thread para fazer o trabalho pesado
         try:
             self.status_label.config(text=f"Exportando {modpack_name}...", bootstyle=INFO)
             threading.Thread(
                 target=self._export_modpack_thread, 
-                args=(modpack_name, file_path), 
+                args=(modpack_name, file_path, exclude_junk), 
                 daemon=True
             ).start()
             
@@ -3460,33 +7466,26 @@ class RaposoLauncher(ttk.Window):
             # Limpa o status
             self.ui_queue.put({"type": "status", "text": ""})
 
-    def _export_modpack_thread(self, modpack_name, file_path):
-        """(THREAD) Cria o arquivo .zip e o renomeia para .fox."""
-        
-        # 1. Define o caminho-base para o 'shutil' (ex: C:/.../Familia-Rp)
-        # Ele vai criar "C:/.../Familia-Rp.zip"
-        save_path_without_extension = file_path.rsplit('.', 1)[0]
-        
-        created_zip_path = None # Para o 'finally'
+    def _export_modpack_thread(self, modpack_name, file_path, exclude_junk=False):
+        """(THREAD) Escreve o .fox direto no destino (FoxExporter: zip paralelo)."""
         
+        last_percent = -1
+
+        def on_progress(done, total):
+            nonlocal last_percent
+            percent = int(done * 100 / total) if total else 100
+            if percent != last_percent:
+                last_percent = percent
+                self.ui_queue.put({"type": "progress_set_value", "value": percent})
+                self.ui_queue.put({"type": "status", "text": f"Exportando {modpack_name} ({percent}%)..."})
+
         try:
-            # 2. Cria o arquivo .zip
-            created_zip_path = shutil.make_archive(
-                base_name=save_path_without_extension, 
-                format="zip",
-                root_dir=MODPACKS_DIR,
-                base_dir=modpack_name
-            )
-            
-            # <--- CORREÇÃO AQUI (RENOMEAR) ---
-            # 3. Renomeia o .zip para .fox (a mágica)
-            # (Se o .fox já existir, apaga antes de renomear)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            os.rename(created_zip_path, file_path) # Renomeia "Familia-Rp.zip" para "Familia-Rp.fox"
-            # <--- FIM DA CORREÇÃO ---
+            # 1. Comprime (só o que vale a pena) em paralelo, em streaming para o .fox
+            self.ui_queue.put({"type": "progress_start_determinate", "max": 100})
+            exporter = FoxExporter(MODPACKS_DIR, modpack_name, exclude_junk=exclude_junk)
+            exporter.export(file_path, on_progress)
             
-            # 4. Envia a mensagem de sucesso
+            # 2. Envia a mensagem de sucesso
             self.ui_queue.put({
                 "type": "popup_success",
                 "title": "Sucesso",
@@ -3494,17 +7493,21 @@ class RaposoLauncher(ttk.Window):
             })
             
         except Exception as e:
-            # 5. Envia a mensagem de erro
+            # 3. Envia a mensagem de erro
             self.ui_queue.put({
                 "type": "popup_error",
                 "text": f"Falha ao criar o arquivo .fox: {e}"
             })
-            # Tenta apagar o .zip que falhou, se ele existir
-            if created_zip_path and os.path.exists(created_zip_path):
-                os.remove(created_zip_path)
+            # Tenta apagar o .fox incompleto, se ele existir
+            try:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            except OSError:
+                pass
                 
         finally:
             # Limpa o status
+            self.ui_queue.put({"type": "progress_stop"})
             self.ui_queue.put({"type": "status", "text": ""})
 
     # ---------------------------
@@ -3633,35 +7636,208 @@ class RaposoLauncher(ttk.Window):
             arg_str = arg_str.replace(key, value)
         return arg_str
 
-    def download_file(self, url, path, filename):
-        """Baixa um arquivo de um URL para um caminho específico (Thread-safe)."""
-        
+    def _get_download_buffer(self):
+        """Retorna o buffer de download (grande e reutilizável) deste thread."""
+        buf = getattr(_download_buffers, "buf", None)
+        if buf is None:
+            buf = bytearray(DOWNLOAD_BUFFER_SIZE)
+            _download_buffers.buf = buf
+        return buf
+
+    def download_file(self, url, path, filename, sha1=None, sha512=None, size=None):
+        """
+        Baixa um arquivo de um URL para um caminho específico (Thread-safe).
+
+        Se 'sha1', 'sha512' e/ou 'size' forem passados, o arquivo é verificado
+        DURANTE o download (o hash é calculado sobre os próprios blocos
+        recebidos) e só é movido para 'path' se bater. Um download corrompido
+        nunca chega no caminho final.
+        """
+
         os.makedirs(os.path.dirname(path), exist_ok=True)
-        
+
+        # Baixa para um arquivo temporário (por thread) e só renomeia no fim
+        part_path = f"{path}.{threading.get_ident()}.part"
+
         try:
             print(f"[DOWNLOAD] (Trabalhador) Baixando: {filename}")
-            
+
             # <--- CORREÇÃO AQUI (O "DISFARCE") ---
             # Define um "User-Agent" para parecer um navegador
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'
             }
-            
+
+            hashers = []
+            if sha1:
+                hashers.append(("sha1", hashlib.sha1(), sha1.lower()))
+            if sha512:
+                hashers.append(("sha512", hashlib.sha512(), sha512.lower()))
+
+            buf = self._get_download_buffer()
+            view = memoryview(buf)
+            total = 0
+
             # <--- MUDANÇA AQUI: Usar 'with' para garantir que a ligação fecha ---
-            with requests.get(url, stream=True, headers=headers) as response:
+            with requests.get(url, stream=True, headers=headers, timeout=30) as response:
                 response.raise_for_status()
-                
-                with open(path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
+                response.raw.decode_content = True # gzip/deflate transparentes
+
+                with open(part_path, 'wb') as f:
+                    while True:
+                        n = response.raw.readinto(buf)
+                        if not n:
+                            break
+                        chunk = view[:n]
                         f.write(chunk)
+                        for _, hasher, _ in hashers:
+                            hasher.update(chunk)
+                        total += n
             # --- FIM DA MUDANÇA ---
-            
-            return filename 
-            
+
+            # Verificação (sem reler o arquivo do disco)
+            if size is not None and total != size:
+                raise HashMismatchError(f"{filename}: tamanho {total} != {size} esperado")
+            for algo, hasher, expected in hashers:
+                if hasher.hexdigest() != expected:
+                    raise HashMismatchError(f"{filename}: {algo} não confere (download corrompido)")
+
+            os.replace(part_path, path)
+            return filename
+
         except Exception as e:
             print(f"[DOWNLOAD] FALHA ao baixar {filename}: {e}")
+            try:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+            except OSError:
+                pass
             raise e
 
+    def download_to_instance(self, url, path, filename, sha1=None, sha512=None, size=None):
+        """
+        (THREAD) download_file para conteúdo de instância (mods, packs):
+        passa pelo store compartilhado, então um arquivo que outro modpack já
+        tem vira só um hardlink.
+        """
+        return self.content_store.download(self.download_file, url, path, filename, sha1=sha1, sha512=sha512, size=size)
+
+    def download_candidates(self, urls, path, filename, sha1=None):
+        """
+        (THREAD) Baixa de um URL fixo (str) ou de uma lista ordenada de URLs
+        candidatos (bibliotecas Maven, via self.maven).
+        """
+        if isinstance(urls, str):
+            return self.download_file(urls, path, filename, sha1=sha1)
+        return self.maven.download(urls, path, filename, self.download_file, sha1=sha1)
+
+    def _prefetch_forge_libraries(self, jar_path, status_cb=None, max_workers=10):
+        """
+        (THREAD) Baixa em paralelo (pelo motor do launcher, com resolvedor
+        Maven) as bibliotecas do install_profile do Forge antes de rodar os
+        processors; o instalador acha tudo no lugar e não baixa em série.
+        Retorna os caminhos relativos ao GAME_DIR das bibliotecas do perfil.
+        """
+        libraries = self.forge_cache.profile_libraries(jar_path)
+        tasks = []
+        for lib_name, lib_path_str, url, sha1 in libraries:
+            lib_path = os.path.join(LIBRARIES_DIR, lib_path_str)
+            # Sem URL = gerado pelos processors (ex: client patcheado)
+            if not url or os.path.exists(lib_path):
+                continue
+            urls = self.maven.candidates(lib_name, lib_path_str, artifact_url=url)
+            if not self.maven.all_missing(urls):
+                tasks.append((urls, lib_path, lib_path_str.split("/")[-1], sha1))
+
+        if tasks:
+            print(f"[FORGE] Pré-baixando {len(tasks)} bibliotecas do instalador...")
+            done = 0
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(self.download_candidates, urls, path, filename, sha1=sha1): filename
+                    for (urls, path, filename, sha1) in tasks
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        # O instalador tenta de novo do jeito dele
+                        print(f"[AVISO FORGE] Falha ao pré-baixar {futures[future]}: {e}")
+                    done += 1
+                    if status_cb: status_cb(done, len(tasks))
+        return ["libraries/" + lib_path_str for _, lib_path_str, _, _ in libraries]
+
+    def _materialise_legacy_assets(self, asset_index, index_data, game_dir):
+        """
+        Monta o layout "por nome" que as versões antigas esperam, usando
+        HARDLINKS para os objetos em assets/objects (sem duplicar disco).
+
+        - 'virtual': assets/virtual/<índice>/ (compartilhado entre instâncias)
+        - 'map_to_resources': <instância>/resources/
+
+        É incremental: um pequeno manifesto na pasta guarda o hash de cada
+        arquivo já montado, então só o que mudou é refeito.
+        Retorna a pasta que deve ser usada como ${game_assets}.
+        """
+        if index_data.get("map_to_resources"):
+            target_root = os.path.join(game_dir, "resources")
+        else:
+            target_root = os.path.join(ASSETS_DIR, "virtual", asset_index)
+        os.makedirs(target_root, exist_ok=True)
+
+        manifest_path = os.path.join(target_root, ".raposo_assets.json")
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                materialised = json.load(f)
+        except Exception:
+            materialised = {}
+
+        objects = index_data.get("objects", {})
+        linked, copied, missing = 0, 0, 0
+        new_manifest = {}
+
+        for asset_name, info in objects.items():
+            asset_hash = info.get("hash")
+            if not asset_hash:
+                continue
+            target_path = os.path.join(target_root, *asset_name.split("/"))
+
+            if materialised.get(asset_name) == asset_hash and os.path.exists(target_path):
+                new_manifest[asset_name] = asset_hash # Já está certo
+                continue
+
+            source_path = os.path.join(ASSETS_DIR, "objects", asset_hash[:2], asset_hash)
+            if not os.path.exists(source_path):
+                missing += 1
+                continue
+            try:
+                if link_or_copy(source_path, target_path):
+                    linked += 1
+                else:
+                    copied += 1
+                new_manifest[asset_name] = asset_hash
+            except OSError as e:
+                print(f"[ASSET] Falha ao montar {asset_name}: {e}")
+
+        # Remove arquivos que NÓS montamos e que saíram do índice
+        for asset_name in set(materialised) - set(new_manifest):
+            if asset_name in objects:
+                continue
+            try:
+                os.remove(os.path.join(target_root, *asset_name.split("/")))
+            except OSError:
+                pass
+
+        try:
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump(new_manifest, f, separators=(",", ":"))
+        except OSError as e:
+            print(f"[ASSET] Não foi possível salvar o manifesto de {target_root}: {e}")
+
+        print(f"[ASSET] Layout legado em {target_root}: {linked} hardlinks, {copied} cópias, "
+              f"{len(new_manifest) - linked - copied} já prontos, {missing} faltando.")
+        return target_root
+
     def download_assets(self, asset_index_path):
         """Lê o asset_index.json e baixa todos os assets (Thread-safe)."""
         
@@ -3691,7 +7867,7 @@ class RaposoLauncher(ttk.Window):
             if not os.path.exists(asset_path):
                 asset_url = f"{base_url}{hash_prefix}/{asset_hash}"
                 filename = asset_name.split('/')[-1]
-                assets_to_check.append((asset_url, asset_path, filename))
+                assets_to_check.append((asset_url, asset_path, filename, asset_hash))
         
         total_to_download = len(assets_to_check)
         if total_to_download == 0:
@@ -3703,12 +7879,12 @@ class RaposoLauncher(ttk.Window):
         # Inicia a barra de progresso DETERMINADA
         self.ui_queue.put({"type": "progress_start_determinate", "max": total_to_download})
 
-        for i, (asset_url, asset_path, filename) in enumerate(assets_to_check):
+        for i, (asset_url, asset_path, filename, asset_hash) in enumerate(assets_to_check):
             # Atualiza a UI
             self.ui_queue.put({"type": "status", "text": f"Baixando asset ({i+1}/{total_to_download})"})
             
-            # Baixa o arquivo
-            self.download_file(asset_url, asset_path, filename)
+            # Baixa o arquivo (o nome do objeto é o próprio sha1)
+            self.download_file(asset_url, asset_path, filename, sha1=asset_hash)
             
             # Avança a barra
             self.ui_queue.put({"type": "progress_step"})
@@ -3788,6 +7964,371 @@ class RaposoLauncher(ttk.Window):
             
         self.after(100, self.process_ui_queue)
 
+    def _preinstall_version_thread(self, version_id, dialog, progressbar, status_label, on_done):
+        """
+        (THREAD) "Instalar completo": roda o mesmo plano de download do START
+        (e extrai os nativos) agora, com o progresso na janela do downloader.
+        Assim o primeiro START só precisa montar o comando e abrir o Java.
+        Se algo falhar, a versão continua instalada: o START baixa o que faltou.
+        """
+        def ui(message):
+            def _apply():
+                if not dialog.winfo_exists():
+                    return
+                kind = message.get("type")
+                if kind == "status":
+                    status_label.config(text=message.get("text", ""), bootstyle=message.get("style", INFO))
+                elif kind == "progress_start_indeterminate":
+                    progressbar.config(mode="indeterminate", value=0)
+                    progressbar.start()
+                elif kind == "progress_start_determinate":
+                    progressbar.stop()
+                    progressbar.config(mode="determinate", maximum=message.get("max", 100), value=0)
+                elif kind == "progress_set_value":
+                    progressbar.config(value=message.get("value", 0))
+            try:
+                dialog.after(0, _apply)
+            except (tk.TclError, RuntimeError):
+                pass # Janela já foi fechada
+
+        delay = 800
+        try:
+            ui({"type": "status", "text": f"Preparando {version_id}..."})
+            plan = self._build_download_plan(version_id, ui)
+            failed = self._run_download_plan(plan, ui)
+            ui({"type": "status", "text": "Extraindo nativos..."})
+            self.extract_natives(plan["version_data"], version_id)
+            if failed:
+                ui({"type": "status", "text": f"⚠ {len(failed)} arquivos falharam; o START tenta de novo.", "style": WARNING})
+                delay = 3000
+            else:
+                ui({"type": "status", "text": f"✅ {version_id} instalado completo!", "style": SUCCESS})
+        except Exception as e:
+            print(f"[INSTALL] Instalação completa de {version_id} falhou: {e}")
+            ui({"type": "status", "text": f"⚠ Instalação completa falhou ({e}); o START baixa o que faltar.", "style": WARNING})
+            delay = 3000
+        try:
+            dialog.after(0, progressbar.stop)
+            dialog.after(delay, on_done)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _build_download_plan(self, version, ui=None):
+        """
+        (THREAD) Monta o plano de download de uma versão: garante os JSONs
+        (filho e pai), junta as bibliotecas e lista o que falta no disco
+        (jar, bibliotecas, nativos e assets). Não baixa nada além dos JSONs
+        e do índice de assets. 'ui' recebe as mensagens de progresso
+        (padrão: a ui_queue da janela principal).
+        """
+        ui = ui or self.ui_queue.put
+        # --- 1. PREPARAR LISTA DE TAREFAS DE DOWNLOAD ---
+        tasks_to_download = [] 
+        version_data = {}      
+        lib_features = {}      
+        
+        version_dir = os.path.join(VERSIONS_DIR, version)
+        version_json = os.path.join(version_dir, f"{version}.json")
+        
+        if not os.path.exists(version_json):
+            is_vanilla = "forge" not in version.lower() and \
+                         "fabric" not in version.lower() and \
+                         "optifine" not in version.lower()
+            
+            if is_vanilla:
+                try:
+                    print(f"[DEBUG] Tentando baixar .json vanilla para {version}")
+                    self._ensure_vanilla_json_exists(version) 
+                except Exception as e:
+                    raise FileNotFoundError(f"Falha ao baixar o JSON '{version}' da Mojang: {e}")
+            else:
+                raise FileNotFoundError(f"JSON '{version}' não encontrado! A versão foi instalada corretamente na pasta 'game/versions'?")
+        
+        with open(version_json, "r", encoding="utf-8") as f: child_data = json.load(f)
+             
+        parent_version = child_data.get("inheritsFrom")
+        parent_json_path = None
+        parent_data = {}
+        
+        if parent_version:
+            parent_json_path = os.path.join(VERSIONS_DIR, parent_version, f"{parent_version}.json")
+            if not os.path.exists(parent_json_path):
+                try:
+                    self._ensure_vanilla_json_exists(parent_version)
+                except Exception as e:
+                     raise FileNotFoundError(f"Falha ao baixar o JSON pai '{parent_version}': {e}")
+        
+        # --- 2. JUNTAR DADOS DO PAI (VANILLA) E FILHO (LOADER) ---
+        ui({"type": "status", "text": "Contando arquivos..."})
+        ui({"type": "progress_start_indeterminate"})
+        
+        tasks_to_download = [] 
+
+        with open(version_json, "r", encoding="utf-8") as f: child_data = json.load(f)
+        if parent_json_path and os.path.exists(parent_json_path):
+            with open(parent_json_path, "r", encoding="utf-8") as f: parent_data = json.load(f)
+
+        version_data = parent_data.copy()
+        version_data.update(child_data) 
+        
+        lib_map = {} 
+
+        # --- CORREÇÃO 1 (get_lib_key): Chave única para bibliotecas ---
+        def get_lib_key(lib_entry):
+            """Cria uma chave única para a biblioteca, preservando o classificador."""
+            try:
+                name = lib_entry.get("name", "")
+                parts = name.split(":")
+                
+                if len(parts) >= 4: # Ex: org.lwjgl:lwjgl:3.3.3:natives-windows
+                    # Chave = org.lwjgl:lwjgl:natives-windows
+                    return f"{parts[0]}:{parts[1]}:{parts[3]}"
+                elif len(parts) == 3: # Ex: org.lwjgl:lwjgl:3.3.3
+                    # Chave = org.lwjgl:lwjgl
+                    return f"{parts[0]}:{parts[1]}"
+                else:
+                    return name # Fallback
+            except Exception:
+                pass
+            return lib_entry.get("name")
+        # --- FIM DA CORREÇÃO 1 ---
+        
+        # --- ###################################### ---
+        # --- CORREÇÃO (Download): Detetar ${arch} ---
+        # --- ###################################### ---
+        is_64bit = platform.machine().endswith('64')
+        arch = "64" if is_64bit else "32"
+        os_name = platform.system().lower()
+        current_os = "windows" if "windows" in os_name else "linux" if "linux" in os_name else "osx"
+        # --- FIM DA CORREÇÃO ---
+
+        for lib in parent_data.get("libraries", []):
+            key = get_lib_key(lib)
+            if key:
+                lib_map[key] = lib
+                
+        for lib in child_data.get("libraries", []):
+            key = get_lib_key(lib)
+            if key:
+                lib_map[key] = lib 
+        
+        version_data["libraries"] = list(lib_map.values())
+        version_data["mainClass"] = child_data.get("mainClass", parent_data.get("mainClass"))
+        
+        main_class_detectada = version_data.get("mainClass", "")
+        is_modern_forge = main_class_detectada == "cpw.mods.bootstraplauncher.BootstrapLauncher"
+        is_modern_fabric = main_class_detectada == "net.fabricmc.loader.impl.launch.knot.KnotClient"
+
+        main_jar = os.path.join(version_dir, f"{version}.jar")
+        if not os.path.exists(main_jar):
+            client_info = child_data.get("downloads", {}).get("client", {})
+            url = client_info.get("url")
+            if url: tasks_to_download.append((url, main_jar, f"{version}.jar", client_info.get("sha1")))
+
+        parent_jar = None
+        if parent_version:
+            parent_jar = os.path.join(VERSIONS_DIR, parent_version, f"{parent_version}.jar")
+            if not os.path.exists(parent_jar):
+                client_info = parent_data.get("downloads", {}).get("client", {})
+                url = client_info.get("url")
+                if url: tasks_to_download.append((url, parent_jar, f"{parent_version}.jar", client_info.get("sha1")))
+
+        # --- 3c. Contar Bibliotecas ---
+        for lib in version_data.get("libraries", []):
+            if not self.check_rules(lib, lib_features): continue
+            
+            lib_name = lib.get("name", "NOME_DESCONHECIDO")
+            downloads = lib.get("downloads", {})
+            artifact = downloads.get("artifact")
+            classifiers = downloads.get("classifiers")
+            natives = lib.get("natives")
+            
+            lib_path, url, filename, lib_path_str = None, None, None, None
+            
+            if artifact and artifact.get("path"):
+                lib_path_str = artifact.get("path")
+            
+            # --- #################################################### ---
+            # --- CORREÇÃO (Download): Lógica Unificada (LWJGL 2/3 + Fabric)
+            # --- #################################################### ---
+            elif not artifact:
+                try:
+                    parts = lib_name.split(':')
+                    group = parts[0].replace('.', '/') # ex: org.lwjgl.lwjgl
+                    name = parts[1]                     # ex: lwjgl
+                    ver = parts[2]                      # ex: 2.9.4
+                    
+                    filename_base = f"{name}-{ver}"
+                    
+                    # Tenta encontrar um classificador nativo
+                    native_classifier = lib.get("natives", {}).get(current_os)
+                    
+                    if native_classifier:
+                        # Substitui ${arch} pelo valor real (32 ou 64)
+                        native_classifier = native_classifier.replace("${arch}", arch)
+                        filename = f"{filename_base}-{native_classifier}.jar"
+                    
+                    # --- CORREÇÃO IMPORTANTE AQUI ---
+                    # Se for "platform" (ex: jinput-platform), NÃO é um JAR principal.
+                    # Mas se *não for* "platform" E *não for* um nativo para este SO,
+                    # é um JAR principal (ex: lwjgl.jar, fabric-loader.jar)
+                    elif "platform" not in lib_name:
+                         filename = f"{filename_base}.jar"
+                    else:
+                        # É um "platform" ou um nativo para outro SO, ignora.
+                        continue
+                    # --- FIM DA CORREÇÃO ---
+
+                    lib_path_str = f"{group}/{name}/{ver}/{filename}"
+                except Exception as e:
+                    print(f"[DEBUG] Falha ao construir caminho para {lib_name}: {e}")
+                    continue 
+            # --- FIM DA CORREÇÃO DE DOWNLOAD ---
+            
+            if lib_path_str:
+                lib_path = os.path.join(LIBRARIES_DIR, lib_path_str)
+                filename = lib_path_str.split('/')[-1]
+
+                if lib_path and not os.path.exists(lib_path):
+                    # Lista ordenada de repositórios para ESTA biblioteca
+                    urls = self.maven.candidates(
+                        lib_name, lib_path_str,
+                        repo_url=lib.get("url"),
+                        artifact_url=artifact.get("url") if artifact else None
+                    )
+                    if self.maven.all_missing(urls):
+                        print(f"[MAVEN] {lib_name} não existe em nenhum repositório (cache negativo), pulando.")
+                        continue
+                    lib_sha1 = artifact.get("sha1") if artifact else None
+                    tasks_to_download.append((urls, lib_path, filename, lib_sha1))
+            
+            if classifiers or natives:
+                native_classifier_key = None
+                if natives: native_classifier_key = natives.get(current_os)
+                if not native_classifier_key: native_classifier_key = f"natives-{current_os}"
+                
+                # --- CORREÇÃO (Download): Substitui ${arch}
+                native_classifier_key = native_classifier_key.replace("${arch}", arch)
+                
+                native_info = classifiers.get(native_classifier_key)
+                if native_info:
+                    native_path = os.path.join(LIBRARIES_DIR, native_info["path"])
+                    if not os.path.exists(native_path):
+                        tasks_to_download.append((native_info["url"], native_path, native_info["path"].split('/')[-1], native_info.get("sha1")))
+
+        # 3d. Contar Assets
+        asset_index = version_data.get("assetIndex", {}).get("id", "legacy")
+        asset_index_url = version_data.get("assetIndex", {}).get("url")
+        asset_index_path = os.path.join(ASSETS_DIR, "indexes", f"{asset_index}.json")
+        
+        if asset_index_url and not os.path.exists(asset_index_path):
+            self.download_file(
+                asset_index_url, asset_index_path, f"{asset_index}.json",
+                sha1=version_data.get("assetIndex", {}).get("sha1")
+            )
+
+        asset_refs = None
+        asset_index_data = {}
+        asset_objects = {}
+        asset_index_sha1 = None
+        asset_task_paths = set()
+
+        if os.path.exists(asset_index_path):
+            with open(asset_index_path, "rb") as f: raw_index = f.read()
+            asset_index_data = json.loads(raw_index)
+            asset_objects = asset_index_data.get("objects", {})
+            asset_index_sha1 = hashlib.sha1(raw_index).hexdigest()
+
+            # --- Delta entre índices: só checa objetos que nenhum índice
+            # já materializado referencia ---
+            asset_refs = AssetRefTable(ASSETS_DIR)
+            if asset_refs.is_materialised(asset_index, asset_index_sha1) and asset_refs.spot_check(
+                info["hash"] for info in asset_objects.values() if info.get("hash")
+            ):
+                objects_to_check = {}
+                print(f"[ASSET] Índice '{asset_index}' já materializado. Nada a checar.")
+            else:
+                # Se a amostra falhou, a tabela foi zerada e o delta é o índice inteiro
+                objects_to_check = asset_refs.delta(asset_objects)
+                print(f"[ASSET] Índice '{asset_index}': {len(asset_objects) - len(objects_to_check)} objetos "
+                      f"reaproveitados de outros índices, {len(objects_to_check)} para checar.")
+
+            base_url = "https://resources.download.minecraft.net/"
+            for asset_name, info in objects_to_check.items():
+                asset_hash = info.get("hash")
+                if not asset_hash: continue
+                hash_prefix = asset_hash[:2]
+                asset_path = os.path.join(ASSETS_DIR, "objects", hash_prefix, asset_hash)
+                if not os.path.exists(asset_path):
+                    asset_url = f"{base_url}{hash_prefix}/{asset_hash}"
+                    # O nome do objeto É o sha1 dele
+                    tasks_to_download.append((asset_url, asset_path, asset_hash[:10], asset_hash))
+                    asset_task_paths.add(asset_path)
+
+        return {
+            "version": version, "tasks": tasks_to_download, "version_data": version_data,
+            "lib_features": lib_features, "main_jar": main_jar, "parent_jar": parent_jar,
+            "asset_index": asset_index, "asset_index_data": asset_index_data,
+            "asset_objects": asset_objects, "asset_index_sha1": asset_index_sha1,
+            "asset_refs": asset_refs, "asset_task_paths": asset_task_paths,
+            "is_modern_forge": is_modern_forge, "is_modern_fabric": is_modern_fabric,
+        }
+
+    def _run_download_plan(self, plan, ui=None):
+        """(THREAD) Baixa as tarefas do plano em paralelo. Retorna os caminhos que falharam."""
+        ui = ui or self.ui_queue.put
+        tasks_to_download = plan["tasks"]
+        asset_refs, asset_task_paths = plan["asset_refs"], plan["asset_task_paths"]
+        asset_index, asset_index_sha1, asset_objects = plan["asset_index"], plan["asset_index_sha1"], plan["asset_objects"]
+
+        # --- 4. EXECUTAR DOWNLOADS PARALELOS ---
+        total_downloads = len(tasks_to_download)
+        if total_downloads > 0:
+            print(f"[DOWNLOAD] Total de {total_downloads} arquivos faltando. Iniciando {min(total_downloads, 10)} downloads paralelos...")
+            ui({"type": "progress_start_determinate", "max": total_downloads})
+            
+            completed_count = 0
+            last_reported_percent = -1
+            failed_paths = set()
+            
+            with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+                futures = {
+                    executor.submit(self.download_candidates, url, path, filename, sha1=sha1): (url, path, filename)
+                    for (url, path, filename, sha1) in tasks_to_download
+                }
+                
+                for future in concurrent.futures.as_completed(futures):
+                    url, path, filename = futures[future]
+                    try:
+                        result = future.result() 
+                    except Exception as e:
+                        failed_paths.add(path)
+                        # Artefatos "fantasma" (ex: twitch, jinput-platform) que não
+                        # existem em lugar nenhum: ficam no cache negativo do resolvedor
+                        if isinstance(e, ArtifactMissingError):
+                            print(f"[AVISO] Ignorando artefato inexistente: {filename}")
+                        else:
+                            print(f"FALHA no download (trabalhador): {filename} - {e}")
+                    
+                    completed_count += 1
+                    current_percent = int((completed_count / total_downloads) * 100)
+                    
+                    if current_percent > last_reported_percent:
+                        ui({"type": "progress_set_value", "value": completed_count})
+                        ui({"type": "status", "text": f"Baixando ({current_percent}%)"})
+                        last_reported_percent = current_percent
+            
+            print(f"[DOWNLOAD] Downloads paralelos concluídos.")
+        else:
+            failed_paths = set()
+            print("[DEBUG] Todos os arquivos já estão baixados e atualizados.")
+
+        # Todos os objetos do índice estão no disco: registra na tabela
+        if asset_refs is not None and not (asset_task_paths & failed_paths) \
+                and not asset_refs.is_materialised(asset_index, asset_index_sha1):
+            asset_refs.mark_materialised(asset_index, asset_index_sha1, asset_objects)
+        return failed_paths
+
     def on_start_button_click(self):
         """O que acontece quando o botão 'START' é clicado (UI Thread)."""
         
@@ -3849,264 +8390,22 @@ class RaposoLauncher(ttk.Window):
             self.ui_queue.put({"type": "status", "text": "Verificando arquivos..."})
             self.ui_queue.put({"type": "progress_start_indeterminate"})
 
-            # --- 1. PREPARAR LISTA DE TAREFAS DE DOWNLOAD ---
-            tasks_to_download = [] 
-            version_data = {}      
-            lib_features = {}      
-            
-            version_dir = os.path.join(VERSIONS_DIR, version)
-            version_json = os.path.join(version_dir, f"{version}.json")
-            
-            if not os.path.exists(version_json):
-                is_vanilla = "forge" not in version.lower() and \
-                             "fabric" not in version.lower() and \
-                             "optifine" not in version.lower()
-                
-                if is_vanilla:
-                    try:
-                        print(f"[DEBUG] Tentando baixar .json vanilla para {version}")
-                        self._ensure_vanilla_json_exists(version) 
-                    except Exception as e:
-                        raise FileNotFoundError(f"Falha ao baixar o JSON '{version}' da Mojang: {e}")
-                else:
-                    raise FileNotFoundError(f"JSON '{version}' não encontrado! A versão foi instalada corretamente na pasta 'game/versions'?")
-            
-            with open(version_json, "r", encoding="utf-8") as f: child_data = json.load(f)
-                 
-            parent_version = child_data.get("inheritsFrom")
-            parent_json_path = None
-            parent_data = {}
-            
-            if parent_version:
-                parent_json_path = os.path.join(VERSIONS_DIR, parent_version, f"{parent_version}.json")
-                if not os.path.exists(parent_json_path):
-                    try:
-                        self._ensure_vanilla_json_exists(parent_version)
-                    except Exception as e:
-                         raise FileNotFoundError(f"Falha ao baixar o JSON pai '{parent_version}': {e}")
-            
-            # --- 2. JUNTAR DADOS DO PAI (VANILLA) E FILHO (LOADER) ---
-            self.ui_queue.put({"type": "status", "text": "Contando arquivos..."})
-            self.ui_queue.put({"type": "progress_start_indeterminate"})
-            
-            tasks_to_download = [] 
-
-            with open(version_json, "r", encoding="utf-8") as f: child_data = json.load(f)
-            if parent_json_path and os.path.exists(parent_json_path):
-                with open(parent_json_path, "r", encoding="utf-8") as f: parent_data = json.load(f)
-
-            version_data = parent_data.copy()
-            version_data.update(child_data) 
-            
-            lib_map = {} 
-
-            # --- CORREÇÃO 1 (get_lib_key): Chave única para bibliotecas ---
-            def get_lib_key(lib_entry):
-                """Cria uma chave única para a biblioteca, preservando o classificador."""
-                try:
-                    name = lib_entry.get("name", "")
-                    parts = name.split(":")
-                    
-                    if len(parts) >= 4: # Ex: org.lwjgl:lwjgl:3.3.3:natives-windows
-                        # Chave = org.lwjgl:lwjgl:natives-windows
-                        return f"{parts[0]}:{parts[1]}:{parts[3]}"
-                    elif len(parts) == 3: # Ex: org.lwjgl:lwjgl:3.3.3
-                        # Chave = org.lwjgl:lwjgl
-                        return f"{parts[0]}:{parts[1]}"
-                    else:
-                        return name # Fallback
-                except Exception:
-                    pass
-                return lib_entry.get("name")
-            # --- FIM DA CORREÇÃO 1 ---
-            
-            # --- ###################################### ---
-            # --- CORREÇÃO (Download): Detetar ${arch} ---
-            # --- ###################################### ---
-            is_64bit = platform.machine().endswith('64')
-            arch = "64" if is_64bit else "32"
-            os_name = platform.system().lower()
-            current_os = "windows" if "windows" in os_name else "linux" if "linux" in os_name else "osx"
-            # --- FIM DA CORREÇÃO ---
-
-            for lib in parent_data.get("libraries", []):
-                key = get_lib_key(lib)
-                if key:
-                    lib_map[key] = lib
-                    
-            for lib in child_data.get("libraries", []):
-                key = get_lib_key(lib)
-                if key:
-                    lib_map[key] = lib 
-            
-            version_data["libraries"] = list(lib_map.values())
-            version_data["mainClass"] = child_data.get("mainClass", parent_data.get("mainClass"))
-            
-            main_class_detectada = version_data.get("mainClass", "")
-            is_modern_forge = main_class_detectada == "cpw.mods.bootstraplauncher.BootstrapLauncher"
-            is_modern_fabric = main_class_detectada == "net.fabricmc.loader.impl.launch.knot.KnotClient"
-
-            main_jar = os.path.join(version_dir, f"{version}.jar")
-            if not os.path.exists(main_jar):
-                url = child_data.get("downloads", {}).get("client", {}).get("url")
-                if url: tasks_to_download.append((url, main_jar, f"{version}.jar"))
-
-            parent_jar = None
-            if parent_version:
-                parent_jar = os.path.join(VERSIONS_DIR, parent_version, f"{parent_version}.jar")
-                if not os.path.exists(parent_jar):
-                    url = parent_data.get("downloads", {}).get("client", {}).get("url")
-                    if url: tasks_to_download.append((url, parent_jar, f"{parent_version}.jar"))
-
-            # --- 3c. Contar Bibliotecas ---
-            for lib in version_data.get("libraries", []):
-                if not self.check_rules(lib, lib_features): continue
-                
-                lib_name = lib.get("name", "NOME_DESCONHECIDO")
-                downloads = lib.get("downloads", {})
-                artifact = downloads.get("artifact")
-                classifiers = downloads.get("classifiers")
-                natives = lib.get("natives")
-                
-                lib_path, url, filename, lib_path_str = None, None, None, None
-                
-                if artifact and artifact.get("path"):
-                    lib_path_str = artifact.get("path")
-                
-                # --- #################################################### ---
-                # --- CORREÇÃO (Download): Lógica Unificada (LWJGL 2/3 + Fabric)
-                # --- #################################################### ---
-                elif not artifact:
-                    try:
-                        parts = lib_name.split(':')
-                        group = parts[0].replace('.', '/') # ex: org.lwjgl.lwjgl
-                        name = parts[1]                     # ex: lwjgl
-                        ver = parts[2]                      # ex: 2.9.4
-                        
-                        filename_base = f"{name}-{ver}"
-                        
-                        # Tenta encontrar um classificador nativo
-                        native_classifier = lib.get("natives", {}).get(current_os)
-                        
-                        if native_classifier:
-                            # Substitui ${arch} pelo valor real (32 ou 64)
-                            native_classifier = native_classifier.replace("${arch}", arch)
-                            filename = f"{filename_base}-{native_classifier}.jar"
-                        
-                        # --- CORREÇÃO IMPORTANTE AQUI ---
-                        # Se for "platform" (ex: jinput-platform), NÃO é um JAR principal.
-                        # Mas se *não for* "platform" E *não for* um nativo para este SO,
-                        # é um JAR principal (ex: lwjgl.jar, fabric-loader.jar)
-                        elif "platform" not in lib_name:
-                             filename = f"{filename_base}.jar"
-                        else:
-                            # É um "platform" ou um nativo para outro SO, ignora.
-                            continue
-                        # --- FIM DA CORREÇÃO ---
-
-                        lib_path_str = f"{group}/{name}/{ver}/{filename}"
-                    except Exception as e:
-                        print(f"[DEBUG] Falha ao construir caminho para {lib_name}: {e}")
-                        continue 
-                # --- FIM DA CORREÇÃO DE DOWNLOAD ---
-                
-                if lib_path_str:
-                    lib_path = os.path.join(LIBRARIES_DIR, lib_path_str)
-                    filename = lib_path_str.split('/')[-1]
+            # --- 1 a 4. PLANO DE DOWNLOAD (JSON, jar, bibliotecas, nativos, assets) ---
+            # (Se a versão foi instalada completa pelo downloader, não sobra nada para baixar)
+            plan = self._build_download_plan(version)
+            self._run_download_plan(plan)
+            version_data = plan["version_data"]
+            lib_features = plan["lib_features"]
+            main_jar, parent_jar = plan["main_jar"], plan["parent_jar"]
+            asset_index, asset_index_data = plan["asset_index"], plan["asset_index_data"]
+            is_modern_forge, is_modern_fabric = plan["is_modern_forge"], plan["is_modern_fabric"]
 
-                    custom_repo_url = lib.get("url") 
-                    
-                    if custom_repo_url:
-                        url = custom_repo_url.rstrip('/') + '/' + lib_path_str
-                    elif artifact and artifact.get("url"):
-                        url = artifact.get("url")
-                    else:
-                        # Se a URL não foi dada, constrói a URL padrão
-                        if "org.lwjgl.lwjgl" in lib_name or "net.java.jinput" in lib_name:
-                             url = f"https://libraries.minecraft.net/{lib_path_str}"
-                        elif "net.minecraftforge" in lib_name:
-                            url = f"https://maven.minecraftforge.net/{lib_path_str}"
-                        # --- CORREÇÃO: Adiciona URL do Fabric ---
-                        elif "net.fabricmc" in lib_name:
-                            url = f"https://maven.fabricmc.net/{lib_path_str}"
-                        # --- FIM DA CORREÇÃO ---
-                        else:
-                            url = f"https://libraries.minecraft.net/{lib_path_str}"
 
-                    if lib_path and not os.path.exists(lib_path):
-                        if not url:
-                            print(f"[AVISO] URL não encontrado para {lib_name}, pulando download.")
-                            continue
-                        tasks_to_download.append((url, lib_path, filename))
-                
-                if classifiers or natives:
-                    native_classifier_key = None
-                    if natives: native_classifier_key = natives.get(current_os)
-                    if not native_classifier_key: native_classifier_key = f"natives-{current_os}"
-                    
-                    # --- CORREÇÃO (Download): Substitui ${arch}
-                    native_classifier_key = native_classifier_key.replace("${arch}", arch)
-                    
-                    native_info = classifiers.get(native_classifier_key)
-                    if native_info:
-                        native_path = os.path.join(LIBRARIES_DIR, native_info["path"])
-                        if not os.path.exists(native_path):
-                            tasks_to_download.append((native_info["url"], native_path, native_info["path"].split('/')[-1]))
-
-            # 3d. Contar Assets
-            asset_index = version_data.get("assetIndex", {}).get("id", "legacy")
-            asset_index_url = version_data.get("assetIndex", {}).get("url")
-            asset_index_path = os.path.join(ASSETS_DIR, "indexes", f"{asset_index}.json")
-            
-            if asset_index_url and not os.path.exists(asset_index_path):
-                self.download_file(asset_index_url, asset_index_path, f"{asset_index}.json")
-
-            if os.path.exists(asset_index_path):
-                with open(asset_index_path, "r", encoding="utf-8") as f: data = json.load(f)
-                base_url = "https://resources.download.minecraft.net/"
-                for asset_name, info in data.get("objects", {}).items():
-                    asset_hash = info.get("hash")
-                    if not asset_hash: continue
-                    hash_prefix = asset_hash[:2]
-                    asset_path = os.path.join(ASSETS_DIR, "objects", hash_prefix, asset_hash)
-                    if not os.path.exists(asset_path):
-                        asset_url = f"{base_url}{hash_prefix}/{asset_hash}"
-                        tasks_to_download.append((asset_url, asset_path, asset_hash[:10]))
-            
-            # --- 4. EXECUTAR DOWNLOADS PARALELOS ---
-            total_downloads = len(tasks_to_download)
-            if total_downloads > 0:
-                print(f"[DOWNLOAD] Total de {total_downloads} arquivos faltando. Iniciando {min(total_downloads, 10)} downloads paralelos...")
-                self.ui_queue.put({"type": "progress_start_determinate", "max": total_downloads})
-                
-                completed_count = 0
-                last_reported_percent = -1
-                
-                with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                    futures = {executor.submit(self.download_file, url, path, filename): (url, filename) for (url, path, filename) in tasks_to_download}
-                    
-                    for future in concurrent.futures.as_completed(futures):
-                        url, filename = futures[future]
-                        try:
-                            result = future.result() 
-                        except Exception as e:
-                            # Ignora os erros 404 do Twitch e do JInput "fantasma"
-                            if "404 Client Error" in str(e) and ("twitch" in filename or "jinput-platform" in filename):
-                                print(f"[AVISO] Ignorando falha no download (404) para: {filename}")
-                            else:
-                                print(f"FALHA no download (trabalhador): {filename} - {e}")
-                        
-                        completed_count += 1
-                        current_percent = int((completed_count / total_downloads) * 100)
-                        
-                        if current_percent > last_reported_percent:
-                            self.ui_queue.put({"type": "progress_set_value", "value": completed_count})
-                            self.ui_queue.put({"type": "status", "text": f"Baixando ({current_percent}%)"})
-                            last_reported_percent = current_percent
-                
-                print(f"[DOWNLOAD] Downloads paralelos concluídos.")
-            else:
-                print("[DEBUG] Todos os arquivos já estão baixados e atualizados.")
+            # --- 4b. Assets legados (pre-1.7: 'virtual' / 'map_to_resources') ---
+            game_assets_dir = ASSETS_DIR
+            if asset_index_data.get("virtual") or asset_index_data.get("map_to_resources"):
+                self.ui_queue.put({"type": "status", "text": "Preparando assets legados..."})
+                game_assets_dir = self._materialise_legacy_assets(asset_index, asset_index_data, game_dir)
             
             # --- 5. CONSTRUIR CLASSPATH ---
             self.ui_queue.put({"type": "status", "text": "Construindo classpath..."})
@@ -4197,7 +8496,7 @@ class RaposoLauncher(ttk.Window):
                     "${version_name}": version,
                     "${game_directory}": game_dir,
                     "${assets_root}": ASSETS_DIR,
-                    "${game_assets}": ASSETS_DIR, 
+                    "${game_assets}": game_assets_dir, 
                     "${assets_index_name}": asset_index,
                     "${version_type}": version_data.get("type", "release"),
                 }
@@ -4225,6 +8524,7 @@ class RaposoLauncher(ttk.Window):
                     "${version_name}": version,
                     "${game_directory}": game_dir,
                     "${assets_root}": ASSETS_DIR,
+                    "${game_assets}": game_assets_dir,
                     "${assets_index_name}": asset_index, 
                     "${version_type}": version_data.get("type", "release"),
                     "${natives_directory}": natives_dir,